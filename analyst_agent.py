@@ -1,42 +1,73 @@
-import yfinance as yf
-import feedparser
-import urllib.parse
-import os
-from openai import OpenAI
+import logging
 
-# === Load API Key ===
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPENAI_API_KEY is missing from environment.")
+from http_client import get_client as get_http_client
+from llm_cache import cached_completion, cached_stream
+from news_store import get_store as get_news_store
+from openai_client import get_client
+from prompt_builder import (
+    SUMMARY_TOKENS,
+    company_profile,
+    headlines_section,
+    price_summary,
+    truncate_tokens,
+)
+from tracing import span
+from price_store import get_history
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+LOGGER = logging.getLogger(__name__)
+
+# yfinance, feedparser and the OpenAI client are loaded on first use so that
+# importing this module stays cheap; a missing OPENAI_API_KEY surfaces then.
+MODEL_NAME = "gpt-3.5-turbo"  # or "gpt-4o"
+# Returned by generate_analyst_summary when the completion fails.
+SUMMARY_ERROR = "Error: Unable to generate analyst summary."
+
+
+def _complete(prompt: str) -> str:
+    with span("openai.analyst"):
+        response = get_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}]
+        )
+    return response.choices[0].message.content.strip()
 
 # === Stock Info ===
+def _fetch_info(ticker):
+    import yfinance as yf
+
+    with get_http_client().guard("yfinance"), span("yfinance.info"):
+        return yf.Ticker(ticker).info
+
+
 def get_stock_info(ticker):
-    stock = yf.Ticker(ticker)
-    hist = stock.history(period="1mo")
-    info = stock.info
+    hist = get_history(ticker, period="1mo")
+    # The profile rarely changes, so it is cached per ticker (see prompt_builder).
+    profile = company_profile(ticker, lambda: _fetch_info(ticker))
 
     return {
-        "name": info.get("longName", ticker),
-        "sector": info.get("sector", "N/A"),
-        "summary": info.get("longBusinessSummary", "No summary available."),
-        "price_data": hist.tail(5)
+        "name": profile.name,
+        "sector": profile.sector,
+        "summary": profile.summary,
+        "price_data": hist.tail(5),
+        "history": hist,
     }
 
 # === News ===
-def get_news(company):
-    encoded = urllib.parse.quote(company + " stock")
-    feed = feedparser.parse(f"https://news.google.com/rss/search?q={encoded}")
-    return [entry['title'] + " - " + entry['link'] for entry in feed.entries[:5]]
+def get_news(company, limit=5):
+    # Served from the local news index, which polls the RSS feed in the background.
+    return get_news_store().headlines(company, limit=limit)
 
 # === Analyst Summary ===
-def generate_analyst_summary(ticker: str, risk_profile: str):
-    data = get_stock_info(ticker)
-    news = get_news(data["name"])
+def build_analyst_prompt(ticker: str, risk_profile: str, *, stock_info=None, news=None) -> str:
+    # Callers that already fetched the inputs (e.g. batch runs) can pass them in.
+    data = stock_info if stock_info is not None else get_stock_info(ticker)
+    if news is None:
+        news = get_news(data["name"])
 
-    price_str = data["price_data"].to_string()
-    news_str = "\n".join(news)
+    # Each section is compacted and capped to keep the prompt small.
+    summary_str = truncate_tokens(data["summary"], SUMMARY_TOKENS)
+    price_str = price_summary(data.get("history", data["price_data"]))
+    news_str = headlines_section(news)
 
     prompt = f"""
 You are a financial analyst AI.
@@ -45,10 +76,9 @@ Company: {data['name']}
 Sector: {data['sector']}
 Risk Profile: {risk_profile}
 
-Business Summary: {data['summary']}
+Business Summary: {summary_str}
 
-Recent Stock Prices:
-{price_str}
+Recent Stock Prices: {price_str}
 
 Recent News Headlines:
 {news_str}
@@ -58,13 +88,41 @@ Generate a concise financial outlook with:
 2. Key risks
 3. Investment insights based on the above data
 """
+    return prompt
+
+
+def generate_analyst_summary(ticker: str, risk_profile: str, *, stock_info=None, news=None):
+    prompt = build_analyst_prompt(ticker, risk_profile, stock_info=stock_info, news=news)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # or "gpt-4o"
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
+        return cached_completion(MODEL_NAME, prompt, lambda: _complete(prompt))
     except Exception as e:
         print("❌ Error generating summary:", e)
-        return "Error: Unable to generate analyst summary."
+        return SUMMARY_ERROR
+
+
+def stream_analyst_summary(ticker: str, risk_profile: str):
+    """Yield the analyst summary piece by piece as the completion streams in.
+
+    Errors propagate, possibly after part of the summary was yielded, so a
+    caller never mistakes a truncated summary for a complete one.
+    """
+    prompt = build_analyst_prompt(ticker, risk_profile)
+
+    def produce():
+        with span("openai.analyst"):
+            stream = get_client().chat.completions.create(
+                model=MODEL_NAME,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    # Identical concurrent requests share one upstream stream (see llm_cache).
+    try:
+        yield from cached_stream(MODEL_NAME, prompt, produce)
+    except Exception as exc:
+        LOGGER.warning("Streaming the analyst summary for %s failed: %s", ticker, exc)
+        raise
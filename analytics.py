@@ -1,56 +1,156 @@
 import base64
 import io
-from typing import Optional
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
 
-import matplotlib
+from price_store import get_history
+from tracing import register_cache, traced
 
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import yfinance as yf
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from matplotlib.figure import Figure
 
+# freq -> (title, pandas >= 2.2 alias, legacy alias)
+_RETURN_FREQUENCIES = {
+    "Y": ("Year-over-Year", "YE", "Y"),
+    "Q": ("Quarter-over-Quarter", "QE", "Q"),
+    "M": ("Month-over-Month", "ME", "M"),
+}
 
-def fetch_returns_plot(
+
+def returns_series(
     ticker: str,
     *,
     period: str = "5y",
     freq: str = "Y",
-) -> Optional[plt.Figure]:
-    """Return a Matplotlib figure showing historical returns."""
-    data = yf.Ticker(ticker).history(period=period)
+) -> Optional[dict]:
+    """Return period-over-period returns as a compact, JSON-serialisable dict.
+
+    The result holds ``title``, ``labels`` (period end dates) and ``values``
+    (returns in percent), or ``None`` when there is not enough data.
+    """
+    if freq not in _RETURN_FREQUENCIES:
+        return None
+    data = get_history(ticker, period=period)
     if data.empty:
         return None
 
-    if freq == "Y":
-        resampled = data["Close"].resample("Y").last()
-        title = "Year-over-Year"
-    elif freq == "Q":
-        resampled = data["Close"].resample("Q").last()
-        title = "Quarter-over-Quarter"
-    elif freq == "M":
-        resampled = data["Close"].resample("M").last()
-        title = "Month-over-Month"
-    else:
-        return None
+    title, rule, legacy_rule = _RETURN_FREQUENCIES[freq]
+    try:
+        resampled = data["Close"].resample(rule).last()
+    except ValueError:  # pandas < 2.2 only knows the legacy aliases
+        resampled = data["Close"].resample(legacy_rule).last()
 
     returns = resampled.pct_change().dropna() * 100
     if returns.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(8, 4))
-    returns.plot(kind="bar", ax=ax, color="skyblue", edgecolor="black")
-    ax.set_title(f"{ticker} {title} Returns")
+    return {
+        "title": f"{ticker} {title} Returns",
+        "labels": [stamp.strftime("%Y-%m-%d") for stamp in returns.index],
+        "values": [round(float(value), 4) for value in returns.to_numpy()],
+    }
+
+
+def returns_figure(series: dict) -> "Figure":
+    """Draw a :func:`returns_series` result as a bar chart."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar(series["labels"], series["values"], color="skyblue", edgecolor="black")
+    ax.tick_params(axis="x", labelrotation=90)
+    ax.set_title(series["title"])
     ax.set_ylabel("Return (%)")
     ax.set_xlabel("Period")
     ax.grid(True)
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
 
-def figure_to_data_url(fig: plt.Figure) -> str:
+def fetch_returns_plot(
+    ticker: str,
+    *,
+    period: str = "5y",
+    freq: str = "Y",
+) -> Optional["Figure"]:
+    """Return a Matplotlib figure showing historical returns.
+
+    The figure is built with the object-oriented API rather than pyplot so it
+    can be rendered safely from concurrent request threads.
+    """
+    series = returns_series(ticker, period=period, freq=freq)
+    return returns_figure(series) if series else None
+
+
+@traced("chart.png")
+def figure_to_data_url(fig: "Figure") -> str:
     """Convert a Matplotlib figure into a PNG data URL."""
     buffer = io.BytesIO()
     fig.savefig(buffer, format="png", bbox_inches="tight")
-    plt.close(fig)
     buffer.seek(0)
     encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
     return f"data:image/png;base64,{encoded}"
+
+
+class RenderCache:
+    """Size-bounded LRU of rendered chart payloads with a TTL.
+
+    Keys describe everything a chart depends on, e.g.
+    ``("returns", ticker, period, freq, price_version)`` or
+    ``("trader", ticker, model_version, price_version)``, where
+    ``price_version`` is :meth:`price_store.PriceStore.entry_version`.
+    Values are JSON-serialisable and their size is measured as encoded JSON.
+    """
+
+    def __init__(self, *, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = render()
+        size = len(json.dumps(value))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            if size <= self.max_bytes:
+                self._entries[key] = (now + self.ttl_seconds, value, size)
+                self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+render_cache = RenderCache(
+    max_bytes=int(os.environ.get("FINGEN_CHART_CACHE_BYTES", 64 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("FINGEN_CHART_CACHE_TTL", 60 * 60)),
+)
+register_cache("chart", render_cache.stats)
@@ -0,0 +1,275 @@
+"""Backtest kernel reproducing ``TradingEnv`` accounting for fixed action vectors.
+
+``TradingEnv.step`` buys one share when the balance covers the price, sells
+one when a share is held, and values the portfolio at the next price.  The
+kernel applies exactly those rules to precomputed actions for one price
+series or a whole batch, without the gym API.  Arithmetic is done in the
+dtype ``TradingEnv`` ends up with (``np.result_type(prices, initial_balance)``)
+so results match it bit for bit (see ``tests/test_backtest.py``).
+
+When numba is installed the per-series loop is compiled; otherwise the
+batch is stepped through time with the accounting vectorised across series.
+
+:func:`backtest_weights` does the same for the target-weight actions of
+:class:`weight_trading_env.WeightTradingEnv`, including its fees and slippage.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[np.ndarray, Sequence[float]]
+
+# Steps per year used to annualise the Sharpe ratio of daily bars.
+PERIODS_PER_YEAR = 252
+
+
+@dataclass
+class BacktestResult:
+    """Portfolio curves and executed trades for a batch of series.
+
+    ``values[i, t]`` is the portfolio value after step ``t`` of series ``i``
+    (``NaN`` past ``lengths[i]``); ``bought``/``sold`` flag steps where a buy
+    or sell was actually executed.
+    """
+
+    values: np.ndarray
+    bought: np.ndarray
+    sold: np.ndarray
+    lengths: np.ndarray
+    initial_balance: float
+
+    @classmethod
+    def from_runs(cls, runs: Sequence[dict], initial_balance: float) -> "BacktestResult":
+        """Stack per-series ``test_trader.simulate_batch`` runs into one result."""
+        lengths = np.array([len(run["portfolio_values"]) for run in runs], dtype=np.int64)
+        n_steps = int(lengths.max(initial=0))
+        dtype = np.result_type(np.float32, *[run["portfolio_values"].dtype for run in runs])
+        values = np.full((len(runs), n_steps), np.nan, dtype=dtype)
+        bought = np.zeros((len(runs), n_steps), dtype=bool)
+        sold = np.zeros((len(runs), n_steps), dtype=bool)
+        for row, (run, length) in enumerate(zip(runs, lengths)):
+            values[row, :length] = run["portfolio_values"]
+            bought[row, :length] = run["bought"]
+            sold[row, :length] = run["sold"]
+        return cls(values, bought, sold, lengths, initial_balance)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def buy_steps(self, row: int = 0) -> np.ndarray:
+        return np.flatnonzero(self.bought[row, : self.lengths[row]])
+
+    def sell_steps(self, row: int = 0) -> np.ndarray:
+        return np.flatnonzero(self.sold[row, : self.lengths[row]])
+
+    def curve(self, row: int = 0) -> np.ndarray:
+        return self.values[row, : self.lengths[row]]
+
+    def stats(self) -> dict[str, np.ndarray]:
+        """Per-series ``final_value``, ``return_pct``, ``max_drawdown_pct``,
+        ``sharpe`` and ``trades``, each an array with one entry per series."""
+        initial = float(self.initial_balance)
+        curve = np.concatenate(
+            (np.full((len(self), 1), initial), self.values.astype(np.float64)), axis=1
+        )
+        final_value = curve[np.arange(len(self)), self.lengths]
+        live = np.arange(curve.shape[1] - 1) < self.lengths[:, None]
+        count = np.maximum(self.lengths, 1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step_returns = np.where(live, curve[:, 1:] / curve[:, :-1] - 1.0, 0.0)
+            mean = step_returns.sum(axis=1) / count
+            std = np.sqrt(np.where(live, (step_returns - mean[:, None]) ** 2, 0.0).sum(axis=1) / count)
+            sharpe = np.where(std > 0, mean / std * np.sqrt(PERIODS_PER_YEAR), 0.0)
+
+            peaks = np.fmax.accumulate(curve, axis=1)[:, 1:]
+            drawdown = np.where(live & (peaks > 0), curve[:, 1:] / peaks - 1.0, 0.0)
+            max_drawdown = np.abs(drawdown.min(axis=1, initial=0.0)) * 100
+
+        return {
+            "final_value": final_value,
+            "return_pct": (final_value - self.initial_balance) / self.initial_balance * 100,
+            "max_drawdown_pct": max_drawdown,
+            "sharpe": np.nan_to_num(sharpe, nan=0.0, posinf=0.0, neginf=0.0),
+            "trades": self.bought.sum(axis=1) + self.sold.sum(axis=1),
+        }
+
+
+def apply_step(prices, step, live, chosen, balance, holding, values, bought=None, sold=None) -> None:
+    """Apply ``TradingEnv.step`` at ``step`` to the rows ``live`` of a batch.
+
+    ``chosen`` holds those rows' actions.  ``balance`` and ``holding`` are
+    updated in place and the value after the step is written to
+    ``values[live, step]``; ``bought``/``sold``, when given, flag executed
+    trades.  Shared by the backtest kernel and ``test_trader.simulate_batch``.
+    """
+    dtype = values.dtype
+    price = prices[live, step]
+    buy = (chosen == 1) & (balance[live] >= price)
+    sell = (chosen == 2) & (holding[live] > 0)
+    balance[live] += np.where(sell, price, 0) - np.where(buy, price, 0)
+    holding[live] += buy.astype(dtype) - sell.astype(dtype)
+    values[live, step] = balance[live] + holding[live] * prices[live, step + 1]
+    if bought is not None:
+        bought[live, step] = buy
+    if sold is not None:
+        sold[live, step] = sell
+
+
+def _kernel_numpy(prices, actions, lengths, balance, holding, values, bought, sold):
+    for step in range(actions.shape[1]):
+        live = np.flatnonzero(lengths > step)
+        if not len(live):
+            break
+        apply_step(prices, step, live, actions[live, step], balance, holding, values, bought, sold)
+
+
+@lru_cache(maxsize=1)
+def _numba_kernel() -> Optional[Callable]:
+    """Compile the per-series kernel with numba, or return ``None`` without it."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+
+    @njit(parallel=True, cache=True)
+    def kernel(prices, actions, lengths, balance, holding, values, bought, sold):
+        for row in prange(actions.shape[0]):
+            for step in range(lengths[row]):
+                price = prices[row, step]
+                action = actions[row, step]
+                if action == 1 and balance[row] >= price:
+                    balance[row] -= price
+                    holding[row] += 1
+                    bought[row, step] = True
+                elif action == 2 and holding[row] > 0:
+                    balance[row] += price
+                    holding[row] -= 1
+                    sold[row, step] = True
+                values[row, step] = balance[row] + holding[row] * prices[row, step + 1]
+
+    return kernel
+
+
+def backtest_batch(
+    price_series: Sequence[ArrayLike],
+    action_series: Sequence[ArrayLike],
+    *,
+    initial_balance: float = 1000,
+    use_numba: Optional[bool] = None,
+) -> BacktestResult:
+    """Backtest each action vector against its price series.
+
+    Series may differ in length; series ``i`` runs ``len(prices_i) - 1``
+    steps and needs at least that many actions (extra actions are ignored).
+    ``use_numba=None`` uses numba when it is installed.
+    """
+    if len(price_series) != len(action_series):
+        raise ValueError("price_series and action_series must have the same length")
+
+    series = [np.nan_to_num(np.asarray(prices)).ravel() for prices in price_series]
+    lengths = np.array([max(len(prices) - 1, 0) for prices in series], dtype=np.int64)
+    n_steps = int(lengths.max(initial=0))
+    price_dtype = np.result_type(*[prices.dtype for prices in series]) if series else np.float32
+    dtype = np.result_type(price_dtype, initial_balance)
+
+    prices = np.zeros((len(series), n_steps + 1), dtype=price_dtype)
+    actions = np.zeros((len(series), n_steps), dtype=np.int64)
+    for row, (row_prices, row_actions) in enumerate(zip(series, action_series)):
+        row_actions = np.asarray(row_actions).ravel()
+        if len(row_actions) < lengths[row]:
+            raise ValueError(
+                f"series {row} needs {lengths[row]} actions, got {len(row_actions)}"
+            )
+        prices[row, : len(row_prices)] = row_prices
+        actions[row, : lengths[row]] = row_actions[: lengths[row]]
+
+    values = np.full((len(series), n_steps), np.nan, dtype=dtype)
+    bought = np.zeros((len(series), n_steps), dtype=bool)
+    sold = np.zeros((len(series), n_steps), dtype=bool)
+
+    kernel = _numba_kernel() if use_numba is not False else None
+    if use_numba and kernel is None:
+        raise ImportError("use_numba=True requires numba to be installed")
+    balance = np.full(len(series), initial_balance, dtype=dtype)
+    holding = np.zeros(len(series), dtype=dtype)
+    (kernel or _kernel_numpy)(
+        prices.astype(dtype, copy=False), actions, lengths, balance, holding, values, bought, sold
+    )
+    return BacktestResult(values, bought, sold, lengths, initial_balance)
+
+
+def backtest(
+    prices: ArrayLike,
+    actions: ArrayLike,
+    *,
+    initial_balance: float = 1000,
+    use_numba: Optional[bool] = None,
+) -> BacktestResult:
+    """Backtest a single series; a one-row :func:`backtest_batch`."""
+    return backtest_batch([prices], [actions], initial_balance=initial_balance, use_numba=use_numba)
+
+
+def backtest_weights(
+    price_series: Sequence[ArrayLike],
+    weight_series: Sequence[ArrayLike],
+    *,
+    initial_balance: float = 1000,
+    fee_rate: Optional[float] = None,
+    slippage: Optional[float] = None,
+) -> BacktestResult:
+    """Backtest target-weight vectors with ``WeightTradingEnv`` accounting.
+
+    ``weight_series[i][t]`` is the fraction of the portfolio to hold after
+    step ``t`` (clipped to ``[0, 1]``).  Fees and slippage default to the
+    environment's.  ``bought``/``sold`` flag steps that increased or reduced
+    the position.  Arithmetic is float64, like the environment's.
+    """
+    from weight_trading_env import DEFAULT_FEE_RATE, DEFAULT_SLIPPAGE
+
+    fee_rate = DEFAULT_FEE_RATE if fee_rate is None else float(fee_rate)
+    slippage = DEFAULT_SLIPPAGE if slippage is None else float(slippage)
+    if len(price_series) != len(weight_series):
+        raise ValueError("price_series and weight_series must have the same length")
+
+    series = [np.nan_to_num(np.asarray(prices)).ravel() for prices in price_series]
+    lengths = np.array([max(len(prices) - 1, 0) for prices in series], dtype=np.int64)
+    n_steps = int(lengths.max(initial=0))
+    prices = np.zeros((len(series), n_steps + 1), dtype=np.float64)
+    weights = np.zeros((len(series), n_steps), dtype=np.float64)
+    for row, (row_prices, row_weights) in enumerate(zip(series, weight_series)):
+        row_weights = np.asarray(row_weights, dtype=np.float64).ravel()
+        if len(row_weights) < lengths[row]:
+            raise ValueError(
+                f"series {row} needs {lengths[row]} weights, got {len(row_weights)}"
+            )
+        prices[row, : len(row_prices)] = row_prices
+        weights[row, : lengths[row]] = np.clip(row_weights[: lengths[row]], 0.0, 1.0)
+
+    values = np.full((len(series), n_steps), np.nan)
+    bought = np.zeros((len(series), n_steps), dtype=bool)
+    sold = np.zeros((len(series), n_steps), dtype=bool)
+    cash = np.full(len(series), float(initial_balance))
+    shares = np.zeros(len(series))
+    for step in range(n_steps):
+        live = np.flatnonzero((lengths > step) & (prices[:, step] > 0))
+        price = prices[live, step]
+        held = shares[live]
+        available = cash[live]
+        # Same operation order as ``weight_trading_env.rebalance`` for identical rounding.
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = weights[live, step] * (available + held * price) / price - held
+            unit_cost = price * (1.0 + slippage) * (1.0 + fee_rate)
+            delta = np.where(delta > 0, np.minimum(delta, available / unit_cost), delta)
+        unit_price = np.where(delta > 0, unit_cost, price * (1.0 - slippage) * (1.0 - fee_rate))
+        cash[live] = np.where(delta != 0, available - delta * unit_price, available)
+        shares[live] = held + delta
+        bought[live, step] = delta > 0
+        sold[live, step] = delta < 0
+        live = np.flatnonzero(lengths > step)
+        values[live, step] = cash[live] + shares[live] * prices[live, step + 1]
+    return BacktestResult(values, bought, sold, lengths, initial_balance)
@@ -0,0 +1,162 @@
+"""Vectorised counterpart of :class:`trading_env.TradingEnv`.
+
+``BatchTradingEnv`` keeps every ticker's prices in one padded 2-D array and
+advances all sub-environments with a handful of NumPy operations per step, so
+PPO can collect many rollouts per call without a Python loop over envs.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+HOLD, BUY, SELL = 0, 1, 2
+
+
+class BatchTradingEnv(VecEnv):
+    """Step ``n_envs`` single-share trading episodes at once.
+
+    Each sub-environment follows exactly the accounting of ``TradingEnv``
+    (buy one share if affordable, sell one if held, reward is the change in
+    portfolio value) and is assigned a random ticker on every reset, like
+    ``train_trader.MultiEnvWrapper``.  Finished episodes are reset in place via
+    masks and report their last observation as ``terminal_observation``;
+    every step reports ``portfolio_value`` in its info like ``TradingEnv``.
+    """
+
+    render_mode: Optional[str] = None
+
+    def __init__(
+        self,
+        price_series: Sequence[np.ndarray],
+        *,
+        n_envs: Optional[int] = None,
+        initial_balance: float = 1000,
+        seed: Optional[int] = None,
+    ) -> None:
+        series = [np.asarray(prices, dtype=np.float32).ravel() for prices in price_series]
+        if not series:
+            raise ValueError("❌ No valid ticker data found.")
+        if min(len(prices) for prices in series) < 2:
+            raise ValueError("Every price series needs at least two points.")
+
+        self.lengths = np.array([len(prices) for prices in series], dtype=np.int64)
+        # Pad with each series' last price so out-of-range gathers stay finite.
+        self.prices = np.empty((len(series), int(self.lengths.max())), dtype=np.float32)
+        for row, prices in enumerate(series):
+            self.prices[row, : len(prices)] = prices
+            self.prices[row, len(prices) :] = prices[-1]
+
+        self.initial_balance = initial_balance
+        num_envs = n_envs or len(series)
+        observation_space = spaces.Box(low=0, high=np.inf, shape=(3,), dtype=np.float32)
+        action_space = spaces.Discrete(3)
+        super().__init__(num_envs, observation_space, action_space)
+
+        self._rng = np.random.default_rng(seed)
+        self._env_ids = np.arange(num_envs)
+        self.ticker_ids = np.zeros(num_envs, dtype=np.int64)
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.balance = np.zeros(num_envs, dtype=np.float64)
+        self.holding = np.zeros(num_envs, dtype=np.int64)
+        self._obs = np.zeros((num_envs, 3), dtype=np.float32)
+        self._actions = np.zeros(num_envs, dtype=np.int64)
+
+    # ----------------------------------------------------------------- state
+    def _reset_envs(self, mask: np.ndarray) -> None:
+        count = int(mask.sum())
+        if count == 0:
+            return
+        self.ticker_ids[mask] = self._rng.integers(0, len(self.lengths), size=count)
+        self.current_step[mask] = 0
+        self.balance[mask] = self.initial_balance
+        self.holding[mask] = 0
+
+    def _fill_obs(self) -> np.ndarray:
+        self._obs[:, 0] = self.prices[self.ticker_ids, self.current_step]
+        self._obs[:, 1] = self.balance
+        self._obs[:, 2] = self.holding
+        return self._obs.copy()
+
+    # --------------------------------------------------------------- VecEnv
+    def reset(self) -> np.ndarray:
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._fill_obs()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions[:] = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        actions = self._actions
+        price = self.prices[self.ticker_ids, self.current_step].astype(np.float64)
+        prev_value = self.balance + self.holding * price
+
+        buy = (actions == BUY) & (self.balance >= price)
+        sell = (actions == SELL) & (self.holding > 0)
+        self.balance += np.where(sell, price, 0.0) - np.where(buy, price, 0.0)
+        self.holding += buy.astype(np.int64) - sell.astype(np.int64)
+
+        self.current_step += 1
+        next_price = self.prices[self.ticker_ids, self.current_step].astype(np.float64)
+        values = self.balance + self.holding * next_price
+        rewards = (values - prev_value).astype(np.float32)
+        dones = self.current_step >= self.lengths[self.ticker_ids] - 1
+
+        infos: list[dict[str, Any]] = [{"portfolio_value": value} for value in values.tolist()]
+        if dones.any():
+            terminal_obs = self._fill_obs()
+            for idx in np.flatnonzero(dones):
+                infos[idx]["terminal_observation"] = terminal_obs[idx]
+                infos[idx]["TimeLimit.truncated"] = False
+            self._reset_envs(dones)
+        return self._fill_obs(), rewards, dones, infos
+
+    def close(self) -> None:
+        return None
+
+    def seed(self, seed: Optional[int] = None) -> list[Optional[int]]:
+        self._rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def _indices(self, indices: Optional[Iterable[int] | int]) -> np.ndarray:
+        if indices is None:
+            return self._env_ids
+        if isinstance(indices, int):
+            return np.array([indices])
+        return np.asarray(list(indices), dtype=np.int64)
+
+    def _per_env(self, value: Any, indices) -> list[Any]:
+        """Split a per-env array or list into entries for ``indices``; replicate anything else."""
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[idx] for idx in self._indices(indices)]
+        if isinstance(value, list) and len(value) == self.num_envs:
+            return [value[idx] for idx in self._indices(indices)]
+        return [value for _ in self._indices(indices)]
+
+    def get_attr(self, attr_name: str, indices=None) -> list[Any]:
+        return self._per_env(getattr(self, attr_name), indices)
+
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        current = getattr(self, attr_name, None)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[self._indices(indices)] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> list[Any]:
+        """Call ``method_name`` on the batch once and return its result per env.
+
+        The sub-environments are rows of shared arrays rather than objects,
+        so the method runs on the batch; per-env results (arrays or lists of
+        length ``num_envs``) are split like :meth:`get_attr`.
+        """
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return self._per_env(result, indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list[bool]:
+        return [False for _ in self._indices(indices)]
+
+    def get_images(self) -> Sequence[Optional[np.ndarray]]:
+        return [None for _ in self._env_ids]
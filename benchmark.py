@@ -0,0 +1,470 @@
+"""Offline benchmark harness for the hot paths of the dashboard.
+
+Every benchmark runs against synthetic prices from
+``data_utils._generate_synthetic_prices`` with yfinance, feedparser, OpenAI
+and outbound HTTP replaced by in-process stubs, so results reflect our own
+code rather than the network.  Caches are placed in a temporary directory.
+
+Results are written as JSON under ``.benchmarks/`` and can be compared with
+an earlier run; the comparison exits non-zero when a benchmark's median got
+slower than the tolerance allows::
+
+    python benchmark.py --save baseline
+    python benchmark.py --compare baseline
+    python benchmark.py --only env_step,search_local --repeat 10
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+RESULTS_DIR = ROOT / ".benchmarks"
+
+# Rows returned by the stubbed yfinance for each period.
+_PERIOD_LENGTHS = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "max": 2520}
+
+Setup = Callable[[], tuple[Callable[[], Any], int]]
+_BENCHMARKS: dict[str, tuple[Setup, int]] = {}
+
+
+class Skip(Exception):
+    """Raised by a benchmark setup that cannot run in this checkout."""
+
+
+def benchmark(name: str, *, number: int = 1) -> Callable[[Setup], Setup]:
+    """Register ``setup``; it returns ``(fn, ops)`` where ``fn`` is timed.
+
+    ``ops`` is how many units of work one ``fn()`` call performs (steps,
+    series, requests) and is used to report throughput.
+    """
+
+    def register(setup: Setup) -> Setup:
+        _BENCHMARKS[name] = (setup, number)
+        return setup
+
+    return register
+
+
+# --------------------------------------------------------------------- stubs
+def _synthetic_frame(ticker: str, period: str):
+    import pandas as pd
+
+    from data_utils import _generate_synthetic_prices
+
+    length = _PERIOD_LENGTHS.get(period, 252)
+    seed = zlib.crc32(ticker.encode("utf-8"))
+    close = _generate_synthetic_prices(length=length, seed=seed).astype(np.float64)
+    index = pd.bdate_range(end=pd.Timestamp.now(tz="America/New_York").normalize(), periods=length)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": np.full(length, 1_000_000.0),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+class _StubTicker:
+    def __init__(self, symbol: str) -> None:
+        self.ticker = symbol
+        self.info = {
+            "longName": f"{symbol} Holdings Inc.",
+            "sector": "Technology",
+            "longBusinessSummary": f"{symbol} makes synthetic products for benchmarks.",
+            "website": f"https://www.{symbol.lower()}.example.com",
+            "regularMarketPrice": 123.45,
+            "currency": "USD",
+        }
+
+    def history(self, period: str = "1mo", interval: str = "1d", **_: Any):
+        return _synthetic_frame(self.ticker, period)
+
+
+def _stub_download(*_: Any, **__: Any):
+    raise RuntimeError("bulk download is not stubbed; callers fall back per ticker")
+
+
+class _StubResponse:
+    def __init__(self, *, payload: Any = None, content: bytes = b"", content_type: str = "") -> None:
+        self.status_code = 200
+        self._payload = payload
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+
+    def json(self) -> Any:
+        return self._payload
+
+
+def _stub_request(method: str, url: str, params: Optional[dict] = None, **_: Any) -> _StubResponse:
+    if "finance/search" in url:
+        query = (params or {}).get("q", "").upper()
+        quotes = [{"symbol": f"{query}X{i}", "shortname": f"{query} Synthetic {i}"} for i in range(5)]
+        return _StubResponse(payload={"quotes": quotes})
+    return _StubResponse(content=b"\x89PNG\r\n\x1a\n" + b"\0" * 2048, content_type="image/png")
+
+
+class _StubCompletions:
+    _TEXT = "Synthetic analysis. " * 40
+
+    def create(self, *, model: str, messages: list, stream: bool = False, **_: Any):
+        message = types.SimpleNamespace(content=self._TEXT)
+        if not stream:
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+        words = self._TEXT.split(" ")
+        return iter(
+            types.SimpleNamespace(
+                choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=word + " "))]
+            )
+            for word in words
+        )
+
+
+def install_stubs(workdir: Path) -> None:
+    """Point every cache at ``workdir`` and replace network backends with stubs.
+
+    Must run before the application modules are imported, since they read
+    their cache locations from the environment at import time.
+    """
+    os.environ["FINGEN_PRICE_CACHE"] = str(workdir / "prices")
+    os.environ["FINGEN_LOGO_CACHE"] = str(workdir / "logos")
+    os.environ["FINGEN_SYMBOL_CACHE"] = str(workdir / "symbols.csv")
+    os.environ["FINGEN_NEWS_DB"] = str(workdir / "news.sqlite3")
+    os.environ["FINGEN_LLM_CACHE"] = "off"
+    os.environ.setdefault("MPLCONFIGDIR", str(ROOT / ".matplotlib_cache"))
+
+    sys.modules["yfinance"] = types.ModuleType("yfinance")
+    sys.modules["yfinance"].Ticker = _StubTicker
+    sys.modules["yfinance"].download = _stub_download
+
+    feedparser = types.ModuleType("feedparser")
+    feedparser.parse = lambda url, **_: types.SimpleNamespace(
+        entries=[{"title": f"Headline {i}", "link": f"https://news.example.com/{i}"} for i in range(10)]
+    )
+    sys.modules["feedparser"] = feedparser
+
+    import http_client
+
+    # The real client runs (limits, breaker, metrics); only its session is stubbed.
+    http_client._CLIENT = http_client.HttpClient()
+    http_client._CLIENT.session.request = _stub_request
+
+    import openai_client
+
+    openai_client._CLIENT = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=_StubCompletions())
+    )
+
+
+def _require_model() -> None:
+    from test_trader import MODEL_PATH
+
+    if not MODEL_PATH.exists():
+        raise Skip(f"{MODEL_PATH} not found; train a model first")
+
+
+# ---------------------------------------------------------------- benchmarks
+@benchmark("env_step")
+def _env_step():
+    from data_utils import _generate_synthetic_prices
+    from trading_env import TradingEnv
+
+    prices = _generate_synthetic_prices(length=10_000, seed=1)
+    actions = np.random.default_rng(1).integers(0, 3, len(prices)).tolist()
+    env = TradingEnv(prices)
+
+    def run() -> None:
+        env.reset()
+        for action in actions[:-1]:
+            env.step(action)
+
+    return run, len(prices) - 1
+
+
+@benchmark("weight_env_step")
+def _weight_env_step():
+    from data_utils import _generate_synthetic_prices
+    from weight_trading_env import WeightTradingEnv
+
+    prices = _generate_synthetic_prices(length=10_000, seed=1)
+    actions = np.random.default_rng(1).integers(0, 5, len(prices)).tolist()
+    env = WeightTradingEnv(prices, levels=5)
+
+    def run() -> None:
+        env.reset()
+        for action in actions[:-1]:
+            env.step(action)
+
+    return run, len(prices) - 1
+
+
+@benchmark("batch_env_step")
+def _batch_env_step():
+    from batch_trading_env import BatchTradingEnv
+    from data_utils import _generate_synthetic_prices
+
+    series = [_generate_synthetic_prices(length=1_000, seed=seed) for seed in range(32)]
+    env = BatchTradingEnv(series, n_envs=32, seed=0)
+    actions = np.random.default_rng(2).integers(0, 3, (500, 32))
+
+    def run() -> None:
+        env.reset()
+        for row in actions:
+            env.step_async(row)
+            env.step_wait()
+
+    return run, actions.size
+
+
+@benchmark("price_series_cached", number=50)
+def _price_series_cached():
+    from data_utils import get_price_series
+
+    get_price_series("SYN", period="1y")
+    return lambda: get_price_series("SYN", period="1y"), 1
+
+
+@benchmark("backtest_batch")
+def _backtest_batch():
+    from backtest import backtest_batch
+    from data_utils import _generate_synthetic_prices
+
+    prices = [_generate_synthetic_prices(length=253, seed=seed) for seed in range(1_000)]
+    actions = [np.random.default_rng(seed).integers(0, 3, 252) for seed in range(1_000)]
+    return lambda: backtest_batch(prices, actions).stats(), len(prices)
+
+
+@benchmark("backtest_weights")
+def _backtest_weights():
+    from backtest import backtest_weights
+    from data_utils import _generate_synthetic_prices
+
+    prices = [_generate_synthetic_prices(length=253, seed=seed) for seed in range(1_000)]
+    weights = [np.random.default_rng(seed).uniform(0, 1, 252) for seed in range(1_000)]
+    return lambda: backtest_weights(prices, weights).stats(), len(prices)
+
+
+@benchmark("simulate_batch")
+def _simulate_batch():
+    _require_model()
+    from data_utils import _generate_synthetic_prices
+    from test_trader import simulate_batch
+
+    windows = [_generate_synthetic_prices(length=63, seed=seed) for seed in range(256)]
+    return lambda: simulate_batch(windows), len(windows)
+
+
+@benchmark("trader_series")
+def _trader_series():
+    _require_model()
+    from test_trader import trader_series
+
+    return lambda: trader_series("SYN"), 1
+
+
+@benchmark("trader_chart_png")
+def _trader_chart_png():
+    _require_model()
+    from analytics import figure_to_data_url
+    from test_trader import trader_figure, trader_series
+
+    series = trader_series("SYN")
+    return lambda: figure_to_data_url(trader_figure(series)), 1
+
+
+@benchmark("returns_chart_png")
+def _returns_chart_png():
+    from analytics import figure_to_data_url, returns_figure, returns_series
+
+    series = returns_series("SYN", period="5y", freq="Q")
+    return lambda: figure_to_data_url(returns_figure(series)), 1
+
+
+@benchmark("search_local", number=20)
+def _search_local():
+    from ticker_search import search_tickers
+
+    search_tickers("app")
+    return lambda: search_tickers("app"), 1
+
+
+@benchmark("search_remote")
+def _search_remote():
+    from ticker_search import search_tickers
+
+    counter = iter(range(10**9))
+    # A fresh query every call so neither the index nor the caches can answer it.
+    return lambda: search_tickers(f"qz{next(counter)}q"), 1
+
+
+def _api_run(chart_format: str):
+    _require_model()
+    from analytics import render_cache
+    from webapp import create_app
+
+    client = create_app().test_client()
+    payload = {"ticker": "SYN", "risk": "moderate", "period": "5y", "freq": "Y", "chartFormat": chart_format}
+
+    def run() -> None:
+        render_cache.clear()
+        response = client.post("/api/run", json=payload)
+        body = response.get_json()
+        if response.status_code != 200 or body.get("errors"):
+            raise RuntimeError(f"/api/run failed: {response.status_code} {body.get('errors')}")
+
+    return run, 1
+
+
+benchmark("api_run_png")(lambda: _api_run("png"))
+benchmark("api_run_json")(lambda: _api_run("json"))
+
+
+@benchmark("import_app")
+def _import_app():
+    command = [sys.executable, "-c", "import server"]
+    env = {**os.environ, "FINGEN_WARMUP": "0"}
+    return lambda: subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True), 1
+
+
+# ------------------------------------------------------------------- runner
+def _measure(fn: Callable[[], Any], *, repeat: int, number: int) -> list[float]:
+    fn()  # warm up caches, JIT tracing and lazy imports
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - started) / number)
+    return timings
+
+
+def run_benchmarks(names: Optional[list[str]] = None, *, repeat: int = 5) -> dict:
+    """Run the selected benchmarks and return a JSON-serialisable result."""
+    selected = names or list(_BENCHMARKS)
+    unknown = sorted(set(selected) - set(_BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results: dict[str, dict] = {}
+    for name in selected:
+        setup, number = _BENCHMARKS[name]
+        try:
+            fn, ops = setup()
+        except Skip as exc:
+            print(f"{name:<22} skipped: {exc}")
+            continue
+        timings = _measure(fn, repeat=repeat, number=number)
+        median = statistics.median(timings)
+        results[name] = {
+            "median_s": median,
+            "min_s": min(timings),
+            "ops": ops,
+            "ops_per_s": ops / median if median > 0 else None,
+            "repeat": repeat,
+            "number": number,
+        }
+        print(f"{name:<22} {median * 1e3:10.3f} ms   {ops / median:14,.0f} ops/s")
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def _results_path(name: str) -> Path:
+    path = Path(name)
+    return path if path.suffix == ".json" else RESULTS_DIR / f"{name}.json"
+
+
+def compare(current: dict, baseline: dict, *, tolerance: float) -> list[str]:
+    """Print median ratios against ``baseline``; return the regressed names."""
+    regressions = []
+    print(f"\n{'benchmark':<22} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            print(f"{name:<22} {'-':>12} {result['median_s'] * 1e3:12.3f}")
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(
+            f"{name:<22} {base['median_s'] * 1e3:12.3f} {result['median_s'] * 1e3:12.3f} "
+            f"{ratio:7.2f}{flag}"
+        )
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="NAME", help="write results to .benchmarks/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with .benchmarks/NAME.json")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative slowdown (default 0.2)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(_BENCHMARKS))
+        return 0
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    with tempfile.TemporaryDirectory(prefix="fingen-bench-") as workdir:
+        install_stubs(Path(workdir))
+        names = [name.strip() for name in args.only.split(",")] if args.only else None
+        current = run_benchmarks(names, repeat=args.repeat)
+
+    if args.save:
+        path = _results_path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(current, indent=2))
+        print(f"\nSaved results to {path}")
+
+    if args.compare:
+        baseline = json.loads(_results_path(args.compare).read_text())
+        regressions = compare(current, baseline, tolerance=args.tolerance)
+        if regressions:
+            print(f"\nSlower than baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,9 @@ import logging
 from typing import Optional
 
 import numpy as np
-import yfinance as yf
+
+from price_arrays import share_prices
+from price_store import get_history, get_store
 
 
 def _generate_synthetic_prices(
@@ -24,13 +26,49 @@ def get_price_series(
     ticker: str,
     *,
     period: str = "1y",
+    interval: str = "1d",
     min_length: int = 100,
     fallback_length: int = 252,
     seed: Optional[int] = None,
+    shared: bool = True,
+) -> np.ndarray:
+    """Fetch price history or fall back to a synthetic series when offline.
+
+    History is served from the shared on-disk :mod:`price_store`, so repeated
+    calls for the same ticker only hit Yahoo Finance when the cache is stale.
+    With ``shared`` (the default) the result is a read-only view from
+    :mod:`price_arrays`, mapped once per machine rather than copied into
+    every worker; pass ``shared=False`` for a private, writable array.
+    """
+    # Taken before loading: a rewrite in between only moves the version on.
+    version = get_store().entry_version(ticker, period=period, interval=interval) if shared else None
+    prices = _load_price_series(
+        ticker,
+        period=period,
+        interval=interval,
+        min_length=min_length,
+        fallback_length=fallback_length,
+        seed=seed,
+    )
+    if not shared:
+        return prices
+    key = None
+    if version is not None:
+        key = (ticker.upper(), period, interval, min_length, fallback_length, seed, version)
+    return share_prices(prices, key=key)
+
+
+def _load_price_series(
+    ticker: str,
+    *,
+    period: str,
+    interval: str,
+    min_length: int,
+    fallback_length: int,
+    seed: Optional[int],
 ) -> np.ndarray:
-    """Fetch price history or fall back to a synthetic series when offline."""
     try:
-        history = yf.Ticker(ticker).history(period=period)
+        history = get_history(ticker, period=period, interval=interval)
         close = history.get("Close")
         if close is not None:
             clean = close.dropna()
@@ -0,0 +1,359 @@
+"""Evaluate trader models across many tickers and rolling windows.
+
+Jobs are ``(model, ticker)`` shards, each covering every rolling window of
+the ticker's history.  Price histories are loaded once by the parent and
+placed in a single shared-memory block that worker processes map read-only,
+so no price data is pickled per job.  Each worker runs the model over all
+windows of a shard in one batched simulation, scores the resulting value
+curves with :mod:`backtest` statistics and writes the shard to
+``<out_dir>/shards/``; with ``--record`` every window's steps are also kept
+as :mod:`recorder` files under ``<out_dir>/episodes/``.  Shards already on disk are skipped, so an
+interrupted run resumes where it stopped.
+Finished shards are aggregated into a CSV or Parquet report.
+
+Usage::
+
+    python evaluate.py --tickers AAPL MSFT TSLA --window 63 --stride 21
+    python evaluate.py --tickers-file data/symbols.csv --workers 8 --report eval.parquet
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = Path("trader_model.zip")
+DEFAULT_OUT_DIR = Path("eval_results")
+
+REPORT_COLUMNS = (
+    "model",
+    "ticker",
+    "window_start",
+    "window_end",
+    "steps",
+    "final_value",
+    "return_pct",
+    "buy_hold_return_pct",
+    "max_drawdown_pct",
+    "sharpe",
+    "trades",
+)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """All rolling windows of one ticker evaluated with one model."""
+
+    model: str
+    ticker: str
+    offset: int
+    length: int
+    window: int
+    stride: int
+    key: str
+    record_dir: Optional[str] = None
+
+
+# Set in each worker by ``_init_worker``.
+_shared: Optional[shared_memory.SharedMemory] = None
+_prices: Optional[np.ndarray] = None
+
+
+def _init_worker(shm_name: str, size: int) -> None:
+    global _shared, _prices
+    import torch
+
+    # One process per core already; intra-op threads would oversubscribe.
+    torch.set_num_threads(1)
+    _shared = shared_memory.SharedMemory(name=shm_name)
+    _prices = np.ndarray((size,), dtype=np.float32, buffer=_shared.buf)
+    _prices.setflags(write=False)
+
+
+def window_starts(length: int, window: int, stride: int) -> list[int]:
+    """Start offsets of the rolling windows that fit in ``length`` prices."""
+    if length < window:
+        return []
+    return list(range(0, length - window + 1, stride))
+
+
+def _shard_key(
+    model: Path, ticker: str, period: str, window: int, stride: int, prices: np.ndarray
+) -> str:
+    """Shard name covering the model version, the window grid and the exact prices.
+
+    Refreshed prices shift what each ``window_start`` points at, so a shard
+    computed on an older history must not be resumed.
+    """
+    try:
+        version = model.stat().st_mtime_ns
+    except OSError:
+        version = 0
+    data = hashlib.sha1(np.ascontiguousarray(prices, dtype=np.float32).tobytes()).hexdigest()
+    raw = f"{model.resolve()}|{version}|{ticker}|{period}|{window}|{stride}|{data}"
+    return f"{model.stem}-{ticker}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _write_rows(path: Path, rows: list[dict]) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+def _run_shard(shard: Shard, shard_path: Path) -> int:
+    """Evaluate ``shard`` in a worker and write its rows; returns the row count."""
+    from backtest import BacktestResult
+    from model_registry import registry
+    from recorder import EpisodeRecorder
+    from test_trader import simulate_batch
+    from trading_env import DEFAULT_BALANCE
+
+    prices = _prices[shard.offset : shard.offset + shard.length]
+    starts = window_starts(shard.length, shard.window, shard.stride)
+    windows = [prices[start : start + shard.window] for start in starts]
+
+    rows: list[dict] = []
+    if windows:
+        policy = registry.get_policy(Path(shard.model))
+        simulated = simulate_batch(windows, policy=policy, initial_balance=DEFAULT_BALANCE)
+        # The simulation already applied the backtest accounting; score its curves.
+        result = BacktestResult.from_runs(simulated, DEFAULT_BALANCE)
+        stats = result.stats()
+        if shard.record_dir is not None:
+            recorder = EpisodeRecorder(capacity=int(result.lengths.sum()))
+            for row, run in enumerate(simulated):
+                recorder.episode = row
+                recorder.extend(run["actions"], windows[row][:-1], run["portfolio_values"])
+            recorder.save(Path(shard.record_dir) / f"{shard.key}.steps")
+        for row, start in enumerate(starts):
+            window = windows[row]
+            rows.append(
+                {
+                    "model": shard.model,
+                    "ticker": shard.ticker,
+                    "window_start": start,
+                    "window_end": start + shard.window,
+                    "steps": int(result.lengths[row]),
+                    "final_value": round(float(stats["final_value"][row]), 4),
+                    "return_pct": round(float(stats["return_pct"][row]), 4),
+                    "buy_hold_return_pct": round(float(window[-1] / window[0] - 1) * 100, 4)
+                    if window[0] > 0
+                    else 0.0,
+                    "max_drawdown_pct": round(float(stats["max_drawdown_pct"][row]), 4),
+                    "sharpe": round(float(stats["sharpe"][row]), 4),
+                    "trades": int(stats["trades"][row]),
+                }
+            )
+    _write_rows(shard_path, rows)
+    return len(rows)
+
+
+def _load_prices(tickers: Sequence[str], period: str) -> dict[str, np.ndarray]:
+    """Close prices per ticker from the price store; tickers without data are dropped."""
+    from price_store import get_history, get_store
+
+    get_store().prefetch(list(tickers), period=period)
+    prices: dict[str, np.ndarray] = {}
+    for ticker in dict.fromkeys(tickers):
+        try:
+            data = get_history(ticker, period=period)
+        except Exception as exc:  # noqa: BLE001 - one bad ticker should not stop the run
+            LOGGER.warning("Failed to load %s: %s", ticker, exc)
+            continue
+        if data.empty or "Close" not in data:
+            LOGGER.warning("No price history for %s; skipping", ticker)
+            continue
+        prices[ticker] = np.nan_to_num(data["Close"].to_numpy(dtype=np.float32))
+    return prices
+
+
+def aggregate(
+    out_dir: Path,
+    report: Optional[Path] = None,
+    *,
+    keys: Optional[Sequence[str]] = None,
+) -> "pd.DataFrame":
+    """Concatenate finished shards, optionally writing a CSV/Parquet report.
+
+    ``keys`` restricts the table to those shards (e.g. the current model
+    versions); by default every shard under ``out_dir`` is included.
+    """
+    import pandas as pd
+
+    paths = sorted((Path(out_dir) / "shards").glob("*.csv"))
+    if keys is not None:
+        wanted = set(keys)
+        paths = [path for path in paths if path.stem in wanted]
+    frames = [pd.read_csv(path) for path in paths]
+    frames = [frame for frame in frames if not frame.empty]
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REPORT_COLUMNS)
+    if report is not None:
+        report = Path(report)
+        report.parent.mkdir(parents=True, exist_ok=True)
+        if report.suffix == ".parquet":
+            table.to_parquet(report, index=False)
+        else:
+            table.to_csv(report, index=False)
+    return table
+
+
+def evaluate(
+    tickers: Sequence[str],
+    *,
+    models: Sequence[Path] = (DEFAULT_MODEL_PATH,),
+    period: str = "2y",
+    window: int = 63,
+    stride: int = 21,
+    workers: Optional[int] = None,
+    out_dir: Path = DEFAULT_OUT_DIR,
+    report: Optional[Path] = None,
+    record: bool = False,
+) -> "pd.DataFrame":
+    """Evaluate every model on every rolling window of every ticker.
+
+    Returns the aggregated table (one row per model, ticker and window) and
+    writes it to ``report`` when given.  Completed shards under ``out_dir``
+    are reused, so rerunning after an interruption only does the rest.
+    ``record`` also saves each shard's per-step records (one episode per
+    window) to ``<out_dir>/episodes/<shard>.steps``.
+    """
+    if window < 2:
+        raise ValueError("window must span at least two prices")
+    if stride < 1:
+        raise ValueError("stride must be positive")
+    models = [Path(model) for model in models]
+    for model in models:
+        if not model.exists():
+            raise FileNotFoundError(f"Model not found: {model}")
+
+    shard_dir = Path(out_dir) / "shards"
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    record_dir = Path(out_dir) / "episodes" if record else None
+    if record_dir is not None:
+        record_dir.mkdir(parents=True, exist_ok=True)
+
+    prices = _load_prices(tickers, period)
+    offsets: dict[str, tuple[int, int]] = {}
+    cursor = 0
+    for ticker, series in prices.items():
+        offsets[ticker] = (cursor, len(series))
+        cursor += len(series)
+
+    keys: list[str] = []
+    pending: list[tuple[Shard, Path]] = []
+    for model in models:
+        for ticker, (offset, length) in offsets.items():
+            key = _shard_key(model, ticker, period, window, stride, prices[ticker])
+            keys.append(key)
+            path = shard_dir / f"{key}.csv"
+            recorded = record_dir is None or (record_dir / f"{key}.steps").exists()
+            if not path.exists() or not recorded:
+                shard = Shard(
+                    str(model),
+                    ticker,
+                    offset,
+                    length,
+                    window,
+                    stride,
+                    key,
+                    None if record_dir is None else str(record_dir),
+                )
+                pending.append((shard, path))
+    LOGGER.info(
+        "%d shards to run, %d already complete",
+        len(pending),
+        len(keys) - len(pending),
+    )
+
+    if pending:
+        shared = shared_memory.SharedMemory(create=True, size=max(cursor, 1) * 4)
+        try:
+            buffer = np.ndarray((cursor,), dtype=np.float32, buffer=shared.buf)
+            for ticker, (offset, length) in offsets.items():
+                buffer[offset : offset + length] = prices[ticker]
+            del buffer
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(shared.name, cursor)
+            ) as pool:
+                futures = {pool.submit(_run_shard, shard, path): shard for shard, path in pending}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    shard = futures[future]
+                    try:
+                        count = future.result()
+                    except Exception as exc:  # noqa: BLE001 - keep the other shards going
+                        LOGGER.error("Shard %s failed: %s", shard.key, exc)
+                        continue
+                    LOGGER.info("[%d/%d] %s: %d windows", done, len(pending), shard.key, count)
+        finally:
+            shared.close()
+            shared.unlink()
+
+    return aggregate(out_dir, report, keys=keys)
+
+
+def _read_tickers_file(path: Path) -> list[str]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        rows = list(csv.reader(handle))
+    if rows and rows[0] and rows[0][0].strip().lower() == "symbol":
+        rows = rows[1:]
+    return [row[0].strip().upper() for row in rows if row and row[0].strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Evaluate trader models over rolling windows.")
+    parser.add_argument("--tickers", nargs="*", default=[])
+    parser.add_argument("--tickers-file", type=Path, help="CSV whose first column holds symbols")
+    parser.add_argument("--models", nargs="+", type=Path, default=[DEFAULT_MODEL_PATH])
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--window", type=int, default=63, help="prices per window")
+    parser.add_argument("--stride", type=int, default=21, help="prices between window starts")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out-dir", type=Path, default=DEFAULT_OUT_DIR)
+    parser.add_argument("--report", type=Path, default=None, help="report .csv or .parquet")
+    parser.add_argument("--record", action="store_true", help="keep per-step records of every window")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        tickers += _read_tickers_file(args.tickers_file)
+    if not tickers:
+        parser.error("give --tickers and/or --tickers-file")
+
+    table = evaluate(
+        tickers,
+        models=args.models,
+        period=args.period,
+        window=args.window,
+        stride=args.stride,
+        workers=args.workers,
+        out_dir=args.out_dir,
+        report=args.report or args.out_dir / "report.csv",
+        record=args.record,
+    )
+    if table.empty:
+        print("No windows evaluated.")
+    else:
+        summary = table.groupby("model")[
+            ["return_pct", "buy_hold_return_pct", "max_drawdown_pct", "sharpe", "trades"]
+        ].mean()
+        print(summary.round(3).to_string())
@@ -0,0 +1,110 @@
+"""Vectorised technical features for :class:`trading_env.TradingEnv`.
+
+All indicators are computed for the whole price array in one pass with
+cumulative sums, so the environment only slices a precomputed row per step.
+Results are cached on disk next to the price store, keyed by a hash of the
+price data.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from price_store import DEFAULT_CACHE_DIR
+
+FEATURE_VERSION = 1
+FEATURE_NAMES = (
+    "price",
+    "log_return",
+    "sma_5_ratio",
+    "sma_20_ratio",
+    "volatility_20",
+    "rsi_14",
+)
+
+_MEMORY_LIMIT = 64
+_memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` points (expanding for the first ones)."""
+    csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (csum[ends] - csum[starts]) / (ends - starts)
+
+
+def compute_features(prices: np.ndarray) -> np.ndarray:
+    """Return a ``(len(prices), len(FEATURE_NAMES))`` float32 feature matrix.
+
+    Row ``t`` only uses prices up to and including ``t``.
+    """
+    prices = np.asarray(prices, dtype=np.float64).ravel()
+    safe = np.where(prices > 0, prices, np.nan)
+
+    log_return = np.zeros_like(prices)
+    log_return[1:] = np.diff(np.log(safe))
+    log_return = np.nan_to_num(log_return, nan=0.0, posinf=0.0, neginf=0.0)
+
+    sma_5 = _rolling_mean(prices, 5)
+    sma_20 = _rolling_mean(prices, 20)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sma_5_ratio = np.nan_to_num(prices / sma_5 - 1.0)
+        sma_20_ratio = np.nan_to_num(prices / sma_20 - 1.0)
+
+    mean_20 = _rolling_mean(log_return, 20)
+    var_20 = np.maximum(_rolling_mean(log_return**2, 20) - mean_20**2, 0.0)
+    volatility_20 = np.sqrt(var_20)
+
+    change = np.zeros_like(prices)
+    change[1:] = np.diff(prices)
+    avg_gain = _rolling_mean(np.maximum(change, 0.0), 14)
+    avg_loss = _rolling_mean(np.maximum(-change, 0.0), 14)
+    total = avg_gain + avg_loss
+    # RSI in [0, 1]; flat windows sit at the neutral 0.5.
+    rsi_14 = np.divide(avg_gain, total, out=np.full_like(prices, 0.5), where=total > 0)
+
+    return np.column_stack(
+        (prices, log_return, sma_5_ratio, sma_20_ratio, volatility_20, rsi_14)
+    ).astype(np.float32)
+
+
+def load_features(prices: np.ndarray, *, cache_dir: Optional[Path] = None) -> np.ndarray:
+    """Return cached features for ``prices``, computing and storing them if needed."""
+    prices = np.ascontiguousarray(prices, dtype=np.float32)
+    digest = hashlib.sha1(prices.tobytes()).hexdigest()
+    key = f"v{FEATURE_VERSION}-{digest}"
+
+    with _memory_lock:
+        cached = _memory.get(key)
+        if cached is not None:
+            _memory.move_to_end(key)
+            return cached
+
+    # Mapped read-only, so every worker using these features shares one copy.
+    path = Path(cache_dir or DEFAULT_CACHE_DIR) / "features" / f"{key}.npy"
+    try:
+        features = np.asarray(np.load(path, mmap_mode="r"))
+        os.utime(path)
+    except (OSError, ValueError):
+        features = compute_features(prices)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as handle:
+            np.save(handle, features)
+        os.replace(tmp, path)
+        features = np.asarray(np.load(path, mmap_mode="r"))
+
+    features.setflags(write=False)
+    with _memory_lock:
+        _memory[key] = features
+        while len(_memory) > _MEMORY_LIMIT:
+            _memory.popitem(last=False)
+    return features
@@ -0,0 +1,252 @@
+"""Shared outbound HTTP layer for every fetch the app makes.
+
+One ``requests.Session`` with a keep-alive connection pool serves all
+outbound calls (ticker search, news feeds, logos), so repeat requests to a
+host reuse an open connection instead of paying for a new TCP and TLS
+handshake.  On top of the pool :class:`HttpClient` adds, per host:
+
+* a concurrency limit, so a burst of lookups cannot flood one upstream;
+* retries with full-jitter exponential backoff for connection errors,
+  timeouts, ``429`` and ``5xx`` answers (idempotent methods only), honouring
+  a numeric ``Retry-After``;
+* a circuit breaker that, after ``breaker_threshold`` consecutive failures
+  (connection errors, timeouts and ``5xx`` answers), fails calls immediately
+  with :class:`CircuitOpenError` for ``breaker_cooldown`` seconds and then
+  lets a single trial call through.  A ``429`` is back-pressure rather than
+  an outage: it is retried after ``Retry-After`` but never trips the breaker;
+* a ``fingen_outbound_request_seconds`` histogram on ``/metrics`` labelled
+  by host and outcome.
+
+Libraries that manage their own HTTP (yfinance) are wrapped with
+:meth:`HttpClient.guard`, which applies the same limit, breaker and timing
+to a logical host name.  There only transport errors (connection failures
+and timeouts) count against the breaker; an upstream saying "no such
+ticker" is not a sign the host is down.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import OUTBOUND_SECONDS
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.environ.get("FINGEN_HTTP_TIMEOUT", 10))
+DEFAULT_RETRIES = int(os.environ.get("FINGEN_HTTP_RETRIES", 2))
+DEFAULT_PER_HOST = int(os.environ.get("FINGEN_HTTP_PER_HOST", 8))
+DEFAULT_POOL_SIZE = int(os.environ.get("FINGEN_HTTP_POOL", 16))
+BREAKER_THRESHOLD = int(os.environ.get("FINGEN_HTTP_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("FINGEN_HTTP_BREAKER_COOLDOWN", 30))
+
+USER_AGENT = "Mozilla/5.0 (compatible; FinGen)"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Upper bound on a single backoff sleep, whatever Retry-After asks for.
+MAX_BACKOFF = 10.0
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without contacting a host whose circuit breaker is open."""
+
+
+@lru_cache(maxsize=1)
+def transport_errors() -> tuple[type[BaseException], ...]:
+    """Exception types that mean the host could not be reached in time."""
+    errors: tuple[type[BaseException], ...] = (
+        requests.ConnectionError,
+        requests.Timeout,
+        ConnectionError,
+        TimeoutError,
+    )
+    try:  # yfinance talks to Yahoo through curl_cffi.
+        from curl_cffi.requests import exceptions as curl_errors
+    except ImportError:
+        return errors
+    return errors + (curl_errors.ConnectionError, curl_errors.Timeout)
+
+
+class _Breaker:
+    """Consecutive-failure circuit breaker for one host (guarded by the client lock)."""
+
+    __slots__ = ("failures", "opened_at", "trial")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+
+
+class HttpClient:
+    """Pooled, retrying HTTP client with per-host limits and circuit breakers."""
+
+    def __init__(
+        self,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = 0.25,
+        per_host: int = DEFAULT_PER_HOST,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        breaker_threshold: int = BREAKER_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+    ) -> None:
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.per_host = max(1, per_host)
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # Retries are handled here, so the adapter's own are disabled.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: dict[str, _Breaker] = {}
+
+    # -------------------------------------------------------------- breaker
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _admit(self, host: str) -> None:
+        """Raise :class:`CircuitOpenError` unless ``host`` may be called now."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None or breaker.opened_at is None:
+                return
+            if time.monotonic() - breaker.opened_at < self.breaker_cooldown or breaker.trial:
+                raise CircuitOpenError(f"circuit open for {host}")
+            # Half-open: this caller is the single trial.
+            breaker.trial = True
+
+    def _record(self, host: str, ok: bool) -> None:
+        with self._lock:
+            breaker = self._breakers.setdefault(host, _Breaker())
+            breaker.trial = False
+            if ok:
+                breaker.failures = 0
+                breaker.opened_at = None
+                return
+            breaker.failures += 1
+            if breaker.opened_at is not None or breaker.failures >= self.breaker_threshold:
+                if breaker.opened_at is None:
+                    LOGGER.warning("Opening circuit for %s after %s failures", host, breaker.failures)
+                breaker.opened_at = time.monotonic()
+
+    def _release(self, host: str) -> None:
+        """End a call that neither passed nor failed the breaker."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is not None:
+                breaker.trial = False
+
+    def circuit_open(self, host: str) -> bool:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            return breaker is not None and breaker.opened_at is not None
+
+    @contextmanager
+    def guard(self, host: str) -> Iterator[None]:
+        """Apply ``host``'s limit, breaker and timing to a call made outside the session.
+
+        Transport errors raised in the block count as breaker failures; other
+        exceptions pass through without touching the breaker.
+        """
+        self._admit(host)
+        started = time.perf_counter()
+        try:
+            with self._slot(host):
+                yield
+        except transport_errors():
+            OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, "error")
+            self._record(host, False)
+            raise
+        except BaseException:
+            OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, "raised")
+            self._release(host)
+            raise
+        OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, "ok")
+        self._record(host, True)
+
+    # ------------------------------------------------------------- requests
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_BACKOFF)
+            except ValueError:
+                pass  # An HTTP date; fall back to the jittered backoff.
+        return random.uniform(0.0, min(MAX_BACKOFF, self.backoff * 2**attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pool; retries and breaker apply per host.
+
+        The response of the last attempt is returned even when it is a
+        retryable error status; exceptions of the last attempt propagate.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc.lower()
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = 1 + (self.retries if method in IDEMPOTENT_METHODS else 0)
+        for attempt in range(attempts):
+            self._admit(host)
+            response: Optional[requests.Response] = None
+            started = time.perf_counter()
+            try:
+                with self._slot(host):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, "error")
+                self._record(host, False)
+                if attempt + 1 >= attempts:
+                    raise
+                LOGGER.debug("%s %s failed (%s), retrying", method, url, exc)
+            except BaseException:
+                OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, "raised")
+                self._release(host)
+                raise
+            else:
+                OUTBOUND_SECONDS.observe(time.perf_counter() - started, host, str(response.status_code))
+                retryable = response.status_code in RETRY_STATUSES
+                if response.status_code == 429:
+                    self._release(host)  # Rate limited, not down.
+                else:
+                    self._record(host, not retryable)
+                if not retryable or attempt + 1 >= attempts:
+                    return response
+                response.close()
+            time.sleep(self._delay(attempt, response))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Return the process-wide :class:`HttpClient`."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = HttpClient()
+        return _CLIENT
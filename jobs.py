@@ -0,0 +1,377 @@
+"""Background job queue backed by worker processes.
+
+Web requests submit jobs (``run`` a dashboard pipeline, ``train`` the
+trader) and get an ID back immediately; a dispatcher thread hands queued
+jobs to a process pool in priority order while respecting a per-kind
+concurrency limit, so a training run can never occupy a web worker.
+
+Job records live in a SQLite file shared by every web worker process, so
+status can be polled from any of them.  Execution happens in the process
+that accepted the job; jobs left behind by a process that died are marked
+as failed the next time a queue starts.
+"""
+from __future__ import annotations
+
+import bisect
+import importlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(
+    os.environ.get("FINGEN_JOBS_DB", Path(__file__).resolve().parent / ".jobs.sqlite3")
+)
+DEFAULT_WORKERS = int(os.environ.get("FINGEN_JOB_WORKERS", 2))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED = frozenset({SUCCEEDED, FAILED})
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    priority: int
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class _Kind:
+    target: str
+    concurrency: int
+    priority: int
+
+
+def _call(target: str, params: dict) -> Any:
+    """Run ``module:function`` with ``params`` inside a worker process."""
+    module_name, _, func_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)(**params)
+
+
+def train_job(
+    *,
+    total_timesteps: int = 20_000,
+    model_path: str = "trader_model.zip",
+    tickers: Optional[list[str]] = None,
+    seed: Optional[int] = None,
+) -> dict:
+    """Train the trader into a temporary file and swap it into place atomically.
+
+    Readers keep using the previous model until the new file is complete;
+    the model registry picks the new one up by its mtime.
+    """
+    from train_trader import train_trader_model
+
+    target = Path(model_path)
+    # No extra dot: stable-baselines only appends ".zip" to suffix-less paths.
+    tmp = target.with_name(f"{target.stem}-{os.getpid()}-tmp.zip")
+    train_trader_model(
+        tickers=tickers, total_timesteps=total_timesteps, model_path=str(tmp), seed=seed
+    )
+    os.replace(tmp, target)
+    return {"model_path": str(target), "total_timesteps": total_timesteps}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Priority queue of jobs executed on a pool of worker processes.
+
+    Higher ``priority`` runs first; ties run in submission order.  At most
+    ``max_workers`` jobs run at once, and at most ``concurrency`` of each
+    registered kind.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_DB_PATH, *, max_workers: int = DEFAULT_WORKERS) -> None:
+        self.path = Path(path)
+        self.max_workers = max(1, max_workers)
+        self._kinds: dict[str, _Kind] = {}
+        self._pending: list[tuple[int, int, str, str]] = []  # (-priority, seq, job id, kind)
+        self._running: dict[str, int] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        with self._db_lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    owner INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    result TEXT,
+                    error TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+        self._fail_orphans()
+
+    # ------------------------------------------------------------- records
+    def _fail_orphans(self) -> None:
+        with self._db_lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+            orphans = [(time.time(), job_id) for job_id, owner in rows if not _pid_alive(owner)]
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, error = 'interrupted', finished_at = ? WHERE id = ?",
+                [(FAILED, finished_at, job_id) for finished_at, job_id in orphans],
+            )
+        if orphans:
+            LOGGER.warning("Marked %d interrupted jobs as failed", len(orphans))
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT id, kind, params, priority, status, created_at, started_at, finished_at, "
+                "result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[8]) if row[8] is not None else None
+        return Job(*row[:2], json.loads(row[2]), *row[3:8], result, row[9])  # type: ignore[misc]
+
+    def list(self, *, limit: int = 50) -> list[Job]:
+        """Most recent jobs first, without their (possibly large) results."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, params, priority, status, created_at, started_at, finished_at, "
+                "error FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            Job(*row[:2], json.loads(row[2]), *row[3:8], None, row[8])  # type: ignore[misc]
+            for row in rows
+        ]
+
+    # ---------------------------------------------------------- submission
+    def register(self, kind: str, target: str, *, concurrency: int = 1, priority: int = 0) -> None:
+        """Allow jobs of ``kind`` that call ``target`` (``"module:function"``)."""
+        self._kinds[kind] = _Kind(target, max(1, concurrency), priority)
+
+    def submit(
+        self,
+        kind: str,
+        params: Optional[dict] = None,
+        *,
+        priority: Optional[int] = None,
+        unique: bool = False,
+        unique_on: Optional[tuple[str, ...]] = None,
+    ) -> Job:
+        """Queue a job and return its record.
+
+        With ``unique=True`` an unfinished job of the same kind and params is
+        returned instead of queueing a duplicate; ``unique_on`` narrows the
+        comparison to those params (e.g. the output path two jobs share).
+        """
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        params = params or {}
+        encoded = json.dumps(params, sort_keys=True)
+        priority = self._kinds[kind].priority if priority is None else priority
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            with self._db_lock, self._conn:
+                existing = None
+                if unique:
+                    rows = self._conn.execute(
+                        "SELECT id, params FROM jobs WHERE kind = ? AND status IN (?, ?) "
+                        "ORDER BY created_at",
+                        (kind, QUEUED, RUNNING),
+                    ).fetchall()
+                    for job_id, other in rows:
+                        if unique_on is None:
+                            same = other == encoded
+                        else:
+                            other = json.loads(other)
+                            same = all(other.get(name) == params.get(name) for name in unique_on)
+                        if same:
+                            existing = job_id
+                            break
+                if existing is None:
+                    job = Job(uuid.uuid4().hex, kind, params, priority, QUEUED, time.time())
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, kind, params, priority, status, owner, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job.id, kind, encoded, priority, QUEUED, os.getpid(), job.created_at),
+                    )
+            if existing is not None:
+                return self.get(existing)  # type: ignore[return-value]
+            bisect.insort(self._pending, (-priority, next(self._seq), job.id, kind))
+            self._ensure_dispatcher()
+            self._cond.notify_all()
+        LOGGER.info("Queued %s job %s (priority %d)", kind, job.id, priority)
+        return job
+
+    def wait(self, job_id: str, *, timeout: Optional[float] = None, poll: float = 0.5) -> Optional[Job]:
+        """Block until the job finishes (or ``timeout`` passes) and return its record."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            with self._cond:
+                # Local jobs notify on completion; jobs owned by other processes are polled.
+                self._cond.wait(poll if remaining is None else min(poll, remaining))
+
+    # ------------------------------------------------------------ dispatch
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers do not inherit the web server's threads and locks.
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(
+                target=self._dispatch, name="job-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _next_runnable(self) -> Optional[tuple[str, str]]:
+        if sum(self._running.values()) >= self.max_workers:
+            return None
+        for index, (_, _, job_id, kind) in enumerate(self._pending):
+            if self._running.get(kind, 0) < self._kinds[kind].concurrency:
+                del self._pending[index]
+                return job_id, kind
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                picked = self._next_runnable()
+                while picked is None and not self._closed:
+                    self._cond.wait()
+                    picked = self._next_runnable()
+                if self._closed:
+                    return
+                job_id, kind = picked
+                self._running[kind] = self._running.get(kind, 0) + 1
+
+            try:
+                job = self.get(job_id)
+                if job is None:
+                    raise LookupError(f"job {job_id} is no longer in {self.path}")
+                self._update(job_id, status=RUNNING, started_at=time.time())
+                LOGGER.info("Starting %s job %s", kind, job_id)
+                with self._cond:
+                    pool = self._get_pool()
+                future = pool.submit(_call, self._kinds[kind].target, job.params)
+            except Exception as exc:  # noqa: BLE001 - e.g. a pruned record or a broken pool
+                self._finish(job_id, kind, None, exc)
+                continue
+            future.add_done_callback(
+                lambda done, job_id=job_id, kind=kind, pool=pool: self._on_done(job_id, kind, done, pool)
+            )
+
+    def _on_done(self, job_id: str, kind: str, future: Future, pool: ProcessPoolExecutor) -> None:
+        try:
+            self._finish(job_id, kind, future.result(), None)
+        except BrokenProcessPool as exc:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next jobs.
+            with self._cond:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._finish(job_id, kind, None, exc)
+        except Exception as exc:  # noqa: BLE001 - job failures are recorded, not raised
+            self._finish(job_id, kind, None, exc)
+
+    def _finish(self, job_id: str, kind: str, result: Any, error: Optional[BaseException]) -> None:
+        if error is None:
+            self._update(job_id, status=SUCCEEDED, result=result, finished_at=time.time())
+            LOGGER.info("Finished %s job %s", kind, job_id)
+        else:
+            LOGGER.warning("%s job %s failed: %s", kind, job_id, error)
+            self._update(
+                job_id,
+                status=FAILED,
+                error=f"{type(error).__name__}: {error}",
+                finished_at=time.time(),
+            )
+        with self._cond:
+            self._running[kind] -= 1
+            self._cond.notify_all()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_DEFAULT_QUEUE: Optional[JobQueue] = None
+_DEFAULT_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Return the process-wide queue with the ``run`` and ``train`` kinds registered."""
+    global _DEFAULT_QUEUE
+    with _DEFAULT_QUEUE_LOCK:
+        if _DEFAULT_QUEUE is None:
+            queue = JobQueue()
+            # Training is CPU heavy and rewrites the model file: one at a time, behind runs.
+            queue.register("train", "jobs:train_job", concurrency=1, priority=0)
+            queue.register("run", "webapp.routes:run_job", concurrency=queue.max_workers, priority=10)
+            _DEFAULT_QUEUE = queue
+        return _DEFAULT_QUEUE
@@ -0,0 +1,342 @@
+"""Content-addressed cache for chat completion responses.
+
+Entries are keyed by a SHA-256 of the model name and the fully rendered
+prompt, so a cached answer is only reused when the prompt inputs (prices,
+news, risk profile, ...) are byte-for-byte identical.  Two backends are
+available: an in-memory LRU and a SQLite file shared by every worker.
+Concurrent identical requests are coalesced into one upstream call, whether
+they ask for the whole completion or stream it (see :meth:`LLMCache.stream`).
+"""
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Protocol
+
+from singleflight import SingleFlight
+from tracing import register_cache
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.environ.get("FINGEN_LLM_CACHE_TTL", 60 * 60))
+DEFAULT_MAX_BYTES = int(os.environ.get("FINGEN_LLM_CACHE_BYTES", 32 * 1024 * 1024))
+DEFAULT_SQLITE_PATH = Path(
+    os.environ.get(
+        "FINGEN_LLM_CACHE_PATH",
+        Path(__file__).resolve().parent / ".llm_cache.sqlite3",
+    )
+)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """Thread-safe LRU bounded by the total UTF-8 size of cached values."""
+
+    def __init__(self, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._size -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[key] = (time.time() + ttl_seconds, value, size)
+            self._size += size
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class SQLiteBackend:
+    """On-disk backend shared across processes, trimmed by least-recent access."""
+
+    def __init__(self, path: Path | str = DEFAULT_SQLITE_PATH, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl_seconds, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._conn.execute(
+                "SELECT key, size FROM llm_cache WHERE key != ? ORDER BY accessed_at", (key,)
+            ).fetchall()
+            doomed = []
+            for old_key, old_size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((old_key,))
+                total -= old_size
+            self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+class _Broadcast:
+    """Pieces of one streamed completion, replayed to every reader as they arrive."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self.parts: list[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+
+    def push(self, part: str) -> None:
+        with self._cond:
+            self.parts.append(part)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            with self._cond:
+                while index == len(self.parts) and not self._done:
+                    self._cond.wait()
+                pending = self.parts[index:]
+                index += len(pending)
+                finished = self._done and index == len(self.parts)
+                error = self._error
+            yield from pending
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class LLMCache:
+    """Look up or compute completions keyed by ``(model, prompt)``."""
+
+    def __init__(self, backend: CacheBackend, *, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._flights = SingleFlight()
+        self._streams: dict[str, _Broadcast] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        value = self.backend.get(self.key(model, prompt))
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, model: str, prompt: str, value: str) -> None:
+        self.backend.set(self.key(model, prompt), value, self.ttl_seconds)
+
+    def get_or_compute(self, model: str, prompt: str, compute: Callable[[], str]) -> str:
+        """Return the cached completion or call ``compute`` exactly once for it.
+
+        Exceptions from ``compute`` propagate and are not cached.
+        """
+        key = self.key(model, prompt)
+
+        def load() -> str:
+            cached = self.backend.get(key)
+            if cached is not None:
+                self._count("hits")
+                return cached
+            self._count("misses")
+            value = compute()
+            self.backend.set(key, value, self.ttl_seconds)
+            return value
+
+        return self._flights.do(key, load)
+
+    def stream(self, model: str, prompt: str, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Yield the completion in pieces, running ``produce`` at most once per key.
+
+        The first caller starts ``produce`` on a background thread; callers
+        for the same key that arrive while it runs replay the pieces so far
+        and then follow it live.  The stream shares its single-flight key
+        with :meth:`get_or_compute`, so a whole-completion request joins a
+        running stream (and vice versa) instead of calling upstream again.
+        The joined text is cached once the stream ends; errors propagate to
+        every reader and nothing is cached.
+        """
+        key = self.key(model, prompt)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self._count("hits")
+            yield cached
+            return
+
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+
+        if leader:
+
+            def pump() -> str:
+                cached = self.backend.get(key)
+                if cached is not None:
+                    self._count("hits")
+                    broadcast.push(cached)
+                    return cached
+                self._count("misses")
+                for part in produce():
+                    broadcast.push(part)
+                value = "".join(broadcast.parts).strip()
+                self.backend.set(key, value, self.ttl_seconds)
+                return value
+
+            def run() -> None:
+                try:
+                    value = self._flights.do(key, pump)
+                    if not broadcast.parts and value:
+                        broadcast.push(value)  # Joined a whole-completion request.
+                except BaseException as exc:  # noqa: BLE001 - handed to every reader
+                    broadcast.finish(exc)
+                else:
+                    broadcast.finish()
+                finally:
+                    with self._lock:
+                        self._streams.pop(key, None)
+
+            # A copied context keeps the leader request's span timings.
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(run,), name="llm-stream", daemon=True).start()
+
+        yield from broadcast
+
+
+def _build_default_cache() -> Optional[LLMCache]:
+    kind = os.environ.get("FINGEN_LLM_CACHE", "memory").lower()
+    if kind in {"off", "none", "0"}:
+        return None
+    if kind == "sqlite":
+        return LLMCache(SQLiteBackend())
+    return LLMCache(MemoryBackend())
+
+
+_DEFAULT_CACHE: Optional[LLMCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+_DEFAULT_CACHE_READY = False
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache selected by ``FINGEN_LLM_CACHE`` (or ``None``)."""
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_READY
+    with _DEFAULT_CACHE_LOCK:
+        if not _DEFAULT_CACHE_READY:
+            _DEFAULT_CACHE = _build_default_cache()
+            _DEFAULT_CACHE_READY = True
+            if _DEFAULT_CACHE is not None:
+                register_cache("llm", _DEFAULT_CACHE.stats)
+        return _DEFAULT_CACHE
+
+
+def cached_completion(model: str, prompt: str, compute: Callable[[], str]) -> str:
+    """Serve ``compute()`` through the default cache when one is configured."""
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(model, prompt, compute)
+
+
+def cached_stream(model: str, prompt: str, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+    """Stream ``produce()`` through the default cache when one is configured."""
+    cache = get_cache()
+    if cache is None:
+        return iter(produce())
+    return cache.stream(model, prompt, produce)
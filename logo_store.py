@@ -0,0 +1,244 @@
+"""Disk-backed store of company logos keyed by website domain.
+
+Logos are written as ``<cache>/<domain>.img`` with a ``.json`` sidecar
+holding the content type, ETag and fetch time.  Failed lookups are cached
+too (a sidecar without an image) so unknown domains are not retried on every
+request.  The store also remembers which domain belongs to which symbol, in
+a SQLite table shared by every worker, so ``/logo/<symbol>`` can be served
+without another yfinance lookup.  Symbols yfinance knows no website for are
+remembered as misses for ``negative_ttl`` in a bounded per-process LRU only,
+so requests for made-up symbols cannot grow anything on disk.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from http_client import get_client as get_http_client, transport_errors
+from singleflight import SingleFlight
+from tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("FINGEN_LOGO_CACHE", Path(__file__).resolve().parent / ".logo_cache")
+)
+# Seconds a stored logo, and a recorded miss, are trusted before refetching.
+LOGO_TTL = float(os.environ.get("FINGEN_LOGO_TTL", 30 * 24 * 60 * 60))
+NEGATIVE_TTL = float(os.environ.get("FINGEN_LOGO_NEGATIVE_TTL", 24 * 60 * 60))
+# Symbols remembered as misses per process; the oldest are forgotten first.
+MISS_CACHE_SIZE = 4096
+
+
+class Logo(NamedTuple):
+    data: bytes
+    content_type: str
+    etag: str
+
+
+def extract_domain(website: Optional[str]) -> Optional[str]:
+    if not website:
+        return None
+    clean = website.replace("https://", "").replace("http://", "")
+    clean = clean.split("/")[0]
+    return clean or None
+
+
+def _download_image(url: str) -> Optional[tuple[bytes, str]]:
+    try:
+        with span("logo.fetch"):
+            response = get_http_client().get(url, timeout=2)
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code == 200 and content_type.startswith("image"):
+            return response.content, content_type
+    except Exception as exc:  # noqa: BLE001 - network errors should not crash
+        LOGGER.debug("Failed to download image %s: %s", url, exc)
+    return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp, path)
+
+
+class LogoStore:
+    """Persist logos on disk by domain, with negative caching for misses."""
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = LOGO_TTL,
+        negative_ttl_seconds: float = NEGATIVE_TTL,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # --------------------------------------------------------------- symbols
+    def _db(self) -> sqlite3.Connection:
+        """Open the symbol table on first use (call with ``self._lock`` held)."""
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_dir / "symbols.sqlite3"), check_same_thread=False, timeout=10)
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS symbols (
+                        symbol TEXT PRIMARY KEY,
+                        domain TEXT,
+                        fallback_url TEXT
+                    )
+                    """
+                )
+            self._conn = conn
+        return self._conn
+
+    def remember(self, symbol: str, domain: Optional[str], fallback_url: Optional[str] = None) -> None:
+        """Record where the logo for ``symbol`` comes from."""
+        if not domain and not fallback_url:
+            return
+        with self._lock:
+            self._misses.pop(symbol, None)
+            conn = self._db()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO symbols (symbol, domain, fallback_url) VALUES (?, ?, ?)",
+                    (symbol, domain, fallback_url),
+                )
+
+    def remember_missing(self, symbol: str) -> None:
+        """Record that no logo source is known for ``symbol`` right now."""
+        with self._lock:
+            self._misses[symbol] = time.time()
+            self._misses.move_to_end(symbol)
+            while len(self._misses) > MISS_CACHE_SIZE:
+                self._misses.popitem(last=False)
+
+    def source(self, symbol: str) -> Optional[tuple[Optional[str], Optional[str]]]:
+        """Return the remembered ``(domain, fallback_url)`` for ``symbol``."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT domain, fallback_url FROM symbols WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _missing(self, symbol: str) -> bool:
+        """Whether ``symbol`` was recorded as a miss within ``negative_ttl_seconds``."""
+        with self._lock:
+            recorded = self._misses.get(symbol)
+            if recorded is None:
+                return False
+            if time.time() - recorded < self.negative_ttl_seconds:
+                return True
+            del self._misses[symbol]
+            return False
+
+    # ----------------------------------------------------------------- logos
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}.img", self.cache_dir / f"{key}.json"
+
+    def _read(self, key: str) -> tuple[bool, Optional[Logo]]:
+        """Return ``(fresh, logo)`` for the stored entry under ``key``."""
+        image_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return False, None
+        age = time.time() - meta.get("fetched_at", 0)
+        if meta.get("missing"):
+            return age < self.negative_ttl_seconds, None
+        try:
+            data = image_path.read_bytes()
+        except OSError:
+            return False, None
+        return age < self.ttl_seconds, Logo(data, meta["content_type"], meta["etag"])
+
+    def _fetch(self, key: str, urls: list[str]) -> Optional[Logo]:
+        image_path, meta_path = self._paths(key)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for url in urls:
+            downloaded = _download_image(url)
+            if downloaded is None:
+                continue
+            data, content_type = downloaded
+            logo = Logo(data, content_type, hashlib.sha1(data).hexdigest())
+            _write_atomic(image_path, data)
+            meta = {"content_type": content_type, "etag": logo.etag, "fetched_at": time.time()}
+            _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            return logo
+        _write_atomic(meta_path, json.dumps({"missing": True, "fetched_at": time.time()}).encode("utf-8"))
+        return None
+
+    def get(self, domain: Optional[str], fallback_url: Optional[str] = None) -> Optional[Logo]:
+        """Return the logo for ``domain`` (or ``fallback_url``), fetching on a miss."""
+        if domain:
+            key = domain.lower()
+        elif fallback_url:
+            key = "url-" + hashlib.sha1(fallback_url.encode("utf-8")).hexdigest()
+        else:
+            return None
+        if "/" in key or key.startswith("."):
+            return None
+
+        fresh, logo = self._read(key)
+        if fresh:
+            return logo
+        urls = [f"https://logo.clearbit.com/{domain}"] if domain else []
+        if fallback_url:
+            urls.append(fallback_url)
+        # A stale logo is better than none when the refetch fails.
+        return self._flight.do(key, lambda: self._fetch(key, urls)) or logo
+
+    def for_symbol(self, symbol: str) -> Optional[Logo]:
+        """Return the logo for ``symbol``, looking up its website if unknown."""
+        source = self.source(symbol)
+        if source is None:
+            if self._missing(symbol):
+                return None
+            try:
+                import yfinance as yf
+
+                with get_http_client().guard("yfinance"):
+                    info = yf.Ticker(symbol).info
+                source = (extract_domain(info.get("website")), info.get("logo_url"))
+            except transport_errors() as exc:
+                # Yahoo unreachable: try again on the next request.
+                LOGGER.debug("Failed to look up website for %s: %s", symbol, exc)
+                return None
+            except Exception as exc:  # noqa: BLE001 - tolerate yfinance failures
+                LOGGER.debug("No website for %s: %s", symbol, exc)
+                source = (None, None)
+            if not any(source):
+                self.remember_missing(symbol)
+                return None
+            self.remember(symbol, *source)
+        return self.get(*source)
+
+
+_DEFAULT_STORE: Optional[LogoStore] = None
+_DEFAULT_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> LogoStore:
+    """Return the process-wide :class:`LogoStore`."""
+    global _DEFAULT_STORE
+    with _DEFAULT_STORE_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = LogoStore()
+        return _DEFAULT_STORE
@@ -0,0 +1,135 @@
+"""Process-wide cache of trained PPO policies.
+
+Loading ``trader_model.zip`` unpickles the whole policy, which is the largest
+fixed cost of a simulation request.  The registry keeps each model warm in
+memory and only reloads it when the file's modification time changes.  It
+also exposes a batched greedy policy that runs one TorchScript forward pass
+over a stack of observations.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+from tracing import register_cache, span
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from stable_baselines3 import PPO
+
+LOGGER = logging.getLogger(__name__)
+
+PolicyFn = Callable[[np.ndarray], np.ndarray]
+
+
+@dataclass
+class _Entry:
+    mtime: float
+    model: "PPO"
+    policy: Optional[PolicyFn] = field(default=None)
+
+
+def _compile_policy(model: "PPO") -> PolicyFn:
+    """Return ``obs_batch -> actions`` using a traced greedy forward pass.
+
+    Falls back to ``model.predict`` when the policy cannot be traced (for
+    example a custom feature extractor).
+    """
+    import torch
+
+    policy = model.policy
+    policy.set_training_mode(False)
+
+    class _Greedy(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.policy = policy
+
+        def forward(self, obs: torch.Tensor) -> torch.Tensor:
+            features = self.policy.pi_features_extractor(obs)
+            latent_pi = self.policy.mlp_extractor.forward_actor(features)
+            return self.policy.action_net(latent_pi).argmax(dim=1)
+
+    obs_dim = int(np.prod(model.observation_space.shape))
+    try:
+        with torch.no_grad():
+            example = torch.zeros((2, obs_dim), dtype=torch.float32, device=policy.device)
+            traced = torch.jit.trace(_Greedy(), example)
+    except Exception as exc:  # noqa: BLE001 - any tracing failure falls back
+        LOGGER.info("Could not trace policy, using model.predict: %s", exc)
+
+        def predict(obs: np.ndarray) -> np.ndarray:
+            actions, _ = model.predict(obs, deterministic=True)
+            return np.asarray(actions)
+
+        return predict
+
+    def run(obs: np.ndarray) -> np.ndarray:
+        with torch.no_grad():
+            batch = torch.as_tensor(
+                np.asarray(obs, dtype=np.float32).reshape(-1, obs_dim),
+                device=policy.device,
+            )
+            return traced(batch).cpu().numpy()
+
+    return run
+
+
+class ModelRegistry:
+    """Load each model once and reload it when the file on disk changes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[Path, _Entry] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def _entry(self, path: Path | str) -> _Entry:
+        from stable_baselines3 import PPO
+
+        path = Path(path).resolve()
+        mtime = path.stat().st_mtime
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.mtime != mtime:
+                LOGGER.info("Loading trader model from %s", path)
+                with span("model.load"):
+                    entry = _Entry(mtime=mtime, model=PPO.load(str(path)))
+                self._entries[path] = entry
+                self.loads += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def get(self, path: Path | str) -> "PPO":
+        """Return the (possibly cached) model stored at ``path``."""
+        return self._entry(path).model
+
+    def get_policy(self, path: Path | str) -> PolicyFn:
+        """Return a batched deterministic policy for the model at ``path``."""
+        entry = self._entry(path)
+        with self._lock:
+            if entry.policy is None:
+                with span("model.compile"):
+                    entry.policy = _compile_policy(entry.model)
+            return entry.policy
+
+    def version(self, path: Path | str) -> Optional[float]:
+        """Return the mtime of the loaded model, or ``None`` if not loaded yet."""
+        with self._lock:
+            entry = self._entries.get(Path(path).resolve())
+        return entry.mtime if entry is not None else None
+
+
+    def stats(self) -> dict[str, int]:
+        """Lookups served from memory (``hits``) versus loads from disk (``misses``)."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.loads}
+
+
+registry = ModelRegistry()
+register_cache("model", registry.stats)
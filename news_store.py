@@ -0,0 +1,324 @@
+"""Local, incrementally updated index of company news headlines.
+
+Headlines are ingested from each company's Google News RSS search feed and
+kept in a SQLite database shared by every worker: an ``articles`` table
+(deduplicated per company by a hash of the normalised link) with an FTS5
+full-text index over titles.  Feeds are fetched through the shared
+:mod:`http_client` with conditional GETs, so a poll that finds nothing new
+costs one ``304 Not Modified`` on a pooled connection.
+
+Companies are tracked from the moment their news is first requested.  That
+first request polls the feed once (concurrent callers share the fetch); a
+daemon thread then re-polls tracked companies every ``poll_seconds``, so
+:meth:`NewsStore.headlines` normally answers from the index alone.
+"""
+from __future__ import annotations
+
+import calendar
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from http_client import get_client as get_http_client
+from singleflight import SingleFlight
+from tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(
+    os.environ.get("FINGEN_NEWS_DB", Path(__file__).resolve().parent / ".news.sqlite3")
+)
+DEFAULT_POLL_SECONDS = float(os.environ.get("FINGEN_NEWS_POLL", 10 * 60))
+# Companies nobody asked about for this long are no longer polled.
+DEFAULT_TRACK_SECONDS = float(os.environ.get("FINGEN_NEWS_TRACK", 7 * 24 * 60 * 60))
+DEFAULT_RETENTION_SECONDS = float(os.environ.get("FINGEN_NEWS_RETENTION", 30 * 24 * 60 * 60))
+
+FEED_URL = "https://news.google.com/rss/search?q={query}"
+
+
+def feed_url(company: str) -> str:
+    return FEED_URL.format(query=urllib.parse.quote(company + " stock"))
+
+
+def link_hash(link: str) -> str:
+    """Hash of ``link`` without its fragment and ``utm_*`` tracking parameters."""
+    parts = urllib.parse.urlsplit(link.strip())
+    query = urllib.parse.urlencode(
+        [
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_")
+        ]
+    )
+    clean = urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+    return hashlib.sha1(clean.encode("utf-8")).hexdigest()
+
+
+def _published(entry) -> Optional[float]:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    return float(calendar.timegm(parsed)) if parsed else None
+
+
+class NewsStore:
+    """SQLite-backed headline index fed by conditional RSS polls."""
+
+    def __init__(
+        self,
+        path: Path | str = DEFAULT_DB_PATH,
+        *,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+        track_seconds: float = DEFAULT_TRACK_SECONDS,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.poll_seconds = poll_seconds
+        self.track_seconds = track_seconds
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS feeds (
+                    company TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    etag TEXT,
+                    modified TEXT,
+                    polled_at REAL,
+                    requested_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY,
+                    company TEXT NOT NULL,
+                    link_hash TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    source TEXT,
+                    published_at REAL NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    UNIQUE (company, link_hash)
+                );
+                CREATE INDEX IF NOT EXISTS articles_recent ON articles (company, published_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    title, content='articles', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                    INSERT INTO articles_fts (rowid, title) VALUES (new.id, new.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, title)
+                    VALUES ('delete', old.id, old.title);
+                END;
+                """
+            )
+
+    # --------------------------------------------------------------- ingest
+    def _track(self, company: str) -> Optional[float]:
+        """Mark ``company`` as requested; returns when its feed was last polled."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO feeds (company, url, requested_at) VALUES (?, ?, ?)
+                ON CONFLICT (company) DO UPDATE SET requested_at = excluded.requested_at
+                """,
+                (company, feed_url(company), now),
+            )
+            row = self._conn.execute(
+                "SELECT polled_at FROM feeds WHERE company = ?", (company,)
+            ).fetchone()
+        return row[0]
+
+    def poll(self, company: str) -> int:
+        """Fetch ``company``'s feed if it changed; returns the number of new articles."""
+        return self._flight.do(company, lambda: self._poll(company))
+
+    def _poll(self, company: str) -> int:
+        import feedparser
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, modified FROM feeds WHERE company = ?", (company,)
+            ).fetchone()
+        url, etag, modified = row if row else (feed_url(company), None, None)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        entries = []
+        try:
+            with span("news.rss"):
+                response = get_http_client().get(url, headers=headers)
+            if response.status_code == 200:
+                etag = response.headers.get("ETag") or etag
+                modified = response.headers.get("Last-Modified") or modified
+                entries = feedparser.parse(response.content).entries
+            elif response.status_code != 304:
+                LOGGER.debug("News feed for %s answered %s", company, response.status_code)
+        except requests.RequestException as exc:
+            # Still recorded as polled, so requests do not retry until the next poll.
+            LOGGER.debug("News feed for %s failed: %s", company, exc)
+
+        now = time.time()
+
+        rows = []
+        for entry in entries:
+            title, link = entry.get("title"), entry.get("link")
+            if not title or not link:
+                continue
+            source = entry.get("source")
+            rows.append(
+                (
+                    company,
+                    link_hash(link),
+                    title,
+                    link,
+                    source.get("title") if isinstance(source, dict) else None,
+                    _published(entry) or now,
+                    now,
+                )
+            )
+        with self._lock, self._conn:
+            added = self._conn.executemany(
+                """
+                INSERT OR IGNORE INTO articles
+                    (company, link_hash, title, link, source, published_at, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            ).rowcount
+            self._conn.execute(
+                """
+                INSERT INTO feeds (company, url, etag, modified, polled_at, requested_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (company) DO UPDATE SET
+                    etag = COALESCE(excluded.etag, feeds.etag),
+                    modified = COALESCE(excluded.modified, feeds.modified),
+                    polled_at = excluded.polled_at
+                """,
+                (company, url, etag, modified, now, now),
+            )
+        return added
+
+    def prune(self) -> int:
+        """Drop articles past the retention period and feeds nobody requests."""
+        now = time.time()
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM articles WHERE published_at < ?", (now - self.retention_seconds,)
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM feeds WHERE requested_at < ?", (now - self.track_seconds,)
+            )
+        return deleted
+
+    def _due(self) -> list[str]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT company FROM feeds
+                WHERE requested_at >= ? AND (polled_at IS NULL OR polled_at < ?)
+                ORDER BY polled_at
+                """,
+                (now - self.track_seconds, now - self.poll_seconds),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _poll_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                for company in self._due():
+                    if self._stop.is_set():
+                        return
+                    self.poll(company)
+                self.prune()
+            except Exception as exc:  # noqa: BLE001 - keep the poller alive
+                LOGGER.warning("News poll failed: %s", exc)
+            self._stop.wait(min(self.poll_seconds, 60.0))
+
+    def start_background_poll(self) -> None:
+        """Start the daemon thread that keeps tracked companies' feeds current."""
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name="news-poll", daemon=True)
+            self._poller.start()
+
+    def close(self) -> None:
+        """Stop the poller (after its current poll) and close the database."""
+        self._stop.set()
+        with self._lock:
+            poller, self._poller = self._poller, None
+        if poller is not None:
+            poller.join()
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------------- query
+    def headlines(self, company: str, *, limit: int = 5) -> list[str]:
+        """Most recent ``"title - link"`` headlines for ``company``.
+
+        Only the first request for a company waits for a feed fetch; later
+        ones read the index while the poller refreshes it.
+        """
+        if self._track(company) is None:
+            try:
+                self.poll(company)
+            except Exception as exc:  # noqa: BLE001 - serve whatever is indexed
+                LOGGER.warning("News fetch for %s failed: %s", company, exc)
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT title, link FROM articles WHERE company = ?
+                ORDER BY published_at DESC, id DESC LIMIT ?
+                """,
+                (company, limit),
+            ).fetchall()
+        return [f"{title} - {link}" for title, link in rows]
+
+    def search(self, query: str, *, company: Optional[str] = None, limit: int = 10) -> list[dict]:
+        """Full-text search over indexed titles, best matches first."""
+        sql = """
+            SELECT a.company, a.title, a.link, a.source, a.published_at
+            FROM articles_fts JOIN articles AS a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        """
+        params: list = [query]
+        if company is not None:
+            sql += " AND a.company = ?"
+            params.append(company)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("company", "title", "link", "source", "published_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+_DEFAULT_STORE: Optional[NewsStore] = None
+_DEFAULT_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> NewsStore:
+    """Return the process-wide :class:`NewsStore`, starting its poller."""
+    global _DEFAULT_STORE
+    with _DEFAULT_STORE_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = NewsStore()
+            _DEFAULT_STORE.start_background_poll()
+        return _DEFAULT_STORE
@@ -0,0 +1,31 @@
+"""Lazily created OpenAI client shared by the analyst and strategist agents."""
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from openai import OpenAI
+
+_CLIENT: Optional["OpenAI"] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> "OpenAI":
+    """Return the process-wide client, creating it on first use.
+
+    Raises ``ValueError`` when ``OPENAI_API_KEY`` is not set.  When
+    ``OPENAI_BASE_URL`` is set the client talks to that OpenAI-compatible
+    server instead.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("❌ OPENAI_API_KEY is missing from environment.")
+            from openai import OpenAI
+
+            _CLIENT = OpenAI(api_key=api_key)
+        return _CLIENT
@@ -0,0 +1,197 @@
+"""Read-only price arrays shared between processes through memory-mapped files.
+
+Every training worker, evaluation worker and web worker that loads the same
+price series would otherwise hold its own float32 copy.  :func:`share_prices`
+writes the series once as ``<cache>/arrays/<sha1>.npy`` and returns a
+read-only memory-mapped view of it, so all processes on the machine map the
+same page-cache pages: one physical copy per series, however many workers.
+
+Files are content-addressed, so a refreshed price history simply maps a new
+file and nothing is ever rewritten in place.  They live next to the price
+store but under their own disk budget, evicting the least recently mapped
+files; unlinking a file that is still mapped is safe, the mapping stays
+valid until it is dropped.
+
+Callers that know where a series came from can pass a ``key`` (for example
+the price-store entry and its mtime) so repeat calls skip hashing: the
+digest remembered for the key is reused once the mapped file is confirmed
+to hold the same values.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, Optional
+
+import numpy as np
+
+from price_store import ARRAYS_SUBDIR, DEFAULT_CACHE_DIR
+from tracing import register_cache
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_ARRAY_DIR = Path(os.environ.get("FINGEN_PRICE_ARRAYS", DEFAULT_CACHE_DIR / ARRAYS_SUBDIR))
+DEFAULT_DISK_BUDGET = int(os.environ.get("FINGEN_PRICE_ARRAYS_BYTES", 256 * 1024 * 1024))
+
+
+class PriceArrays:
+    """Content-addressed registry of memory-mapped float32 price series."""
+
+    def __init__(
+        self,
+        root: Path | str = DEFAULT_ARRAY_DIR,
+        *,
+        memory_limit: int = 256,
+        disk_budget: int = DEFAULT_DISK_BUDGET,
+    ) -> None:
+        self.root = Path(root)
+        self.memory_limit = memory_limit
+        self.disk_budget = disk_budget
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._digests: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def path(self, digest: str) -> Path:
+        return self.root / f"{digest}.npy"
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _remember(self, digest: str, view: np.ndarray) -> None:
+        with self._lock:
+            self._views[digest] = view
+            while len(self._views) > self.memory_limit:
+                self._views.popitem(last=False)
+
+    def _remember_digest(self, key: Hashable, digest: str) -> None:
+        with self._lock:
+            self._digests[key] = digest
+            self._digests.move_to_end(key)
+            while len(self._digests) > self.memory_limit:
+                self._digests.popitem(last=False)
+
+    def _known(self, key: Hashable, values: np.ndarray) -> Optional[np.ndarray]:
+        """Return the mapped view remembered for ``key`` if it still holds ``values``."""
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            return None
+        try:
+            view = self.open(digest)
+        except (OSError, ValueError):
+            return None
+        # A compare is far cheaper than rehashing and guards against a key
+        # whose source changed without its mtime moving.
+        return view if np.array_equal(view, values) else None
+
+    def open(self, digest: str) -> np.ndarray:
+        """Map a previously shared series by its digest (``OSError`` if gone)."""
+        with self._lock:
+            view = self._views.get(digest)
+            if view is not None:
+                self._views.move_to_end(digest)
+                return view
+        path = self.path(digest)
+        # ``np.asarray`` drops the memmap subclass but keeps the mapping alive.
+        view = np.asarray(np.load(path, mmap_mode="r"))
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        self._remember(digest, view)
+        return view
+
+    def share(self, values: np.ndarray, *, key: Optional[Hashable] = None) -> np.ndarray:
+        """Return a read-only, memory-mapped float32 copy of ``values``.
+
+        ``key`` identifies the source of ``values`` (it must change whenever
+        they may); with it, repeat calls reuse the remembered digest instead
+        of hashing the series again.
+        """
+        values = np.ascontiguousarray(values, dtype=np.float32).ravel()
+        if values.size == 0:
+            return values
+        view = self._known(key, values) if key is not None else None
+        if view is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+            return view
+        digest = hashlib.sha1(values.tobytes()).hexdigest()
+        if key is not None:
+            self._remember_digest(key, digest)
+        try:
+            view = self.open(digest)
+        except (OSError, ValueError):
+            pass
+        else:
+            with self._lock:
+                self._stats["hits"] += 1
+            return view
+
+        with self._lock:
+            self._stats["misses"] += 1
+        path = self.path(digest)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as handle:
+                np.save(handle, values)
+            os.replace(tmp, path)
+            view = self.open(digest)
+        except (OSError, ValueError) as exc:
+            LOGGER.debug("Could not share prices via %s: %s", path, exc)
+            view = values.view()
+            view.setflags(write=False)
+            return view
+        self._evict(keep=path)
+        return view
+
+    def _evict(self, *, keep: Path) -> None:
+        entries = []
+        total = 0
+        for path in self.root.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            total += stat.st_size
+            entries.append((stat.st_mtime, stat.st_size, path))
+        if total <= self.disk_budget:
+            return
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.disk_budget:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+
+
+_DEFAULT_ARRAYS: Optional[PriceArrays] = None
+_DEFAULT_ARRAYS_LOCK = threading.Lock()
+
+
+def get_arrays() -> PriceArrays:
+    """Return the process-wide :class:`PriceArrays` registry."""
+    global _DEFAULT_ARRAYS
+    with _DEFAULT_ARRAYS_LOCK:
+        if _DEFAULT_ARRAYS is None:
+            _DEFAULT_ARRAYS = PriceArrays()
+            register_cache("price_arrays", _DEFAULT_ARRAYS.stats)
+        return _DEFAULT_ARRAYS
+
+
+def share_prices(values: np.ndarray, *, key: Optional[Hashable] = None) -> np.ndarray:
+    """Shortcut for ``get_arrays().share(values, key=key)``."""
+    return get_arrays().share(values, key=key)
@@ -0,0 +1,210 @@
+"""Chunked, memory-mapped price feeds for long and intraday histories.
+
+:func:`data_utils.get_price_series` loads a whole close series into memory,
+which does not scale to years of minute bars across many tickers.  A
+:class:`PriceFeed` instead maps an OHLCV record file (the structured ``.npy``
+format of :mod:`price_store`) read-only and exposes one column of it:
+
+* ``len(feed)`` and ``feed[i]`` work like an array, so ``TradingEnv`` can
+  step over a feed directly and only the pages it touches are read
+  (non-finite prices read as 0, as in :meth:`PriceFeed.chunks`);
+* :meth:`PriceFeed.chunks` yields bounded float32 chunks for code that
+  processes a series in order, such as :func:`test_trader.simulate_feed`;
+* :meth:`PriceFeed.window` returns a feed over a slice without copying.
+
+:func:`open_feed` picks the history for an interval (``1m``, ``5m``,
+``1d``...) from the price store; :func:`import_csv` and :func:`write_feed`
+turn large OHLCV files or frame streams into feed files chunk by chunk, so
+memory stays bounded however long the history is.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from price_store import PriceStore, _frame_to_records, get_store
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pandas as pd
+
+# Longest history Yahoo serves for each bar interval.
+INTERVAL_PERIODS = {
+    "1m": "7d",
+    "2m": "60d",
+    "5m": "60d",
+    "15m": "60d",
+    "30m": "60d",
+    "60m": "730d",
+    "1h": "730d",
+    "1d": "1y",
+    "1wk": "5y",
+    "1mo": "10y",
+}
+
+DEFAULT_CHUNK = 65_536
+
+
+class PriceFeed:
+    """Read-only view of one column of an OHLCV record array.
+
+    ``records`` is normally a memory map from :meth:`open`; nothing is
+    copied until :meth:`chunks` materialises a bounded piece of it.
+    """
+
+    def __init__(
+        self,
+        records: np.ndarray,
+        *,
+        column: str = "Close",
+        interval: str = "1d",
+        name: str = "",
+    ) -> None:
+        if records.dtype.names is None or column not in records.dtype.names:
+            raise KeyError(f"no {column!r} column in price records")
+        self.records = records
+        self.column = column
+        self.interval = interval
+        self.name = name
+        self.values = records[column]
+
+    @classmethod
+    def open(cls, path: Path | str, **kwargs) -> "PriceFeed":
+        """Map the record file at ``path`` (see :func:`write_feed`)."""
+        return cls(np.load(path, mmap_mode="r"), **kwargs)
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return tuple(name for name in self.records.dtype.names if name != "index")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        # Same NaN handling as ``chunks`` so env runs and chunked runs agree.
+        return np.nan_to_num(self.values[index])
+
+    def __repr__(self) -> str:
+        return f"PriceFeed({self.name or '?'}, {self.interval}, {self.column}, {len(self)} bars)"
+
+    def window(self, start: int = 0, stop: Optional[int] = None) -> "PriceFeed":
+        """Feed over bars ``start:stop`` sharing the same mapping."""
+        return PriceFeed(
+            self.records[start:stop], column=self.column, interval=self.interval, name=self.name
+        )
+
+    def timestamps(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        return np.asarray(self.records["index"][start:stop])
+
+    def chunks(
+        self,
+        size: int = DEFAULT_CHUNK,
+        *,
+        overlap: int = 0,
+        dtype: np.dtype = np.float32,
+    ) -> Iterator[np.ndarray]:
+        """Yield the column in order as arrays of at most ``size + overlap`` bars.
+
+        Consecutive chunks share ``overlap`` bars: with ``overlap=1`` every
+        step from bar ``t`` to ``t + 1`` falls inside exactly one chunk.
+        Non-finite prices are replaced by 0 like ``get_price_series`` does.
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+        total = len(self)
+        for start in range(0, max(total - overlap, 0), size):
+            chunk = np.asarray(self.values[start : min(start + size + overlap, total)], dtype=dtype)
+            yield np.nan_to_num(chunk, copy=False)
+
+
+def write_feed(path: Path | str, frames: Iterable["pd.DataFrame"]) -> int:
+    """Write OHLCV ``frames`` (in time order) as one feed file; returns the bar count.
+
+    Frames are converted and appended one at a time, then the ``.npy``
+    header is written in front, so only one frame is in memory at once.
+    Timestamps are stored as naive UTC.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    raw = path.with_name(path.name + suffix + ".raw")
+    tmp = path.with_name(path.name + suffix)
+    dtype: Optional[np.dtype] = None
+    rows = 0
+    try:
+        with open(raw, "wb") as handle:
+            for frame in frames:
+                if frame is None or frame.empty:
+                    continue
+                records, _ = _frame_to_records(frame)
+                if dtype is None:
+                    dtype = records.dtype
+                elif records.dtype != dtype:
+                    raise ValueError("every frame must have the same numeric columns")
+                records.tofile(handle)
+                rows += len(records)
+        if dtype is None:
+            raise ValueError("no price rows to write")
+        with open(tmp, "wb") as out, open(raw, "rb") as source:
+            np.lib.format.write_array_header_1_0(
+                out,
+                {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)},
+            )
+            while True:
+                block = source.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+        os.replace(tmp, path)
+    finally:
+        for leftover in (raw, tmp):
+            try:
+                leftover.unlink()
+            except OSError:
+                pass
+    return rows
+
+
+def import_csv(
+    csv_path: Path | str,
+    out_path: Path | str,
+    *,
+    chunksize: int = 100_000,
+    usecols: Optional[Sequence[str]] = None,
+) -> int:
+    """Convert a large OHLCV CSV (timestamp in the first column) into a feed file."""
+    import pandas as pd
+
+    reader = pd.read_csv(
+        csv_path, index_col=0, parse_dates=True, chunksize=chunksize, usecols=usecols
+    )
+    return write_feed(out_path, reader)
+
+
+def open_feed(
+    ticker: str,
+    *,
+    interval: str = "1d",
+    period: Optional[str] = None,
+    column: str = "Close",
+    store: Optional[PriceStore] = None,
+) -> PriceFeed:
+    """Feed over ``ticker``'s ``interval`` bars, refreshed through the price store.
+
+    ``period`` defaults to the longest history Yahoo serves for ``interval``.
+    """
+    if interval not in INTERVAL_PERIODS:
+        raise ValueError(f"unsupported interval {interval!r}; use one of {', '.join(INTERVAL_PERIODS)}")
+    period = period or INTERVAL_PERIODS[interval]
+    store = store or get_store()
+    frame = store.history(ticker, period=period, interval=interval)
+    if frame is None or frame.empty:
+        raise ValueError(f"no {interval} prices for {ticker}")
+    path = store.entry_path(ticker, period=period, interval=interval)
+    if not path.exists():
+        # Served from a longer cached period; give this one its own file.
+        store.put(ticker, frame, period=period, interval=interval)
+    return PriceFeed.open(path, column=column, interval=interval, name=ticker.upper())
@@ -0,0 +1,362 @@
+"""On-disk price history store shared by every yfinance consumer.
+
+Each ``(ticker, interval, period)`` entry is persisted as a single structured
+``.npy`` file (memory-mappable, one field per OHLCV column) next to a small
+JSON sidecar that records when it was fetched.  Stale entries are topped up
+by downloading only the bars after the last cached timestamp, and the whole
+cache directory is kept under a disk budget by evicting the least recently
+used entries.
+
+yfinance is imported on first download to keep module import cheap.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from http_client import get_client as get_http_client
+from tracing import register_cache, span
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get(
+        "FINGEN_PRICE_CACHE",
+        Path(__file__).resolve().parent / ".price_cache",
+    )
+)
+DEFAULT_TTL_SECONDS = float(os.environ.get("FINGEN_PRICE_TTL", 6 * 60 * 60))
+DEFAULT_DISK_BUDGET = int(os.environ.get("FINGEN_PRICE_CACHE_BYTES", 256 * 1024 * 1024))
+# Subdirectory owned by :mod:`price_arrays`, which keeps its own disk budget.
+ARRAYS_SUBDIR = "arrays"
+
+# Approximate calendar span of each yfinance ``period`` string.
+_PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "7d": 7,
+    "1mo": 31,
+    "60d": 60,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "730d": 730,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+
+def _period_days(period: str) -> Optional[float]:
+    """Return the span covered by ``period`` in days (``None`` for ``max``)."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        now = datetime.now(timezone.utc)
+        return float((now - datetime(now.year, 1, 1, tzinfo=timezone.utc)).days + 1)
+    return float(_PERIOD_DAYS.get(period, 0)) or None
+
+
+def _frame_to_records(frame: pd.DataFrame) -> tuple[np.ndarray, Optional[str]]:
+    index = pd.DatetimeIndex(frame.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    columns = [col for col in frame.columns if pd.api.types.is_numeric_dtype(frame[col])]
+    dtype = [("index", "datetime64[ns]")] + [(str(col), "f8") for col in columns]
+    records = np.empty(len(frame), dtype=dtype)
+    records["index"] = index.to_numpy(dtype="datetime64[ns]")
+    for col in columns:
+        records[str(col)] = frame[col].to_numpy(dtype=np.float64)
+    return records, tz
+
+
+def _records_to_frame(records: np.ndarray, tz: Optional[str]) -> pd.DataFrame:
+    index = pd.DatetimeIndex(np.asarray(records["index"]), name="Date")
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    columns = [name for name in records.dtype.names if name != "index"]
+    return pd.DataFrame({col: np.asarray(records[col]) for col in columns}, index=index)
+
+
+def _trim_to_period(frame: pd.DataFrame, period: str) -> pd.DataFrame:
+    days = _period_days(period)
+    if days is None or frame.empty:
+        return frame
+    cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+    index = frame.index
+    if index.tz is None:
+        cutoff = cutoff.tz_localize(None)
+    return frame[index >= cutoff]
+
+
+class PriceStore:
+    """Persistent, TTL-checked cache of ``yf.Ticker.history`` results."""
+
+    def __init__(
+        self,
+        cache_dir: Path | str = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        disk_budget: int = DEFAULT_DISK_BUDGET,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.disk_budget = disk_budget
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple[str, str, str], threading.Lock] = {}
+        self._stats = {"hits": 0, "misses": 0, "topups": 0, "stale": 0, "evictions": 0}
+
+    # ------------------------------------------------------------------ paths
+    def _entry_paths(self, ticker: str, period: str, interval: str) -> tuple[Path, Path]:
+        safe = ticker.upper().replace("/", "_")
+        base = self.cache_dir / safe / f"{interval}-{period}"
+        return base.with_suffix(".npy"), base.with_suffix(".json")
+
+    def entry_path(self, ticker: str, *, period: str = "1y", interval: str = "1d") -> Path:
+        """Return the ``.npy`` file backing an entry (it may not exist yet)."""
+        return self._entry_paths(ticker, period, interval)[0]
+
+    def entry_version(self, ticker: str, *, period: str = "1y", interval: str = "1d") -> Optional[int]:
+        """Return the ``st_mtime_ns`` of an entry's data file, or ``None`` if absent.
+
+        The value changes whenever the entry is rewritten, so callers can key
+        data derived from an entry on it.
+        """
+        try:
+            return self.entry_path(ticker, period=period, interval=interval).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _key_lock(self, key: tuple[str, str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of the hit/miss/top-up counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    # ------------------------------------------------------------------- io
+    def _read(self, ticker: str, period: str, interval: str) -> Optional[tuple[pd.DataFrame, float]]:
+        data_path, meta_path = self._entry_paths(ticker, period, interval)
+        try:
+            meta = json.loads(meta_path.read_text())
+            records = np.load(data_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(meta_path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return _records_to_frame(records, meta.get("tz")), float(meta.get("fetched_at", 0.0))
+
+    def _write(self, ticker: str, period: str, interval: str, frame: pd.DataFrame) -> None:
+        data_path, meta_path = self._entry_paths(ticker, period, interval)
+        records, tz = _frame_to_records(frame)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_data = data_path.with_name(data_path.name + suffix)
+        tmp_meta = meta_path.with_name(meta_path.name + suffix)
+        with open(tmp_data, "wb") as handle:
+            np.save(handle, records)
+        tmp_meta.write_text(json.dumps({"fetched_at": time.time(), "tz": tz}))
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_meta, meta_path)
+        self._evict(keep=data_path)
+
+    def _evict(self, *, keep: Path) -> None:
+        entries = []
+        total = 0
+        arrays_dir = self.cache_dir / ARRAYS_SUBDIR
+        for data_path in self.cache_dir.glob("*/*.npy"):
+            if data_path.parent == arrays_dir:
+                continue
+            meta_path = data_path.with_suffix(".json")
+            try:
+                data_stat = data_path.stat()
+            except OSError:
+                continue
+            try:
+                meta_stat = meta_path.stat()
+            except OSError:
+                # Derived arrays (e.g. cached features) have no sidecar.
+                meta_stat = None
+            size = data_stat.st_size + (meta_stat.st_size if meta_stat else 0)
+            used = (meta_stat or data_stat).st_mtime
+            total += size
+            entries.append((used, size, data_path, meta_path))
+        if total <= self.disk_budget:
+            return
+        for _, size, data_path, meta_path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.disk_budget:
+                break
+            if data_path == keep:
+                continue
+            for path in (meta_path, data_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+            self._count("evictions")
+
+    def _fresh(self, fetched_at: float) -> bool:
+        return (time.time() - fetched_at) < self.ttl_seconds
+
+    def _covering_entry(self, ticker: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        """Serve ``period`` from a fresh cached entry that spans a longer period."""
+        wanted = _period_days(period)
+        if wanted is None:
+            return None
+        for candidate in ("max", *sorted(_PERIOD_DAYS, key=_PERIOD_DAYS.get, reverse=True)):
+            span = _period_days(candidate)
+            if candidate == period or (span is not None and span <= wanted):
+                continue
+            cached = self._read(ticker, candidate, interval)
+            if cached is not None and self._fresh(cached[1]):
+                return _trim_to_period(cached[0], period)
+        return None
+
+    # ---------------------------------------------------------------- public
+    def history(self, ticker: str, *, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        """Return OHLCV history for ``ticker``, downloading only what is missing."""
+        key = (ticker.upper(), period, interval)
+        with self._key_lock(key):
+            cached = self._read(ticker, period, interval)
+            if cached is not None and self._fresh(cached[1]):
+                self._count("hits")
+                return cached[0]
+
+            covered = self._covering_entry(ticker, period, interval)
+            if covered is not None and not covered.empty:
+                self._count("hits")
+                return covered
+
+            if cached is not None and not cached[0].empty:
+                return self._top_up(ticker, period, interval, cached[0])
+
+            self._count("misses")
+            import yfinance as yf
+
+            with get_http_client().guard("yfinance"), span("yfinance.history"):
+                frame = yf.Ticker(ticker).history(period=period, interval=interval)
+            if frame is not None and not frame.empty:
+                self._write(ticker, period, interval, frame)
+            return frame
+
+    def _top_up(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        stale: pd.DataFrame,
+    ) -> pd.DataFrame:
+        self._count("topups")
+        last = stale.index[-1]
+        import yfinance as yf
+
+        try:
+            # Re-fetch the last cached bar as well: it may have been a partial session.
+            with get_http_client().guard("yfinance"), span("yfinance.history"):
+                tail = yf.Ticker(ticker).history(start=last.strftime("%Y-%m-%d"), interval=interval)
+        except Exception as exc:  # noqa: BLE001 - serve stale data when offline
+            LOGGER.warning("Top-up for %s failed, serving stale data: %s", ticker, exc)
+            self._count("stale")
+            return stale
+        if tail is None or tail.empty:
+            self._count("stale")
+            return stale
+
+        head = stale[stale.index < tail.index[0]]
+        merged = pd.concat([head, tail[[col for col in stale.columns if col in tail.columns]]])
+        merged = _trim_to_period(merged[~merged.index.duplicated(keep="last")], period)
+        self._write(ticker, period, interval, merged)
+        return merged
+
+    def put(self, ticker: str, frame: pd.DataFrame, *, period: str = "1y", interval: str = "1d") -> None:
+        """Store ``frame`` as the fresh entry for ``(ticker, period, interval)``."""
+        if frame is None or frame.empty:
+            return
+        with self._key_lock((ticker.upper(), period, interval)):
+            self._write(ticker, period, interval, frame)
+
+    def prefetch(self, tickers: list[str], *, period: str = "1y", interval: str = "1d") -> None:
+        """Warm the store for many tickers with a single bulk ``yf.download``."""
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            cached = self._read(ticker, period, interval)
+            if cached is None or not self._fresh(cached[1]):
+                missing.append(ticker)
+        if not missing:
+            return
+
+        self._count("misses")
+        import yfinance as yf
+
+        try:
+            with get_http_client().guard("yfinance"), span("yfinance.download"):
+                bulk = yf.download(
+                    missing,
+                    period=period,
+                    interval=interval,
+                    group_by="ticker",
+                    auto_adjust=True,
+                    actions=True,
+                    threads=True,
+                    progress=False,
+                )
+        except Exception as exc:  # noqa: BLE001 - callers fall back to per-ticker fetches
+            LOGGER.warning("Bulk download of %s tickers failed: %s", len(missing), exc)
+            return
+        if bulk is None or bulk.empty:
+            return
+
+        for ticker in missing:
+            if isinstance(bulk.columns, pd.MultiIndex):
+                if ticker not in bulk.columns.get_level_values(0):
+                    continue
+                frame = bulk[ticker]
+            else:
+                frame = bulk
+            self.put(ticker, frame.dropna(how="all"), period=period, interval=interval)
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+_DEFAULT_STORE: Optional[PriceStore] = None
+_DEFAULT_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> PriceStore:
+    """Return the process-wide :class:`PriceStore`."""
+    global _DEFAULT_STORE
+    with _DEFAULT_STORE_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = PriceStore()
+            register_cache("price", _DEFAULT_STORE.stats)
+        return _DEFAULT_STORE
+
+
+def get_history(ticker: str, *, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+    """Shortcut for ``get_store().history(...)``."""
+    return get_store().history(ticker, period=period, interval=interval)
@@ -0,0 +1,238 @@
+"""Token-budgeted building blocks for the analyst and strategist prompts.
+
+The analyst prompt used to inline the full business summary, a
+``DataFrame.to_string()`` price table and raw headlines with their URLs, and
+the strategist prompt the whole analyst report.  This module keeps each of
+those sections under a token budget instead:
+
+* prices are reduced to a one-line summary of returns, range and volatility;
+* URLs are stripped from headlines and duplicate headlines dropped;
+* every section is cut to its budget at a word boundary;
+* the static company profile (name, sector, capped business summary) is
+  cached per ticker, so repeat runs skip the yfinance ``info`` lookup.
+
+Tokens are counted with ``tiktoken`` when it is installed and estimated at
+four characters per token otherwise.
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple
+
+from tracing import register_cache
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pandas as pd
+
+# Token budget per prompt section.
+SUMMARY_TOKENS = int(os.environ.get("FINGEN_PROMPT_SUMMARY_TOKENS", 120))
+NEWS_TOKENS = int(os.environ.get("FINGEN_PROMPT_NEWS_TOKENS", 160))
+REPORT_TOKENS = int(os.environ.get("FINGEN_PROMPT_REPORT_TOKENS", 400))
+
+PROFILE_TTL = float(os.environ.get("FINGEN_PROFILE_TTL", 24 * 60 * 60))
+PROFILE_CACHE_SIZE = 1024
+
+CHARS_PER_TOKEN = 4
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_SPACE = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """The ``tiktoken`` encoding used for counting, or ``None`` without tiktoken."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, *, keep_end: bool = False) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, at a word boundary, with an ellipsis.
+
+    ``keep_end`` keeps the end of ``text`` and drops its beginning instead.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(max_tokens - 1, 0)
+    encoding = _encoding()
+    if encoding is None:
+        chars = keep * CHARS_PER_TOKEN
+        cut = (text[-chars:] if chars else "") if keep_end else text[:chars]
+    else:
+        tokens = encoding.encode(text)
+        cut = encoding.decode(tokens[len(tokens) - keep :] if keep_end else tokens[:keep])
+    if keep_end:
+        if " " in cut:
+            cut = cut.split(" ", 1)[1]
+        return "…" + cut.lstrip(" ,;:-")
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:-") + "…"
+
+
+def compact_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines."""
+    text = _SPACE.sub(" ", text.strip())
+    return _BLANK_LINES.sub("\n", text)
+
+
+def strip_urls(text: str) -> str:
+    """Remove URLs and the separators left dangling around them."""
+    return _URL.sub("", text).strip().rstrip(" -–|")
+
+
+def headlines_section(news: Iterable[str], *, max_tokens: int = NEWS_TOKENS) -> str:
+    """URL-free, de-duplicated headlines, one per line, as many as fit the budget."""
+    lines: list[str] = []
+    seen: set[str] = set()
+    used = 0
+    for item in news:
+        headline = strip_urls(item)
+        key = headline.lower()
+        if not headline or key in seen:
+            continue
+        cost = count_tokens(headline) + 1
+        if used + cost > max_tokens:
+            break
+        seen.add(key)
+        lines.append(f"- {headline}")
+        used += cost
+    return "\n".join(lines) or "No recent headlines."
+
+
+def price_summary(history: "pd.DataFrame") -> str:
+    """One-line numeric summary of an OHLCV frame: last close, returns, range, volatility."""
+    close = history["Close"].dropna() if "Close" in history else None
+    if close is None or close.empty:
+        return "No recent price data."
+    last = float(close.iloc[-1])
+    parts = [f"Last close {last:.2f} on {close.index[-1]:%Y-%m-%d}"]
+    for bars in sorted({5, len(close) - 1}):
+        if 0 < bars < len(close) and close.iloc[-1 - bars] > 0:
+            parts.append(f"{bars}-session change {last / float(close.iloc[-1 - bars]) * 100 - 100:+.1f}%")
+    low = float(history["Low"].min()) if "Low" in history else float(close.min())
+    high = float(history["High"].max()) if "High" in history else float(close.max())
+    parts.append(f"range {low:.2f}-{high:.2f}")
+    returns = close.pct_change().dropna()
+    if len(returns) > 1:
+        parts.append(f"daily volatility {float(returns.std()) * 100:.1f}%")
+    if "Volume" in history and history["Volume"].notna().any():
+        parts.append(f"avg volume {_human(float(history['Volume'].mean()))}")
+    return "; ".join(parts) + "."
+
+
+def _human(value: float) -> str:
+    for unit, scale in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if abs(value) >= scale:
+            return f"{value / scale:.1f}{unit}"
+    return f"{value:.0f}"
+
+
+class CompanyProfile(NamedTuple):
+    name: str
+    sector: str
+    summary: str
+
+
+_profiles: "OrderedDict[str, tuple[float, CompanyProfile]]" = OrderedDict()
+_profiles_lock = threading.Lock()
+_profile_stats = {"hits": 0, "misses": 0}
+
+
+def profile_stats() -> dict[str, int]:
+    with _profiles_lock:
+        return dict(_profile_stats)
+
+
+register_cache("profile", profile_stats)
+
+
+def company_profile(ticker: str, fetch_info: Callable[[], dict]) -> CompanyProfile:
+    """Return the cached profile for ``ticker``, calling ``fetch_info`` on a miss.
+
+    ``fetch_info`` returns a yfinance-style ``info`` dict; its business
+    summary is stored already cut to ``SUMMARY_TOKENS``.  Exceptions from it
+    propagate and nothing is cached.
+    """
+    key = ticker.upper()
+    now = time.time()
+    with _profiles_lock:
+        cached = _profiles.get(key)
+        if cached is not None and cached[0] > now:
+            _profiles.move_to_end(key)
+            _profile_stats["hits"] += 1
+            return cached[1]
+        _profile_stats["misses"] += 1
+
+    info = fetch_info()
+    profile = CompanyProfile(
+        name=info.get("longName", ticker),
+        sector=info.get("sector", "N/A"),
+        summary=truncate_tokens(
+            compact_text(info.get("longBusinessSummary") or "No summary available."), SUMMARY_TOKENS
+        ),
+    )
+    with _profiles_lock:
+        _profiles[key] = (now + PROFILE_TTL, profile)
+        _profiles.move_to_end(key)
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+
+def report_section(text: str, *, max_tokens: int = REPORT_TOKENS) -> str:
+    """An upstream model's report compacted and capped for a follow-up prompt.
+
+    Reports end with their recommendation and conclusion, so an over-budget
+    report loses its middle: up to a quarter of the budget keeps the opening
+    lines, the rest keeps as many closing lines as fit, and ``…`` marks the
+    cut.
+    """
+    text = compact_text(strip_markdown(text))
+    if count_tokens(text) <= max_tokens:
+        return text
+    lines = text.split("\n")
+    if len(lines) == 1:
+        return truncate_tokens(text, max_tokens, keep_end=True)
+    budget = max_tokens - 1  # the "…" line
+    head_budget = budget // 4
+    head: list[str] = []
+    for line in lines[:-1]:
+        cost = count_tokens(line) + 1
+        if cost > head_budget:
+            break
+        head.append(line)
+        head_budget -= cost
+        budget -= cost
+    tail: list[str] = []
+    for line in reversed(lines[len(head) :]):
+        cost = count_tokens(line) + 1
+        if cost > budget:
+            break
+        tail.append(line)
+        budget -= cost
+    tail.reverse()
+    if not tail:
+        tail = [truncate_tokens(lines[-1], max(budget, 1), keep_end=True)]
+    return "\n".join([*head, "…", *tail])
+
+
+def strip_markdown(text: str) -> str:
+    """Drop emphasis markers and heading hashes that cost tokens but carry no content."""
+    text = re.sub(r"(\*\*|__)(.+?)\1", r"\2", text)
+    return re.sub(r"^#{1,6}\s*", "", text, flags=re.MULTILINE)
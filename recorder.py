@@ -0,0 +1,200 @@
+"""Compact step recorder shared by simulations, training and evaluation.
+
+Each recorded step is one row of the packed structured dtype
+:data:`STEP_DTYPE` (``episode``, ``step``, ``action``, ``price``, ``value``;
+21 bytes), written into a preallocated array instead of growing Python
+lists.  With a ``spill_path`` the buffer is appended to that file whenever
+it fills up, so long training runs keep a bounded amount in memory; the
+file is the raw records back to back and is read with :func:`load_steps`.
+
+:meth:`EpisodeRecorder.summary` computes per-episode statistics for every
+recorded episode at once with segmented NumPy reductions.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+STEP_DTYPE = np.dtype(
+    [
+        ("episode", "<i4"),
+        ("step", "<i4"),
+        ("action", "i1"),
+        ("price", "<f4"),
+        ("value", "<f8"),
+    ]
+)
+
+SUMMARY_FIELDS = (
+    "episode",
+    "steps",
+    "final_value",
+    "return_pct",
+    "max_drawdown_pct",
+    "buys",
+    "sells",
+    "trades",
+)
+
+
+def load_steps(path: Path | str, *, mmap: bool = False) -> np.ndarray:
+    """Read records written by :meth:`EpisodeRecorder.save` or by spilling."""
+    if mmap:
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=STEP_DTYPE)
+        return np.memmap(path, dtype=STEP_DTYPE, mode="r")
+    return np.fromfile(path, dtype=STEP_DTYPE)
+
+
+def summarize(records: np.ndarray, initial_balance: float = 1000) -> dict[str, np.ndarray]:
+    """Per-episode stats of ``records``, each an array with one entry per episode.
+
+    Records must be grouped by episode in step order, as the recorder writes
+    them.  Drawdowns are measured against the running peak of the portfolio
+    value, starting from ``initial_balance`` like :mod:`backtest`.
+    """
+    if not len(records):
+        return {name: np.empty(0) for name in SUMMARY_FIELDS}
+    episode = records["episode"]
+    starts = np.flatnonzero(np.concatenate(([True], episode[1:] != episode[:-1])))
+    ends = np.append(starts[1:], len(records))
+    sizes = ends - starts
+    value = records["value"].astype(np.float64)
+    action = records["action"]
+    initial = float(initial_balance)
+
+    # A segmented running max in one pass: lift each episode above all
+    # earlier ones, accumulate, then drop the lift again.
+    low = min(float(value.min()), initial, 0.0)
+    lift = max(float(value.max()), initial) - low + 1.0
+    offset = np.repeat(np.arange(len(starts)) * lift, sizes)
+    peaks = np.maximum(np.maximum.accumulate(value + offset) - offset, initial)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = np.where(peaks > 0, value / peaks - 1.0, 0.0)
+    max_drawdown = np.abs(np.minimum(np.minimum.reduceat(drawdown, starts), 0.0)) * 100
+
+    final_value = value[ends - 1]
+    buys = np.add.reduceat(action == 1, starts)
+    sells = np.add.reduceat(action == 2, starts)
+    return {
+        "episode": episode[starts],
+        "steps": sizes,
+        "final_value": final_value,
+        "return_pct": (final_value - initial) / initial * 100,
+        "max_drawdown_pct": max_drawdown,
+        "buys": buys,
+        "sells": sells,
+        "trades": buys + sells,
+    }
+
+
+class EpisodeRecorder:
+    """Append-only buffer of :data:`STEP_DTYPE` records.
+
+    ``capacity`` rows are preallocated; when they fill up the buffer doubles,
+    or, with ``spill_path``, is appended to that file and reused.  Steps are
+    tagged with the current ``episode``, which :meth:`end_episode` advances.
+    """
+
+    def __init__(self, capacity: int = 4096, *, spill_path: Optional[Path | str] = None) -> None:
+        self._buffer = np.empty(max(int(capacity), 1), dtype=STEP_DTYPE)
+        self._size = 0
+        self._spilled = 0
+        self.spill_path = Path(spill_path) if spill_path is not None else None
+        if self.spill_path is not None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self.spill_path.write_bytes(b"")
+        self.episode = 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        actions: np.ndarray,
+        prices: np.ndarray,
+        values: np.ndarray,
+        *,
+        episode: int = 0,
+    ) -> "EpisodeRecorder":
+        """Recorder holding one episode given as per-step arrays."""
+        recorder = cls(capacity=len(actions))
+        recorder.episode = episode
+        recorder.extend(actions, prices, values)
+        return recorder
+
+    def __len__(self) -> int:
+        return self._spilled + self._size
+
+    def _reserve(self, count: int) -> None:
+        if self._size + count <= len(self._buffer):
+            return
+        if self.spill_path is not None:
+            self.flush()
+            if count <= len(self._buffer):
+                return
+        grown = np.empty(max(len(self._buffer) * 2, self._size + count), dtype=STEP_DTYPE)
+        grown[: self._size] = self._buffer[: self._size]
+        self._buffer = grown
+
+    def record(self, step: int, action: int, price: float, value: float) -> None:
+        """Record a single step of the current episode."""
+        self._reserve(1)
+        self._buffer[self._size] = (self.episode, step, action, price, value)
+        self._size += 1
+
+    def extend(
+        self,
+        actions: np.ndarray,
+        prices: np.ndarray,
+        values: np.ndarray,
+        *,
+        steps: Optional[np.ndarray] = None,
+    ) -> None:
+        """Record many steps of the current episode at once (steps default to 0..n-1)."""
+        count = len(actions)
+        self._reserve(count)
+        rows = self._buffer[self._size : self._size + count]
+        rows["episode"] = self.episode
+        rows["step"] = np.arange(count) if steps is None else steps
+        rows["action"] = actions
+        rows["price"] = prices
+        rows["value"] = values
+        self._size += count
+
+    def end_episode(self) -> None:
+        self.episode += 1
+
+    def flush(self) -> None:
+        """Append buffered records to ``spill_path`` (no-op without one)."""
+        if self.spill_path is None or not self._size:
+            return
+        with open(self.spill_path, "ab") as handle:
+            self._buffer[: self._size].tofile(handle)
+        self._spilled += self._size
+        self._size = 0
+
+    @property
+    def records(self) -> np.ndarray:
+        """All records so far; spilled ones are read back from disk."""
+        buffered = self._buffer[: self._size]
+        if not self._spilled:
+            return buffered
+        return np.concatenate((load_steps(self.spill_path), buffered))
+
+    def summary(self, initial_balance: float = 1000) -> dict[str, np.ndarray]:
+        """:func:`summarize` over every recorded episode."""
+        return summarize(self.records, initial_balance)
+
+    def action_steps(self, action: int) -> np.ndarray:
+        """Step numbers at which ``action`` was chosen."""
+        records = self.records
+        return records["step"][records["action"] == action]
+
+    def save(self, path: Path | str) -> None:
+        """Write every record to ``path`` in the spill format."""
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self.records.tofile(tmp)
+        os.replace(tmp, path)
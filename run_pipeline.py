@@ -1,5 +1,10 @@
-from analyst_agent import generate_analyst_summary
-from strategist_agent import generate_strategy
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, Optional
+
+from analyst_agent import SUMMARY_ERROR, generate_analyst_summary, get_news, get_stock_info
+from price_store import get_store
+from rate_limiter import RateLimiter
+from strategist_agent import STRATEGY_ERROR, generate_strategy
 
 def run_agent_pipeline(ticker: str = "TSLA", risk_profile: str = "moderate"):
     """
@@ -15,3 +20,83 @@ def run_agent_pipeline(ticker: str = "TSLA", risk_profile: str = "moderate"):
     print("\n📊 Strategist Recommendation:\n", strategy)
 
     return summary, strategy
+
+
+def run_agent_pipeline_batch(
+    tickers: list[str],
+    risk_profile: str = "moderate",
+    *,
+    fetch_concurrency: int = 8,
+    llm_concurrency: int = 4,
+    llm_requests_per_second: float = 2.0,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[dict]:
+    """
+    Runs the pipeline for many tickers and yields one result per ticker as
+    soon as it completes (in completion order, not input order).
+
+    Prices for every ticker are pulled in one bulk download into the shared
+    price store; company info and news are fetched concurrently by a pool of
+    ``fetch_concurrency`` workers; and each fetched ticker is handed to a
+    separate pool of ``llm_concurrency`` workers for its LLM calls, which are
+    also held to ``llm_requests_per_second``.  Fetches therefore keep going
+    while the LLM pool is busy.  Closing the generator early cancels the
+    work that has not started yet.
+
+    Yields:
+        dict: ``{"ticker", "summary", "strategy"}`` or ``{"ticker", "error"}``.
+    """
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    if not tickers:
+        return
+
+    get_store().prefetch(tickers, period="1mo")
+
+    limiter = limiter or RateLimiter(llm_requests_per_second, burst=llm_concurrency)
+
+    def fetch(ticker: str) -> tuple[dict, list[str]]:
+        stock_info = get_stock_info(ticker)
+        return stock_info, get_news(stock_info["name"])
+
+    def advise(ticker: str, stock_info: dict, news: list[str]) -> dict:
+        limiter.acquire()
+        summary = generate_analyst_summary(
+            ticker=ticker,
+            risk_profile=risk_profile,
+            stock_info=stock_info,
+            news=news,
+        )
+        if summary == SUMMARY_ERROR:
+            return {"ticker": ticker, "error": "summary unavailable"}
+        limiter.acquire()
+        strategy = generate_strategy(summary, risk_profile=risk_profile)
+        if strategy == STRATEGY_ERROR:
+            return {"ticker": ticker, "error": "strategy unavailable"}
+        return {"ticker": ticker, "summary": summary, "strategy": strategy}
+
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_concurrency, thread_name_prefix="batch-fetch")
+    llm_pool = ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix="batch-llm")
+    try:
+        fetches = {fetch_pool.submit(fetch, ticker): ticker for ticker in tickers}
+        advice: dict[Future, str] = {}
+        while fetches or advice:
+            done, _ = wait([*fetches, *advice], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetches:
+                    ticker = fetches.pop(future)
+                    try:
+                        stock_info, news = future.result()
+                    except Exception as exc:  # noqa: BLE001 - one bad ticker must not stop the batch
+                        yield {"ticker": ticker, "error": type(exc).__name__}
+                    else:
+                        advice[llm_pool.submit(advise, ticker, stock_info, news)] = ticker
+                    continue
+                ticker = advice.pop(future)
+                try:
+                    yield future.result()
+                except Exception as exc:  # noqa: BLE001 - one bad ticker must not stop the batch
+                    yield {"ticker": ticker, "error": type(exc).__name__}
+    finally:
+        # A client that disconnects must not wait for the rest of the batch.
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        llm_pool.shutdown(wait=False, cancel_futures=True)
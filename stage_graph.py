@@ -0,0 +1,97 @@
+"""Run a small dependency graph of pipeline stages on a thread pool."""
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """One unit of work.
+
+    ``func`` receives the results of ``deps`` as keyword arguments named after
+    the dependency stages.  ``timeout`` is measured from the moment the stage
+    is submitted, i.e. once all of its dependencies have finished.
+    """
+
+    func: Callable[..., Any]
+    deps: tuple[str, ...] = field(default_factory=tuple)
+    timeout: Optional[float] = None
+
+
+def _run_stage(name: str, func: Callable[..., Any], kwargs: dict[str, Any]) -> Any:
+    with span(f"stage.{name}"):
+        return func(**kwargs)
+
+
+def run_graph(
+    stages: dict[str, Stage],
+    executor: Executor,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """Execute ``stages`` respecting dependencies.
+
+    Independent stages run concurrently, so the wall time is roughly that of
+    the slowest dependency chain.  Returns ``(results, errors)``: a stage that
+    raised, timed out, or depended on a failed stage is absent from
+    ``results`` and described in ``errors`` instead.  Timed-out work is
+    abandoned rather than cancelled, since threads cannot be interrupted.
+    """
+    for name, stage in stages.items():
+        missing = [dep for dep in stage.deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on unknown stages {missing}")
+
+    results: dict[str, Any] = {}
+    errors: dict[str, str] = {}
+    running: dict[Future, tuple[str, Optional[float]]] = {}
+    pending = dict(stages)
+
+    def submit_ready() -> None:
+        for name, stage in list(pending.items()):
+            failed = [dep for dep in stage.deps if dep in errors]
+            if failed:
+                errors[name] = f"skipped: {', '.join(failed)} failed"
+                del pending[name]
+            elif all(dep in results for dep in stage.deps):
+                kwargs = {dep: results[dep] for dep in stage.deps}
+                deadline = time.monotonic() + stage.timeout if stage.timeout else None
+                # Run in a copy of the caller's context so per-request tracing follows the stage.
+                context = contextvars.copy_context()
+                future = executor.submit(context.run, _run_stage, name, stage.func, kwargs)
+                running[future] = (name, deadline)
+                del pending[name]
+
+    submit_ready()
+    while running:
+        deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+        timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name, _ = running.pop(future)
+            try:
+                results[name] = future.result()
+            except Exception as exc:  # noqa: BLE001 - report per-stage failures
+                LOGGER.warning("Stage %s failed: %s", name, exc)
+                errors[name] = f"error: {type(exc).__name__}"
+
+        now = time.monotonic()
+        for future, (name, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline:
+                LOGGER.warning("Stage %s timed out", name)
+                errors[name] = "timeout"
+                del running[future]
+
+        submit_ready()
+
+    for name in pending:
+        errors.setdefault(name, "skipped")
+    return results, errors
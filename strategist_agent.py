@@ -1,26 +1,34 @@
-import os
-from openai import OpenAI
+import logging
 
-# === Load API Key and Initialize Client ===
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPENAI_API_KEY is missing from your environment.")
+from llm_cache import cached_completion, cached_stream
+from openai_client import get_client
+from prompt_builder import report_section
+from tracing import span
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+LOGGER = logging.getLogger(__name__)
 
-def generate_strategy(advice_text: str, risk_profile: str = "moderate") -> str:
-    """
-    Generates a portfolio recommendation (Buy, Hold, or Sell) based on 
-    an analyst report and the investor's risk profile.
-    
-    Args:
-        advice_text (str): Analyst summary text.
-        risk_profile (str): Risk tolerance ("conservative", "moderate", "aggressive").
+# The OpenAI client is created on first use (see openai_client.get_client).
+MODEL_NAME = "gpt-3.5-turbo"  # or "gpt-4o"
+# Returned by generate_strategy when the completion fails.
+STRATEGY_ERROR = "⚠️ Error: Unable to generate a strategy recommendation at this time."
 
-    Returns:
-        str: AI-generated recommendation with rationale and adjustment advice.
+
+def _complete(prompt: str) -> str:
+    with span("openai.strategist"):
+        response = get_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}]
+        )
+    return response.choices[0].message.content.strip()
+
+
+def build_strategy_prompt(advice_text: str, risk_profile: str = "moderate") -> str:
     """
-    prompt = f"""
+    Renders the strategist prompt for an analyst report and risk profile.
+    The report is compacted and capped (see ``prompt_builder.report_section``).
+    """
+    advice_text = report_section(advice_text)
+    return f"""
 You are a portfolio strategist AI.
 
 Based on the following analyst report and the user's risk profile, provide:
@@ -34,12 +42,49 @@ Analyst Report:
 Investor Risk Profile: {risk_profile}
 """
 
+
+def generate_strategy(advice_text: str, risk_profile: str = "moderate") -> str:
+    """
+    Generates a portfolio recommendation (Buy, Hold, or Sell) based on 
+    an analyst report and the investor's risk profile.
+    
+    Args:
+        advice_text (str): Analyst summary text.
+        risk_profile (str): Risk tolerance ("conservative", "moderate", "aggressive").
+
+    Returns:
+        str: AI-generated recommendation with rationale and adjustment advice.
+    """
+    prompt = build_strategy_prompt(advice_text, risk_profile)
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # or "gpt-4o"
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
+        return cached_completion(MODEL_NAME, prompt, lambda: _complete(prompt))
     except Exception as e:
         print("❌ Error from Strategist Agent:", e)
-        return "⚠️ Error: Unable to generate a strategy recommendation at this time."
+        return STRATEGY_ERROR
+
+
+def stream_strategy(advice_text: str, risk_profile: str = "moderate"):
+    """
+    Same as ``generate_strategy`` but yields the recommendation in pieces as
+    the chat completion streams in.  Errors propagate instead of being
+    turned into an error message, possibly after some pieces were yielded.
+    """
+    prompt = build_strategy_prompt(advice_text, risk_profile)
+
+    def produce():
+        with span("openai.strategist"):
+            stream = get_client().chat.completions.create(
+                model=MODEL_NAME,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    try:
+        yield from cached_stream(MODEL_NAME, prompt, produce)
+    except Exception as exc:
+        LOGGER.warning("Streaming the strategy recommendation failed: %s", exc)
+        raise
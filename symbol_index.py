@@ -0,0 +1,201 @@
+"""In-process prefix/fuzzy index of ticker symbols for autocomplete.
+
+The index is loaded from a CSV symbol list (``symbol,name``) plus a local
+file of symbols learned from remote Yahoo searches, and is kept as sorted
+key arrays so a prefix lookup is a ``bisect`` plus a short scan.  A daemon
+thread reloads the symbol list when it changes and persists newly learned
+symbols.
+"""
+from __future__ import annotations
+
+import bisect
+import csv
+import difflib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent
+DEFAULT_SYMBOLS_FILE = Path(os.environ.get("FINGEN_SYMBOLS_FILE", _ROOT / "data" / "symbols.csv"))
+DEFAULT_LEARNED_FILE = Path(os.environ.get("FINGEN_SYMBOL_CACHE", _ROOT / ".symbol_cache.csv"))
+DEFAULT_REFRESH_SECONDS = float(os.environ.get("FINGEN_SYMBOL_REFRESH", 300))
+
+
+def _read_symbols(path: Path) -> dict[str, str]:
+    try:
+        with open(path, newline="", encoding="utf-8") as handle:
+            return {
+                row["symbol"].strip().upper(): (row.get("name") or "").strip()
+                for row in csv.DictReader(handle)
+                if row.get("symbol")
+            }
+    except OSError:
+        return {}
+
+
+class SymbolIndex:
+    """Sorted-array symbol index supporting prefix and fuzzy lookups."""
+
+    def __init__(
+        self,
+        symbols_file: Path = DEFAULT_SYMBOLS_FILE,
+        learned_file: Path = DEFAULT_LEARNED_FILE,
+        *,
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+    ) -> None:
+        self.symbols_file = Path(symbols_file)
+        self.learned_file = Path(learned_file)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._names: dict[str, str] = {}
+        self._learned: dict[str, str] = {}
+        self._keys: list[str] = []
+        self._key_symbols: list[str] = []
+        self._symbols_mtime: Optional[float] = None
+        self._dirty = False
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # ---------------------------------------------------------------- loading
+    def _rebuild(self) -> None:
+        """Rebuild the sorted ``(key, symbol)`` arrays from ``self._names``."""
+        pairs = []
+        for symbol, name in self._names.items():
+            # Every word is a key of its own so fuzzy matching can find
+            # "microsft" in "Microsoft Corporation"; prefixes match either way.
+            keys = {symbol.lower(), name.lower(), *name.lower().split()}
+            pairs.extend((key, symbol) for key in keys if key)
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._key_symbols = [symbol for _, symbol in pairs]
+
+    def reload(self) -> None:
+        """Re-read the symbol list and learned symbols from disk."""
+        try:
+            mtime: Optional[float] = self.symbols_file.stat().st_mtime
+        except OSError:
+            mtime = None
+        names = _read_symbols(self.symbols_file)
+        learned = _read_symbols(self.learned_file)
+        with self._lock:
+            self._learned.update(learned)
+            self._names = {**self._learned, **names}
+            self._symbols_mtime = mtime
+            self._rebuild()
+
+    def add(self, items: Iterable[dict]) -> None:
+        """Learn symbols from Yahoo search results (``symbol``/``shortname``)."""
+        with self._lock:
+            added = False
+            for item in items:
+                symbol = str(item.get("symbol", "")).upper()
+                name = item.get("shortname") or item.get("longname") or ""
+                if symbol and symbol not in self._names:
+                    self._names[symbol] = self._learned[symbol] = name
+                    added = True
+            if added:
+                self._dirty = True
+                self._rebuild()
+
+    def flush(self) -> None:
+        """Persist learned symbols if any were added since the last flush."""
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = sorted(self._learned.items())
+            self._dirty = False
+        tmp = self.learned_file.with_name(self.learned_file.name + ".tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["symbol", "name"])
+            writer.writerows(rows)
+        os.replace(tmp, self.learned_file)
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                mtime = self.symbols_file.stat().st_mtime
+            except OSError:
+                mtime = None
+            try:
+                if mtime != self._symbols_mtime:
+                    self.reload()
+                self.flush()
+            except Exception as exc:  # noqa: BLE001 - keep the refresher alive
+                LOGGER.warning("Symbol index refresh failed: %s", exc)
+
+    def start_background_refresh(self) -> None:
+        """Start the daemon thread that reloads and persists the index."""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="symbol-index-refresh", daemon=True
+            )
+            self._refresher.start()
+
+    def close(self) -> None:
+        """Stop the refresher and persist any symbols learned since the last flush."""
+        self._stop.set()
+        with self._lock:
+            refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            refresher.join()
+        self.flush()
+
+    # ----------------------------------------------------------------- lookup
+    def search(self, query: str, *, limit: int = 10) -> list[dict]:
+        """Return up to ``limit`` ``{"symbol", "shortname"}`` matches.
+
+        Exact symbol matches rank first, then symbol prefixes, then matches on
+        the company name or any word of it.  Without prefix matches a fuzzy
+        match on symbols and names is attempted.
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        with self._lock:
+            keys, key_symbols, names = self._keys, self._key_symbols, self._names
+
+        ranked: dict[str, int] = {}
+        start = bisect.bisect_left(keys, needle)
+        for pos in range(start, len(keys)):
+            if not keys[pos].startswith(needle):
+                break
+            symbol = key_symbols[pos]
+            if symbol.lower() == needle:
+                rank = 0
+            elif keys[pos] == symbol.lower():
+                rank = 1
+            else:
+                rank = 2
+            ranked[symbol] = min(rank, ranked.get(symbol, rank))
+
+        if not ranked and len(needle) >= 3:
+            for key in difflib.get_close_matches(needle, keys, n=limit, cutoff=0.75):
+                ranked.setdefault(key_symbols[bisect.bisect_left(keys, key)], 3)
+
+        ordered = sorted(ranked, key=lambda symbol: (ranked[symbol], len(symbol), symbol))
+        return [{"symbol": symbol, "shortname": names.get(symbol) or symbol} for symbol in ordered[:limit]]
+
+
+_DEFAULT_INDEX: Optional[SymbolIndex] = None
+_DEFAULT_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> SymbolIndex:
+    """Return the process-wide index, starting its background refresher."""
+    global _DEFAULT_INDEX
+    with _DEFAULT_INDEX_LOCK:
+        if _DEFAULT_INDEX is None:
+            _DEFAULT_INDEX = SymbolIndex()
+            _DEFAULT_INDEX.start_background_refresh()
+        return _DEFAULT_INDEX
@@ -1,91 +1,229 @@
 import logging
 import os
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
 
 _MPL_CACHE = Path(__file__).resolve().parent / ".matplotlib_cache"
 _MPL_CACHE.mkdir(exist_ok=True)
 os.environ.setdefault("MPLCONFIGDIR", str(_MPL_CACHE))
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 
+from backtest import apply_step
 from data_utils import get_price_series
-from train_trader import train_trader_model
-from trading_env import TradingEnv  # make sure this file exists in your project
+from model_registry import registry
+from recorder import EpisodeRecorder
+from tracing import traced
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
+    from matplotlib.figure import Figure
     from stable_baselines3 import PPO
 
+    from price_feed import PriceFeed
+
 MODEL_PATH = Path("trader_model.zip")
 
 
+class ModelNotReady(RuntimeError):
+    """The trader model has not been trained yet."""
+
+
+def _ensure_model(*, train: bool = False) -> None:
+    """Make sure ``MODEL_PATH`` exists.
+
+    Training takes minutes, so it only happens here when ``train`` is set
+    (command-line use); web code submits a ``train`` job instead and gets
+    :class:`ModelNotReady` until it finishes.
+    """
+    if MODEL_PATH.exists():
+        return
+    if not train:
+        raise ModelNotReady(f"{MODEL_PATH} has not been trained yet")
+    from train_trader import train_trader_model
+
+    logging.info("Trader model missing. Triggering fresh training run...")
+    train_trader_model(model_path=str(MODEL_PATH), total_timesteps=10_000)
+
+
 def _load_or_train_model() -> "PPO":
-    from stable_baselines3 import PPO
+    _ensure_model(train=True)
+    return registry.get(MODEL_PATH)
 
-    if not MODEL_PATH.exists():
-        logging.info("Trader model missing. Triggering fresh training run...")
-        train_trader_model(model_path=str(MODEL_PATH), total_timesteps=10_000)
-    return PPO.load(str(MODEL_PATH))
 
+def _step_batch(padded, lengths, policy, balance, holding, actions, values, bought=None, sold=None) -> None:
+    """Step every row of ``padded`` through the policy, updating the arrays in place."""
+    obs = np.empty((len(padded), 3), dtype=np.float32)
+    for step in range(actions.shape[1]):
+        live = np.flatnonzero(lengths - 1 > step)
+        obs[: len(live), 0] = padded[live, step]
+        obs[: len(live), 1] = balance[live]
+        obs[: len(live), 2] = holding[live]
+        chosen = np.asarray(policy(obs[: len(live)])).reshape(-1)
+        actions[live, step] = chosen
+        apply_step(padded, step, live, chosen, balance, holding, values, bought, sold)
 
-def run_trader_simulation(ticker="TSLA", *, close_figure: bool = True):
-    # === Get 3 months of historical closing prices (fallback to synthetic offline)
-    prices = get_price_series(
-        ticker,
-        period="3mo",
-        min_length=45,
-        fallback_length=90,
-    )
-    prices = np.nan_to_num(prices)
 
-    # === Initialize environment and load model
-    env = TradingEnv(prices)
-    model = _load_or_train_model()
-    obs = env.reset()
+@traced("trader.simulate")
+def simulate_batch(
+    price_series: Sequence[np.ndarray],
+    *,
+    policy: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    initial_balance: float = 1000,
+) -> list[dict[str, np.ndarray]]:
+    """Run the trader over many price series (tickers or backtest windows) at once.
+
+    Every step stacks the ``[price, balance, holding]`` observation of each
+    live series into one batch and evaluates the policy in a single forward
+    pass; the ``TradingEnv`` accounting is then applied to all series as array
+    operations.  Returns, per series, the chosen ``actions``, the
+    ``portfolio_values`` after each step and ``bought``/``sold`` flags for the
+    steps where a trade was actually executed.
+    """
+    if policy is None:
+        _ensure_model()
+        policy = registry.get_policy(MODEL_PATH)
+
+    series = [np.nan_to_num(np.asarray(prices, dtype=np.float32)) for prices in price_series]
+    lengths = np.array([len(prices) for prices in series], dtype=np.int64)
+    n_steps = int(lengths.max(initial=1)) - 1
+    padded = np.zeros((len(series), n_steps + 1), dtype=np.float32)
+    for row, prices in enumerate(series):
+        padded[row, : len(prices)] = prices
+
+    # Match TradingEnv, whose balance/holding take the price dtype on update.
+    dtype = np.result_type(padded.dtype, initial_balance)
+    balance = np.full(len(series), initial_balance, dtype=dtype)
+    holding = np.zeros(len(series), dtype=dtype)
+    actions = np.zeros((len(series), max(n_steps, 0)), dtype=np.int64)
+    values = np.zeros((len(series), max(n_steps, 0)), dtype=dtype)
+    bought = np.zeros((len(series), max(n_steps, 0)), dtype=bool)
+    sold = np.zeros((len(series), max(n_steps, 0)), dtype=bool)
+    _step_batch(padded, lengths, policy, balance, holding, actions, values, bought, sold)
+
+    return [
+        {
+            "actions": actions[row, : length - 1],
+            "portfolio_values": values[row, : length - 1],
+            "bought": bought[row, : length - 1],
+            "sold": sold[row, : length - 1],
+        }
+        for row, length in enumerate(lengths)
+    ]
+
 
-    # === Run simulation loop
-    portfolio_values = []
-    buy_steps = []
-    sell_steps = []
-    trade_log = []
-    initial_balance = env.initial_balance
+@traced("trader.simulate_feed")
+def simulate_feed(
+    feed: "PriceFeed",
+    *,
+    policy: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    initial_balance: float = 1000,
+    chunk_size: int = 65_536,
+    recorder: Optional[EpisodeRecorder] = None,
+) -> EpisodeRecorder:
+    """Run the trader over a :class:`~price_feed.PriceFeed` one chunk at a time.
 
-    for step in range(len(prices) - 1):
-        action, _ = model.predict(obs.reshape(1, -1), deterministic=True)
-        obs, reward, done, _ = env.step(action)
+    Balance and holding carry over between chunks, so the steps recorded are
+    those :func:`simulate_batch` would produce for the whole series, while
+    only one chunk of prices is in memory.  Pass a ``recorder`` with a
+    ``spill_path`` to keep the recorded steps on disk as well.
+    """
+    if policy is None:
+        _ensure_model()
+        policy = registry.get_policy(MODEL_PATH)
+    recorder = recorder if recorder is not None else EpisodeRecorder()
 
-        if action == 1:
-            buy_steps.append(step)
-            trade_log.append(("Buy", prices[env.current_step]))
-        elif action == 2:
-            sell_steps.append(step)
-            trade_log.append(("Sell", prices[env.current_step]))
+    dtype = np.result_type(np.float32, initial_balance)
+    balance = np.full(1, initial_balance, dtype=dtype)
+    holding = np.zeros(1, dtype=dtype)
+    offset = 0
+    for chunk in feed.chunks(chunk_size, overlap=1):
+        steps = len(chunk) - 1
+        actions = np.zeros((1, steps), dtype=np.int64)
+        values = np.zeros((1, steps), dtype=dtype)
+        _step_batch(chunk[None, :], np.array([len(chunk)]), policy, balance, holding, actions, values)
+        recorder.extend(actions[0], chunk[:-1], values[0], steps=np.arange(offset, offset + steps))
+        offset += steps
+    return recorder
 
-        total_value = env.balance + env.holding * prices[env.current_step]
-        portfolio_values.append(total_value)
 
-        if done:
-            break
+def model_version() -> Optional[float]:
+    """Return the trader model file's mtime (changes whenever it is retrained)."""
+    try:
+        return MODEL_PATH.stat().st_mtime
+    except OSError:
+        return None
+
+
+def trader_series(ticker="TSLA", *, interval: str = "1d") -> dict:
+    """Simulate the trader on ``ticker`` and return the chart data and stats.
+
+    The result is JSON-serialisable: ``title``, ``portfolio_values``,
+    ``buy_steps``, ``sell_steps`` and the ``stats`` shown on the dashboard.
+    Daily runs cover 3 months of closes; other intervals (``"5m"``, ``"1h"``...)
+    stream the longest history Yahoo serves for them through a
+    :class:`~price_feed.PriceFeed`.
+    """
+    from trading_env import DEFAULT_BALANCE
+
+    initial_balance = DEFAULT_BALANCE
+
+    if interval == "1d":
+        # === Get 3 months of historical closing prices (fallback to synthetic offline)
+        prices = get_price_series(
+            ticker,
+            period="3mo",
+            min_length=45,
+            fallback_length=90,
+        )
+
+        # === Run the warm, batched policy over the series
+        result = simulate_batch([prices], initial_balance=initial_balance)[0]
+        recorder = EpisodeRecorder.from_arrays(
+            result["actions"], prices[: len(result["actions"])], result["portfolio_values"]
+        )
+    else:
+        from price_feed import open_feed
+
+        feed = open_feed(ticker, interval=interval)
+        recorder = simulate_feed(feed, initial_balance=initial_balance)
+    portfolio_values = recorder.records["value"]
+    buy_steps = recorder.action_steps(1).tolist()
+    sell_steps = recorder.action_steps(2).tolist()
 
     # === Calculate performance
-    final_value = portfolio_values[-1] if portfolio_values else initial_balance
+    summary = recorder.summary(initial_balance)
+    final_value = summary["final_value"][0] if len(recorder) else initial_balance
     return_pct = ((final_value - initial_balance) / initial_balance) * 100
 
     stats = {
         "Initial Balance": f"${initial_balance:.2f}",
         "Final Value": f"${final_value:.2f}",
         "Return (%)": f"{return_pct:.2f}%",
-        "Total Trades": len(trade_log),
-        "Buys": len([t for t in trade_log if t[0] == "Buy"]),
-        "Sells": len([t for t in trade_log if t[0] == "Sell"]),
+        "Total Trades": int(summary["trades"].sum()),
+        "Buys": int(summary["buys"].sum()),
+        "Sells": int(summary["sells"].sum()),
     }
 
-    # === Plot portfolio value and trade points
-    fig, ax = plt.subplots(figsize=(10, 4))
+    return {
+        "title": f"{ticker} Trader Agent Simulation"
+        + ("" if interval == "1d" else f" ({interval} bars)"),
+        "portfolio_values": np.round(portfolio_values.astype(np.float64), 2).tolist(),
+        "buy_steps": buy_steps,
+        "sell_steps": sell_steps,
+        "stats": stats,
+    }
+
+
+def trader_figure(series: dict) -> "Figure":
+    """Plot portfolio value and trade points from a :func:`trader_series` result."""
+    from matplotlib.figure import Figure
+
+    portfolio_values = series["portfolio_values"]
+    buy_steps = series["buy_steps"]
+    sell_steps = series["sell_steps"]
+
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
     ax.plot(portfolio_values, label="Portfolio Value", linewidth=2)
     ax.scatter(
         buy_steps,
@@ -101,13 +239,21 @@ def run_trader_simulation(ticker="TSLA", *, close_figure: bool = True):
         marker="v",
         label="Sell",
     )
-    ax.set_title(f"{ticker} Trader Agent Simulation")
+    ax.set_title(series["title"])
     ax.set_xlabel("Steps")
     ax.set_ylabel("Portfolio Value ($)")
     ax.legend()
     ax.grid(True)
-    plt.tight_layout()
-    if close_figure:
-        plt.close(fig)
+    fig.tight_layout()
+    return fig
+
+
+def run_trader_simulation(ticker="TSLA", *, interval: str = "1d", close_figure: bool = True):
+    """Simulate the trader on ``ticker`` and return ``(figure, stats)``.
 
-    return fig, stats
+    The figure is a standalone :class:`~matplotlib.figure.Figure` that is
+    never registered with pyplot, so ``close_figure`` no longer has anything
+    to release; it is kept for backwards compatibility.
+    """
+    series = trader_series(ticker, interval=interval)
+    return trader_figure(series), series["stats"]
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# Some modules resolve paths (e.g. the trader model) relative to the repo root.
+os.chdir(ROOT)
+os.environ.setdefault("MPLCONFIGDIR", str(ROOT / ".matplotlib_cache"))
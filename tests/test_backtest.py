@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from backtest import _numba_kernel, backtest, backtest_batch, backtest_weights
+from trading_env import TradingEnv
+from weight_trading_env import WeightTradingEnv
+
+INITIAL_BALANCE = 1000
+
+
+def _random_series(rng, n_series=60):
+    return [
+        (rng.uniform(20, 400) * np.exp(np.cumsum(rng.normal(0, 0.03, rng.integers(2, 300))))).astype(
+            np.float32
+        )
+        for _ in range(n_series)
+    ]
+
+
+def _env_reference(prices, actions):
+    """Run ``actions`` through ``TradingEnv``; returns its value curve and trades."""
+    env = TradingEnv(prices, initial_balance=INITIAL_BALANCE)
+    env.reset()
+    values, bought, sold = [], [], []
+    for action in actions[: len(prices) - 1]:
+        holding = env.holding
+        env.step(int(action))
+        bought.append(env.holding > holding)
+        sold.append(env.holding < holding)
+        values.append(env.balance + env.holding * env.prices[env.current_step])
+    return values, bought, sold
+
+
+@pytest.mark.parametrize(
+    "use_numba",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(_numba_kernel() is None, reason="numba is not installed"),
+        ),
+    ],
+)
+def test_backtest_batch_matches_trading_env(use_numba):
+    rng = np.random.default_rng(0)
+    prices = _random_series(rng)
+    actions = [rng.integers(0, 3, len(p)) for p in prices]
+
+    result = backtest_batch(prices, actions, use_numba=use_numba)
+    for row, (row_prices, row_actions) in enumerate(zip(prices, actions)):
+        values, bought, sold = _env_reference(row_prices, row_actions)
+        length = result.lengths[row]
+        np.testing.assert_array_equal(result.curve(row), np.array(values, dtype=result.values.dtype))
+        np.testing.assert_array_equal(result.bought[row, :length], bought)
+        np.testing.assert_array_equal(result.sold[row, :length], sold)
+
+
+def test_backtest_weights_matches_weight_env():
+    rng = np.random.default_rng(1)
+    prices = _random_series(rng)
+    weights = [rng.uniform(0, 1, len(p)).astype(np.float32) for p in prices]
+
+    result = backtest_weights(prices, weights)
+    for row, (row_prices, row_weights) in enumerate(zip(prices, weights)):
+        env = WeightTradingEnv(row_prices, initial_balance=INITIAL_BALANCE, levels=None)
+        env.reset()
+        expected = []
+        for weight in row_weights[: len(row_prices) - 1]:
+            env.step(np.array([weight], dtype=np.float32))
+            expected.append(env.total_asset)
+        np.testing.assert_array_equal(result.curve(row), np.array(expected))
+
+
+def test_stats_of_flat_hold():
+    prices = np.array([10.0, 12.0, 9.0, 15.0], dtype=np.float32)
+    stats = backtest(prices, [1, 0, 0]).stats()
+    assert stats["final_value"][0] == pytest.approx(1005.0)
+    assert stats["trades"][0] == 1
+    assert stats["max_drawdown_pct"][0] == pytest.approx((1 - 999 / 1002) * 100)
+
+
+def test_simulate_batch_and_feed_agree_with_backtest():
+    from price_feed import PriceFeed
+    from test_trader import simulate_batch, simulate_feed
+
+    rng = np.random.default_rng(3)
+    prices = _random_series(rng, n_series=8)
+
+    def policy(obs):
+        # Deterministic but state dependent: buy cheap, sell when holding.
+        return np.where(obs[:, 2] > 2, 2, np.where(obs[:, 0] < 200, 1, 0))
+
+    simulated = simulate_batch(prices, policy=policy, initial_balance=INITIAL_BALANCE)
+    result = backtest_batch(prices, [run["actions"] for run in simulated], use_numba=False)
+    for row, run in enumerate(simulated):
+        np.testing.assert_array_equal(run["portfolio_values"], result.curve(row))
+
+    records = np.zeros(len(prices[0]), dtype=[("index", "<i8"), ("Close", "<f8")])
+    records["Close"] = prices[0]
+    recorder = simulate_feed(PriceFeed(records), policy=policy, initial_balance=INITIAL_BALANCE, chunk_size=17)
+    np.testing.assert_array_equal(recorder.records["action"], simulated[0]["actions"])
+    np.testing.assert_allclose(recorder.records["value"], simulated[0]["portfolio_values"], rtol=1e-6)
@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import evaluate
+from backtest import backtest_batch
+from model_registry import registry
+
+WINDOW = 20
+STRIDE = 10
+
+
+def policy(obs):
+    """Buy below 105, sell above 110, hold otherwise."""
+    return np.where(obs[:, 0] < 105, 1, np.where(obs[:, 0] > 110, 2, 0))
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    rng = np.random.default_rng(7)
+    prices = {
+        ticker: (100 + np.cumsum(rng.normal(0, 2, length))).astype(np.float32)
+        for ticker, length in (("AAA", 60), ("BBB", 45), ("TINY", 10))
+    }
+    model = tmp_path / "trader.zip"
+    model.write_bytes(b"stub")
+    shards = []
+
+    def run_shard(shard, path):
+        shards.append(shard.key)
+        return real_run_shard(shard, path)
+
+    real_run_shard = evaluate._run_shard
+    # Threads share the monkeypatched policy and prices; the shard code is the
+    # same.  Use one worker, since each _init_worker call swaps module globals.
+    monkeypatch.setattr(evaluate, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(evaluate, "_run_shard", run_shard)
+    monkeypatch.setattr(evaluate, "_load_prices", lambda tickers, period: {t: prices[t] for t in tickers})
+    monkeypatch.setattr(registry, "get_policy", lambda path: policy)
+    monkeypatch.setattr(evaluate, "_shared", None)
+    monkeypatch.setattr(evaluate, "_prices", None)
+
+    def run(**kwargs):
+        return evaluate.evaluate(
+            list(prices), models=[model], window=WINDOW, stride=STRIDE, workers=1, out_dir=tmp_path / "out", **kwargs
+        )
+
+    return run, prices, model, shards
+
+
+def test_aggregate_rows_match_backtest(runner, tmp_path):
+    run, prices, _, shards = runner
+    table = run(report=tmp_path / "report.csv")
+
+    assert len(shards) == 3
+    assert (tmp_path / "report.csv").exists()
+    assert table.groupby("ticker").size().to_dict() == {"AAA": 5, "BBB": 3}
+    assert table["window_end"].sub(table["window_start"]).eq(WINDOW).all()
+
+    windows = [prices["AAA"][start : start + WINDOW] for start in range(0, 41, STRIDE)]
+    actions = [policy(np.column_stack([w, np.zeros_like(w), np.zeros_like(w)]))[:-1] for w in windows]
+    # Actions only depend on price here, so a plain backtest reproduces them.
+    stats = backtest_batch(windows, actions).stats()
+    rows = table[table["ticker"] == "AAA"].sort_values("window_start")
+    np.testing.assert_allclose(rows["final_value"], np.round(stats["final_value"], 4))
+    np.testing.assert_array_equal(rows["trades"], stats["trades"])
+
+
+def test_unchanged_shards_are_skipped(runner):
+    run, prices, model, shards = runner
+    first = run()
+    assert len(shards) == 3
+    second = run()
+    assert len(shards) == 3  # Nothing recomputed.
+    assert second.sort_values(["ticker", "window_start"]).reset_index(drop=True).equals(
+        first.sort_values(["ticker", "window_start"]).reset_index(drop=True)
+    )
+
+    prices["BBB"][-1] += 1  # A refreshed history only reruns that ticker.
+    run()
+    assert len(shards) == 4
+    assert shards[-1].startswith("trader-BBB-")
+
+
+def test_shard_key_tracks_model_and_prices(tmp_path):
+    model = tmp_path / "trader.zip"
+    model.write_bytes(b"v1")
+    prices = np.arange(30, dtype=np.float32)
+    key = evaluate._shard_key(model, "AAA", "2y", WINDOW, STRIDE, prices)
+
+    assert key.startswith("trader-AAA-")
+    assert key == evaluate._shard_key(model, "AAA", "2y", WINDOW, STRIDE, prices.copy())
+    assert key != evaluate._shard_key(model, "AAA", "2y", WINDOW, STRIDE + 1, prices)
+    assert key != evaluate._shard_key(model, "AAA", "2y", WINDOW, STRIDE, prices + 1)
+    stat = model.stat()
+    os.utime(model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert key != evaluate._shard_key(model, "AAA", "2y", WINDOW, STRIDE, prices)
@@ -0,0 +1,140 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_client import CircuitOpenError, HttpClient
+
+
+class StubServer:
+    """Local HTTP server whose handlers count hits and track concurrency."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.hits: dict[str, int] = {}
+        self.active = 0
+        self.peak = 0
+        self.status = {"/down": 500, "/limited": 429}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def reply(self, code, body=b"", headers=()) -> None:
+                self.send_response(code)
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                path = self.path.split("?")[0]
+                with stub.lock:
+                    hits = stub.hits[path] = stub.hits.get(path, 0) + 1
+                if path == "/slow":
+                    with stub.lock:
+                        stub.active += 1
+                        stub.peak = max(stub.peak, stub.active)
+                    time.sleep(0.05)
+                    with stub.lock:
+                        stub.active -= 1
+                    return self.reply(200, b"ok")
+                if path == "/flaky":
+                    if hits < 3:
+                        return self.reply(503, b"busy", [("Retry-After", "0.2")])
+                    return self.reply(200, b"ok")
+                self.reply(stub.status.get(path, 200), b"ok")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"127.0.0.1:{self.server.server_address[1]}"
+        self.url = f"http://{self.host}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def test_retries_honour_retry_after(stub):
+    client = HttpClient(retries=2, backoff=0.01)
+    started = time.perf_counter()
+    response = client.get(stub.url + "/flaky")
+    assert response.status_code == 200
+    assert stub.hits["/flaky"] == 3
+    assert time.perf_counter() - started >= 0.4
+
+
+def test_retries_give_up_with_last_response(stub):
+    client = HttpClient(retries=1, backoff=0.01, breaker_threshold=10)
+    assert client.get(stub.url + "/down").status_code == 500
+    assert stub.hits["/down"] == 2
+
+
+def test_per_host_limit(stub):
+    client = HttpClient(per_host=3)
+    threads = [threading.Thread(target=client.get, args=(stub.url + "/slow",)) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stub.hits["/slow"] == 12
+    assert stub.peak == 3
+
+
+def test_breaker_opens_and_recovers_half_open(stub):
+    client = HttpClient(retries=0, breaker_threshold=3, breaker_cooldown=0.2)
+    for _ in range(3):
+        assert client.get(stub.url + "/down").status_code == 500
+    assert client.circuit_open(stub.host)
+
+    with pytest.raises(CircuitOpenError):
+        client.get(stub.url + "/ok")
+    assert "/ok" not in stub.hits
+
+    time.sleep(0.25)
+    # Half-open: one failing trial re-opens the circuit straight away.
+    assert client.get(stub.url + "/down").status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get(stub.url + "/ok")
+
+    time.sleep(0.25)
+    assert client.get(stub.url + "/ok").status_code == 200
+    assert not client.circuit_open(stub.host)
+
+
+def test_rate_limits_do_not_open_the_breaker(stub):
+    client = HttpClient(retries=0, breaker_threshold=2)
+    for _ in range(5):
+        assert client.get(stub.url + "/limited").status_code == 429
+    assert not client.circuit_open(stub.host)
+    for _ in range(2):
+        assert client.get(stub.url + "/down").status_code == 500
+    assert client.circuit_open(stub.host)
+
+
+def test_guard_counts_only_transport_errors():
+    client = HttpClient(breaker_threshold=2)
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            with client.guard("yfinance"):
+                raise KeyError("BAD")
+    assert not client.circuit_open("yfinance")
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            with client.guard("yfinance"):
+                raise requests.ConnectionError("down")
+    assert client.circuit_open("yfinance")
+
@@ -0,0 +1,140 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from jobs import FAILED, QUEUED, SUCCEEDED, JobQueue
+
+
+def record(path: str, name: str, hold: float = 0.0) -> str:
+    """Job target: log start and end times of ``name`` to ``path``."""
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(f"start {name} {time.time()}\n")
+    time.sleep(hold)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(f"end {name} {time.time()}\n")
+    return name
+
+
+def _events(path):
+    events = []
+    for line in path.read_text().splitlines():
+        event, name, stamp = line.split()
+        events.append((event, name, float(stamp)))
+    return events
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(*, max_workers=1, **kinds):
+        queue = JobQueue(tmp_path / "jobs.sqlite3", max_workers=max_workers)
+        for kind, concurrency in (kinds or {"work": 1}).items():
+            queue.register(kind, "test_jobs:record", concurrency=concurrency)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_higher_priority_runs_first(make_queue, tmp_path):
+    queue = make_queue()
+    log = str(tmp_path / "log")
+    blocker = queue.submit("work", {"path": log, "name": "blocker", "hold": 1.0}, priority=100)
+    jobs = [
+        queue.submit("work", {"path": log, "name": name}, priority=priority)
+        for name, priority in (("low", 0), ("high", 5), ("low2", 0), ("mid", 2))
+    ]
+    for job in [blocker, *jobs]:
+        assert queue.wait(job.id, timeout=60).status == SUCCEEDED
+    started = [name for event, name, _ in _events(tmp_path / "log") if event == "start"]
+    assert started == ["blocker", "high", "mid", "low", "low2"]
+
+
+def test_per_kind_concurrency(make_queue, tmp_path):
+    queue = make_queue(max_workers=3, solo=1, pair=2)
+    log = str(tmp_path / "log")
+    jobs = [queue.submit("solo", {"path": log, "name": f"solo{i}", "hold": 0.3}) for i in range(3)]
+    jobs += [queue.submit("pair", {"path": log, "name": f"pair{i}", "hold": 0.3}) for i in range(4)]
+    for job in jobs:
+        assert queue.wait(job.id, timeout=60).status == SUCCEEDED
+
+    peak = {"solo": 0, "pair": 0}
+    active = {"solo": 0, "pair": 0}
+    for event, name, _ in sorted(_events(tmp_path / "log"), key=lambda item: (item[2], item[0] == "start")):
+        kind = name[:4]
+        active[kind] += 1 if event == "start" else -1
+        peak[kind] = max(peak[kind], active[kind])
+    assert peak == {"solo": 1, "pair": 2}
+
+
+def test_unique_on_dedupes_unfinished_jobs(make_queue, tmp_path):
+    queue = make_queue()
+    log = str(tmp_path / "log")
+    first = queue.submit("work", {"path": log, "name": "a", "hold": 0.5}, unique=True, unique_on=("path",))
+    same = queue.submit("work", {"path": log, "name": "b"}, unique=True, unique_on=("path",))
+    other = queue.submit(
+        "work", {"path": str(tmp_path / "other"), "name": "c"}, unique=True, unique_on=("path",)
+    )
+    assert same.id == first.id
+    assert other.id != first.id
+
+    assert queue.wait(first.id, timeout=60).status == SUCCEEDED
+    again = queue.submit("work", {"path": log, "name": "d"}, unique=True, unique_on=("path",))
+    assert again.id != first.id
+
+
+def test_dispatcher_survives_a_pruned_job(make_queue, tmp_path):
+    queue = make_queue()
+    log = str(tmp_path / "log")
+    blocker = queue.submit("work", {"path": log, "name": "blocker", "hold": 0.5}, priority=100)
+    pruned = queue.submit("work", {"path": log, "name": "pruned"})
+    with queue._db_lock, queue._conn:
+        queue._conn.execute("DELETE FROM jobs WHERE id = ?", (pruned.id,))
+    after = queue.submit("work", {"path": log, "name": "after"})
+
+    assert queue.wait(blocker.id, timeout=60).status == SUCCEEDED
+    assert queue.wait(after.id, timeout=60).status == SUCCEEDED
+    assert queue.get(pruned.id) is None
+
+
+def test_dispatcher_survives_a_failing_lookup(make_queue, tmp_path, monkeypatch):
+    queue = make_queue()
+    log = str(tmp_path / "log")
+    blocker = queue.submit("work", {"path": log, "name": "blocker", "hold": 0.5}, priority=100)
+    broken = queue.submit("work", {"path": log, "name": "broken"})
+    after = queue.submit("work", {"path": log, "name": "after"})
+    real_get = queue.get
+
+    def get(job_id):
+        if job_id == broken.id and threading.current_thread().name == "job-dispatcher":
+            raise sqlite3.OperationalError("no such table: jobs")
+        return real_get(job_id)
+
+    monkeypatch.setattr(queue, "get", get)
+    assert queue.wait(blocker.id, timeout=60).status == SUCCEEDED
+    assert queue.wait(after.id, timeout=60).status == SUCCEEDED
+    assert real_get(broken.id).status == FAILED
+
+
+def test_jobs_of_dead_processes_are_failed(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    with queue._db_lock, queue._conn:
+        queue._conn.execute(
+            "INSERT INTO jobs (id, kind, params, priority, status, owner, created_at) "
+            "VALUES ('orphan', 'work', '{}', 0, ?, ?, ?)",
+            (QUEUED, dead.pid, time.time()),
+        )
+    queue.shutdown()
+
+    job = JobQueue(tmp_path / "jobs.sqlite3").get("orphan")
+    assert job.status == FAILED
+    assert job.error == "interrupted"
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from llm_cache import LLMCache, MemoryBackend
+
+
+def _slow_stream(calls, parts=("a", "b", "c"), fail=False):
+    def produce():
+        calls.append(1)
+        for part in parts:
+            time.sleep(0.02)
+            yield part
+        if fail:
+            raise RuntimeError("stream reset")
+
+    return produce
+
+
+def _collect(iterator, out, index):
+    try:
+        out[index] = "".join(iterator)
+    except Exception as exc:  # noqa: BLE001 - recorded for the assertion
+        out[index] = exc
+
+
+def test_concurrent_streams_share_one_upstream_call():
+    cache = LLMCache(MemoryBackend())
+    calls: list[int] = []
+    out: dict[int, object] = {}
+    threads = [
+        threading.Thread(target=_collect, args=(cache.stream("m", "p", _slow_stream(calls)), out, idx))
+        for idx in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert set(out.values()) == {"abc"}
+    assert list(cache.stream("m", "p", _slow_stream(calls))) == ["abc"]
+    assert len(calls) == 1
+
+
+def test_whole_completion_joins_running_stream():
+    cache = LLMCache(MemoryBackend())
+    calls: list[int] = []
+    stream = cache.stream("m", "p", _slow_stream(calls))
+    first = next(stream)
+    value = cache.get_or_compute("m", "p", lambda: calls.append(2) or "other")
+    assert first + "".join(stream) == value == "abc"
+    assert calls == [1]
+
+
+def test_stream_errors_reach_every_reader_and_are_not_cached():
+    cache = LLMCache(MemoryBackend())
+    calls: list[int] = []
+    out: dict[int, object] = {}
+    threads = [
+        threading.Thread(
+            target=_collect, args=(cache.stream("m", "p", _slow_stream(calls, fail=True)), out, idx)
+        )
+        for idx in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in out.values())
+    with pytest.raises(RuntimeError):
+        list(cache.stream("m", "p", _slow_stream(calls, fail=True)))
+    assert len(calls) == 2
@@ -0,0 +1,89 @@
+import sys
+import types
+
+import pytest
+
+import logo_store
+from logo_store import LogoStore
+from webapp import create_app
+
+PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+class FakeYahoo:
+    """Stand-in ``yfinance`` module counting ``Ticker(...).info`` lookups."""
+
+    def __init__(self, websites):
+        self.websites = websites
+        self.lookups = []
+        self.module = types.ModuleType("yfinance")
+        self.module.Ticker = self.ticker
+
+    def ticker(self, symbol):
+        self.lookups.append(symbol)
+        website = self.websites.get(symbol)
+        return types.SimpleNamespace(info={"website": website} if website else {})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    yahoo = FakeYahoo({"ACME": "https://www.acme.com/about"})
+    downloads = []
+
+    def download(url):
+        downloads.append(url)
+        return PNG, "image/png"
+
+    monkeypatch.setitem(sys.modules, "yfinance", yahoo.module)
+    monkeypatch.setattr(logo_store, "_download_image", download)
+    store = LogoStore(tmp_path)
+    monkeypatch.setattr(logo_store, "_DEFAULT_STORE", store)
+    store.yahoo = yahoo
+    store.downloads = downloads
+    return store
+
+
+def test_logo_route_serves_etag_and_304(store):
+    client = create_app().test_client()
+    first = client.get("/logo/acme")
+    assert first.status_code == 200
+    assert first.data == PNG
+    assert first.mimetype == "image/png"
+    etag = first.headers["ETag"]
+
+    second = client.get("/logo/ACME", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert store.yahoo.lookups == ["ACME"]
+    assert store.downloads == ["https://logo.clearbit.com/www.acme.com"]
+    # The symbol -> domain mapping survives a new store on the same directory.
+    assert LogoStore(store.cache_dir).source("ACME") == ("www.acme.com", None)
+
+
+def test_logo_route_negative_caches_unknown_symbols(store):
+    client = create_app().test_client()
+    for _ in range(3):
+        response = client.get("/logo/NOPE")
+        assert response.status_code == 404
+        assert response.cache_control.max_age > 0
+    assert store.yahoo.lookups == ["NOPE"]
+    # Misses stay in memory: nothing about NOPE reaches the symbol table.
+    assert LogoStore(store.cache_dir).source("NOPE") is None
+
+
+def test_misses_are_bounded_and_expire(store, monkeypatch):
+    monkeypatch.setattr(logo_store, "MISS_CACHE_SIZE", 3)
+    for symbol in ("A", "B", "C", "D"):
+        store.remember_missing(symbol)
+    assert not store._missing("A")
+    assert store._missing("D")
+
+    store.negative_ttl_seconds = 0
+    assert not store._missing("D")
+    assert "D" not in store._misses
+
+
+def test_remember_clears_a_recorded_miss(store):
+    store.remember_missing("ACME")
+    store.remember("ACME", "acme.com")
+    assert not store._missing("ACME")
+    assert store.source("ACME") == ("acme.com", None)
@@ -0,0 +1,132 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+import news_store
+from http_client import HttpClient
+from news_store import NewsStore, link_hash
+
+
+def _rss(*items):
+    body = "".join(
+        f"<item><title>{title}</title><link>{link}</link><pubDate>{date}</pubDate></item>"
+        for title, link, date in items
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>stub</title>{body}</channel></rss>'.encode()
+
+
+BEATS = ("Acme beats estimates", "https://example.com/a", "Mon, 01 Apr 2024 10:00:00 GMT")
+RECALL = ("Acme widget recall", "https://example.com/b", "Tue, 02 Apr 2024 10:00:00 GMT")
+# The same story as BEATS, shared with tracking parameters and a fragment.
+BEATS_TRACKED = (
+    "Acme beats estimates (syndicated)",
+    "https://EXAMPLE.com/a?utm_source=feed&amp;utm_medium=rss#top",
+    "Mon, 01 Apr 2024 11:00:00 GMT",
+)
+PROFIT = ("Acme profit doubles", "https://example.com/c", "Wed, 03 Apr 2024 10:00:00 GMT")
+
+
+class FeedServer:
+    """Serves one RSS document with an ETag, answering 304 when it matches."""
+
+    def __init__(self) -> None:
+        self.body = _rss(BEATS, RECALL)
+        self.etag = '"v1"'
+        self.requests: list[dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.requests.append(dict(self.headers))
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/rss?q={{query}}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def publish(self, body: bytes, etag: str) -> None:
+        self.body, self.etag = body, etag
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    server = FeedServer()
+    monkeypatch.setattr(http_client, "_CLIENT", HttpClient(retries=0))
+    monkeypatch.setattr(news_store, "FEED_URL", server.url)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NewsStore(tmp_path / "news.sqlite3")
+    yield store
+    store.close()
+
+
+def test_link_hash_ignores_tracking_and_fragments():
+    assert link_hash("https://EXAMPLE.com/a?utm_source=x&id=1#top") == link_hash("https://example.com/a?id=1")
+    assert link_hash("https://example.com/a?id=1") != link_hash("https://example.com/a?id=2")
+
+
+def test_first_request_polls_then_conditional_gets(feed, store):
+    assert store.headlines("Acme") == [
+        "Acme widget recall - https://example.com/b",
+        "Acme beats estimates - https://example.com/a",
+    ]
+    assert "If-None-Match" not in feed.requests[0]
+
+    assert store.poll("Acme") == 0
+    assert feed.requests[-1]["If-None-Match"] == '"v1"'
+    assert len(store.headlines("Acme")) == 2
+    assert len(feed.requests) == 2  # Later headline requests read the index only.
+
+
+def test_polls_dedupe_articles_by_normalised_link(feed, store):
+    feed.publish(_rss(BEATS, BEATS_TRACKED, RECALL), '"v1"')
+    assert store.poll("Acme") == 2
+
+    feed.publish(_rss(PROFIT, BEATS_TRACKED, RECALL, BEATS), '"v2"')
+    assert store.poll("Acme") == 1
+    assert feed.requests[-1]["If-None-Match"] == '"v1"'
+    assert store.headlines("Acme", limit=10)[0] == "Acme profit doubles - https://example.com/c"
+    assert len(store.headlines("Acme", limit=10)) == 3
+    assert [hit["title"] for hit in store.search("profit")] == ["Acme profit doubles"]
+
+
+def test_failed_fetch_still_marks_the_feed_polled(monkeypatch, store):
+    monkeypatch.setattr(http_client, "_CLIENT", HttpClient(retries=0))
+    monkeypatch.setattr(news_store, "FEED_URL", "http://127.0.0.1:1/rss?q={query}")
+    assert store.headlines("Acme") == []
+    assert store._track("Acme") is not None
+
+
+def test_close_stops_the_poller(feed, tmp_path):
+    store = NewsStore(tmp_path / "news.sqlite3", poll_seconds=3600)
+    store.headlines("Acme")
+    store.start_background_poll()
+    started = time.perf_counter()
+    store.close()
+    assert time.perf_counter() - started < 2
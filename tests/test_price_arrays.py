@@ -0,0 +1,73 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import price_arrays
+from price_arrays import PriceArrays
+from price_store import ARRAYS_SUBDIR, PriceStore
+
+
+def _frame(length, start=100.0):
+    index = pd.date_range("2024-01-01", periods=length, freq="D", tz="UTC")
+    close = start + np.arange(length, dtype=float)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index)
+
+
+def test_share_maps_one_file_per_series(tmp_path):
+    arrays = PriceArrays(tmp_path)
+    values = np.arange(50, dtype=np.float64)
+    first = arrays.share(values)
+    second = PriceArrays(tmp_path).share(values.copy())
+    np.testing.assert_array_equal(first, values.astype(np.float32))
+    assert not first.flags.writeable
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    np.testing.assert_array_equal(first, second)
+
+
+def test_keyed_share_skips_hashing(tmp_path, monkeypatch):
+    arrays = PriceArrays(tmp_path)
+    values = np.arange(50, dtype=np.float32)
+    calls = []
+    real_sha1 = hashlib.sha1
+
+    def counting_sha1(data):
+        calls.append(len(data))
+        return real_sha1(data)
+
+    monkeypatch.setattr(price_arrays.hashlib, "sha1", counting_sha1)
+    for _ in range(5):
+        arrays.share(values, key=("ACME", 1))
+    assert len(calls) == 1
+
+    # Same key but different values (a source that changed under the key).
+    changed = arrays.share(values + 1, key=("ACME", 1))
+    np.testing.assert_array_equal(changed, values + 1)
+    assert len(calls) == 2
+
+
+def test_arrays_keep_their_own_budget(tmp_path):
+    store = PriceStore(tmp_path, disk_budget=1)
+    arrays = PriceArrays(tmp_path / ARRAYS_SUBDIR, disk_budget=10_000)
+    shared = [arrays.share(np.full(100, i, dtype=np.float32)) for i in range(3)]
+    store.put("AAA", _frame(20))
+    store.put("BBB", _frame(20))
+    assert len(list((tmp_path / ARRAYS_SUBDIR).glob("*.npy"))) == 3
+    assert not store.entry_path("AAA").exists()
+
+    # Each file is ~528 bytes; a budget of two evicts the least recently used.
+    small = PriceArrays(tmp_path / "small", disk_budget=1200)
+    for i in range(4):
+        small.share(np.full(100, i, dtype=np.float32))
+    assert len(list((tmp_path / "small").glob("*.npy"))) == 2
+    assert small.stats()["evictions"] == 2
+    np.testing.assert_array_equal(shared[0], np.zeros(100, dtype=np.float32))
+
+
+def test_entry_version_moves_on_rewrite(tmp_path):
+    store = PriceStore(tmp_path)
+    assert store.entry_version("ACME") is None
+    store.put("ACME", _frame(20))
+    first = store.entry_version("ACME")
+    store.put("ACME", _frame(21))
+    assert store.entry_version("ACME") not in (None, first)
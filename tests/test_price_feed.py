@@ -0,0 +1,25 @@
+import numpy as np
+
+from price_feed import PriceFeed
+
+
+def _feed(closes):
+    records = np.zeros(len(closes), dtype=[("index", "<i8"), ("Close", "<f8")])
+    records["Close"] = closes
+    return PriceFeed(records)
+
+
+def test_indexing_matches_chunks_for_missing_prices():
+    feed = _feed([10.0, np.nan, 12.5, np.nan, 11.0])
+    chunked = np.concatenate(list(feed.chunks(2, dtype=np.float64)))
+    indexed = np.array([feed[i] for i in range(len(feed))])
+    np.testing.assert_array_equal(indexed, chunked)
+    np.testing.assert_array_equal(feed[1:4], [0.0, 12.5, 0.0])
+
+
+def test_window_shares_records():
+    feed = _feed(np.arange(10.0))
+    window = feed.window(3, 7)
+    assert len(window) == 4
+    assert window[0] == 3.0
+    assert np.shares_memory(window.records, feed.records)
@@ -0,0 +1,27 @@
+from prompt_builder import count_tokens, report_section, truncate_tokens
+
+REPORT = (
+    "## 1. Trend analysis\n"
+    + "\n".join(f"Trend point {i}: the stock moved steadily on rising volume." for i in range(60))
+    + "\n## 2. Key risks\nRate cuts may slip.\n"
+    "## 3. Investment insights\n**Recommendation: Buy** with a 12-month target of 210."
+)
+
+
+def test_report_section_keeps_the_conclusion():
+    section = report_section(REPORT, max_tokens=120)
+    assert count_tokens(section) <= 120
+    assert section.startswith("1. Trend analysis\n")
+    assert section.endswith("Recommendation: Buy with a 12-month target of 210.")
+    assert "\n…\n" in section
+
+
+def test_report_section_leaves_short_reports_alone():
+    assert report_section("**Hold.**\n\nNothing changed.") == "Hold.\nNothing changed."
+
+
+def test_truncate_tokens_keep_end():
+    text = " ".join(f"w{i}" for i in range(200))
+    cut = truncate_tokens(text, 20, keep_end=True)
+    assert cut.startswith("…") and cut.endswith("w199")
+    assert count_tokens(cut) <= 20
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import price_store
+import test_trader
+from analytics import RenderCache
+from webapp import routes
+
+
+def _frame(start):
+    index = pd.date_range("2020-01-01", periods=400, freq="D", tz="UTC")
+    close = start + np.arange(len(index), dtype=float)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = price_store.PriceStore(tmp_path / "prices")
+    monkeypatch.setattr(price_store, "_DEFAULT_STORE", store)
+    monkeypatch.setattr(analytics, "render_cache", RenderCache(max_bytes=1 << 20, ttl_seconds=3600))
+    monkeypatch.setattr(analytics, "figure_to_data_url", lambda figure: f"chart:{figure}")
+    return store
+
+
+def test_trader_chart_rerenders_after_price_refresh(store, monkeypatch):
+    renders = []
+    monkeypatch.setattr(test_trader, "model_version", lambda: 1.0)
+    monkeypatch.setattr(test_trader, "trader_figure", lambda series: series["title"])
+
+    def trader_series(ticker):
+        renders.append(ticker)
+        return {"title": f"{ticker} #{len(renders)}", "stats": {}}
+
+    monkeypatch.setattr(test_trader, "trader_series", trader_series)
+    store.put("ACME", _frame(10), period="3mo")
+    first = routes._trader_stage("ACME", "png")
+    assert routes._trader_stage("ACME", "png") == first
+    assert len(renders) == 1
+
+    store.put("ACME", _frame(20), period="3mo")
+    assert routes._trader_stage("ACME", "png")["chart"] == "chart:ACME #2"
+
+
+def test_returns_chart_rerenders_after_price_refresh(store):
+    store.put("ACME", _frame(10), period="1y")
+    first = routes._returns_stage("ACME", "1y", "M", "png")
+    assert routes._returns_stage("ACME", "1y", "M", "png") is first
+
+    store.put("ACME", _frame(20), period="1y")
+    assert routes._returns_stage("ACME", "1y", "M", "png") is not first
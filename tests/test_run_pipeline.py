@@ -0,0 +1,86 @@
+import threading
+import time
+import types
+
+import run_pipeline
+from analyst_agent import SUMMARY_ERROR
+
+
+class FakeAgents:
+    """Stand-ins for the fetch and LLM steps that record their overlap."""
+
+    def __init__(self, monkeypatch, *, llm_seconds=0.0):
+        self.lock = threading.Lock()
+        self.llm_seconds = llm_seconds
+        self.fetched = []
+        self.llm_active = 0
+        self.llm_peak = 0
+        self.release_llm = threading.Event()
+        self.release_llm.set()
+        store = types.SimpleNamespace(prefetch=lambda tickers, period: None)
+        monkeypatch.setattr(run_pipeline, "get_store", lambda: store)
+        monkeypatch.setattr(run_pipeline, "get_stock_info", self.stock_info)
+        monkeypatch.setattr(run_pipeline, "get_news", lambda name: [f"{name} news"])
+        monkeypatch.setattr(run_pipeline, "generate_analyst_summary", self.summary)
+        monkeypatch.setattr(run_pipeline, "generate_strategy", lambda summary, risk_profile: f"hold ({summary})")
+
+    def stock_info(self, ticker):
+        if ticker == "BOOM":
+            raise KeyError(ticker)
+        with self.lock:
+            self.fetched.append(ticker)
+        return {"name": ticker.title()}
+
+    def summary(self, *, ticker, risk_profile, stock_info, news):
+        with self.lock:
+            self.llm_active += 1
+            self.llm_peak = max(self.llm_peak, self.llm_active)
+        self.release_llm.wait(5)
+        time.sleep(self.llm_seconds)
+        with self.lock:
+            self.llm_active -= 1
+        return SUMMARY_ERROR if ticker == "DOWN" else f"{ticker} looks fine"
+
+
+def test_batch_reports_results_and_errors(monkeypatch):
+    FakeAgents(monkeypatch)
+    results = {
+        item["ticker"]: item
+        for item in run_pipeline.run_agent_pipeline_batch(["aaa", "BOOM", "down", "aaa "], llm_requests_per_second=100)
+    }
+    assert set(results) == {"AAA", "BOOM", "DOWN"}
+    assert results["AAA"]["strategy"] == "hold (AAA looks fine)"
+    assert results["BOOM"] == {"ticker": "BOOM", "error": "KeyError"}
+    assert results["DOWN"] == {"ticker": "DOWN", "error": "summary unavailable"}
+
+
+def test_fetches_continue_while_llm_pool_is_busy(monkeypatch):
+    agents = FakeAgents(monkeypatch)
+    agents.release_llm.clear()
+    tickers = [f"T{i}" for i in range(8)]
+    batch = run_pipeline.run_agent_pipeline_batch(
+        tickers, fetch_concurrency=2, llm_concurrency=1, llm_requests_per_second=100
+    )
+    consumer = threading.Thread(target=lambda: list(batch))
+    consumer.start()
+    deadline = time.monotonic() + 5
+    while len(agents.fetched) < len(tickers) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Every ticker was fetched although the single LLM worker is still blocked.
+    assert len(agents.fetched) == len(tickers)
+    assert agents.llm_peak == 1
+    agents.release_llm.set()
+    consumer.join(5)
+    assert not consumer.is_alive()
+
+
+def test_closing_the_batch_does_not_wait_for_the_rest(monkeypatch):
+    FakeAgents(monkeypatch, llm_seconds=0.2)
+    batch = run_pipeline.run_agent_pipeline_batch(
+        [f"T{i}" for i in range(20)], llm_concurrency=1, llm_requests_per_second=100
+    )
+    assert "summary" in next(batch)
+    started = time.perf_counter()
+    batch.close()
+    assert time.perf_counter() - started < 0.5
+
@@ -0,0 +1,127 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("openai")
+
+import analyst_agent
+import llm_cache
+import openai_client
+from webapp import create_app, routes
+
+SUMMARY_TOKENS = ["Steady ", "growth ", "ahead."]
+STRATEGY_TOKENS = ["Hold ", "for ", "now."]
+
+
+class FakeOpenAI:
+    """Local server speaking the streaming chat completions protocol."""
+
+    def __init__(self) -> None:
+        self.fail_summary_after = None
+        self.prompts: list[str] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][-1]["content"]
+                fake.prompts.append(prompt)
+                analyst = "financial analyst" in prompt
+                tokens = SUMMARY_TOKENS if analyst else STRATEGY_TOKENS
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for index, token in enumerate(tokens):
+                    if analyst and index == fake.fail_summary_after:
+                        self.event({"error": {"message": "upstream reset", "type": "server_error"}})
+                        return
+                    self.event(
+                        {
+                            "id": "chatcmpl-test",
+                            "object": "chat.completion.chunk",
+                            "created": 0,
+                            "model": body["model"],
+                            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                        }
+                    )
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def event(self, data) -> None:
+                self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", fake.url)
+    monkeypatch.setattr(openai_client, "_CLIENT", None)
+    monkeypatch.setattr(llm_cache, "_DEFAULT_CACHE", None)
+    monkeypatch.setattr(llm_cache, "_DEFAULT_CACHE_READY", True)
+
+    history = pd.DataFrame(
+        {"Close": [10.0, 11.0, 12.0], "Low": 9.0, "High": 13.0, "Volume": 1e6},
+        index=pd.date_range("2024-01-02", periods=3),
+    )
+    info = {"name": "Acme", "sector": "Tools", "summary": "Makes tools.", "price_data": history, "history": history}
+    monkeypatch.setattr(analyst_agent, "get_stock_info", lambda ticker: info)
+    monkeypatch.setattr(analyst_agent, "get_news", lambda company, limit=5: [])
+    monkeypatch.setattr(routes, "_train_if_missing", lambda: None)
+    monkeypatch.setattr(routes, "_trader_stage", lambda ticker, chart_format: {"stats": {}})
+    monkeypatch.setattr(routes, "_returns_stage", lambda *args: {"series": []})
+    yield fake
+    fake.close()
+
+
+def _events(response) -> list[tuple[str, dict]]:
+    events = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _stream(client) -> list[tuple[str, dict]]:
+    response = client.post("/api/run/stream", json={"ticker": "ACME", "chartFormat": "json"})
+    assert response.status_code == 200
+    return _events(response)
+
+
+def test_stream_forwards_both_completions(fake_openai):
+    events = _stream(create_app().test_client())
+
+    assert [data["delta"] for name, data in events if name == "summary"] == SUMMARY_TOKENS
+    assert [data["delta"] for name, data in events if name == "strategy"] == STRATEGY_TOKENS
+    assert not [data for name, data in events if name == "error"]
+    assert events[-1][0] == "done"
+    assert "Steady growth ahead." in fake_openai.prompts[-1]
+
+
+def test_partial_summary_failure_skips_strategist(fake_openai, caplog, capsys):
+    fake_openai.fail_summary_after = 2
+    with caplog.at_level(logging.WARNING, logger="analyst_agent"):
+        events = _stream(create_app().test_client())
+
+    assert [data["delta"] for name, data in events if name == "summary"] == SUMMARY_TOKENS[:2]
+    assert ("error", {"stage": "summary", "error": "APIError"}) in events
+    assert not [name for name, _ in events if name == "strategy"]
+    assert len(fake_openai.prompts) == 1
+    assert events[-1][0] == "done"
+    assert any("ACME" in record.getMessage() for record in caplog.records)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Seconds a fresh interpreter may spend importing the WSGI app.
+IMPORT_BUDGET = 1.0
+HEAVY_MODULES = (
+    "torch",
+    "stable_baselines3",
+    "matplotlib",
+    "yfinance",
+    "openai",
+    "feedparser",
+    "pandas",
+)
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _import_server() -> dict:
+    env = {**os.environ, "FINGEN_WARMUP": "0"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_server_import_stays_light():
+    result = _import_server()
+    assert result["loaded"] == []
+
+
+def test_server_import_within_budget():
+    # Best of three, so one slow start on a busy machine does not fail the suite.
+    seconds = min(_import_server()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_BUDGET, f"importing server took {seconds:.2f}s"
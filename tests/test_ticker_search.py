@@ -0,0 +1,156 @@
+import json
+import os
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+import logo_store
+import symbol_index
+import ticker_search
+from http_client import HttpClient
+from logo_store import LogoStore
+from symbol_index import SymbolIndex
+
+SYMBOLS = """symbol,name
+AAPL,Apple Inc.
+AMZN,Amazon.com Inc.
+MSFT,Microsoft Corporation
+META,Meta Platforms Inc.
+MS,Morgan Stanley
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "symbols.csv").write_text(SYMBOLS)
+    index = SymbolIndex(tmp_path / "symbols.csv", tmp_path / "learned.csv", refresh_seconds=0.05)
+    yield index
+    index.close()
+
+
+def _symbols(results):
+    return [item["symbol"] for item in results]
+
+
+def test_prefix_ranking(index):
+    # Exact symbol, then symbol prefixes (shortest first), then name matches.
+    assert _symbols(index.search("ms")) == ["MS", "MSFT"]
+    assert _symbols(index.search("m")) == ["MS", "META", "MSFT"]
+    assert _symbols(index.search("morgan")) == ["MS"]
+    assert _symbols(index.search("platforms")) == ["META"]
+    assert index.search("apple")[0] == {"symbol": "AAPL", "shortname": "Apple Inc."}
+    assert index.search("  ") == []
+
+
+def test_fuzzy_match_without_prefix_hits(index):
+    assert _symbols(index.search("microsft")) == ["MSFT"]
+    assert index.search("zz") == []  # Too short to try fuzzy matching.
+
+
+def test_learned_symbols_persist(index, tmp_path):
+    index.add([{"symbol": "nvda", "shortname": "NVIDIA Corporation"}, {"symbol": "AAPL", "shortname": "Other"}])
+    assert _symbols(index.search("nvidia")) == ["NVDA"]
+    assert index.search("aapl")[0]["shortname"] == "Apple Inc."
+    index.close()
+
+    reloaded = SymbolIndex(tmp_path / "symbols.csv", tmp_path / "learned.csv")
+    assert _symbols(reloaded.search("nvda")) == ["NVDA"]
+    assert len(reloaded) == 6
+
+
+def test_refresher_reloads_a_changed_symbol_list(index, tmp_path):
+    index.start_background_refresh()
+    path = tmp_path / "symbols.csv"
+    path.write_text(SYMBOLS + "TSLA,Tesla Inc.\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    for _ in range(100):
+        if index.search("tesla"):
+            break
+        threading.Event().wait(0.02)
+    assert _symbols(index.search("tesla")) == ["TSLA"]
+
+
+class YahooSearch:
+    """Local stand-in for Yahoo's search endpoint."""
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+        self.queries: list[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.queries.append(self.path)
+                body = json.dumps({"quotes": server.quotes}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/finance/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def search(index, tmp_path, monkeypatch):
+    yahoo = YahooSearch([{"symbol": "NVDA", "shortname": "NVIDIA Corporation"}, {"symbol": "bad"}])
+    lookups = []
+
+    def ticker(symbol):
+        lookups.append(symbol)
+        return types.SimpleNamespace(
+            info={"website": f"https://{symbol.lower()}.example", "regularMarketPrice": 12.5, "currency": "USD"}
+        )
+
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(Ticker=ticker))
+    monkeypatch.setattr(ticker_search, "SEARCH_URL", yahoo.url)
+    monkeypatch.setattr(ticker_search, "get_index", lambda: index)
+    monkeypatch.setattr(ticker_search, "_enriched", type(ticker_search._enriched)())
+    monkeypatch.setattr(http_client, "_CLIENT", HttpClient(retries=0))
+    monkeypatch.setattr(logo_store, "_DEFAULT_STORE", LogoStore(tmp_path / "logos"))
+    yahoo.lookups = lookups
+    yield yahoo
+    yahoo.close()
+
+
+def test_local_hits_skip_the_remote_search(search):
+    results = ticker_search.search_tickers("apple")
+    assert [item["symbol"] for item in results] == ["AAPL"]
+    assert results[0]["label"] == "Apple Inc. (AAPL) - 12.50 USD"
+    assert results[0]["logo_url"] == "/logo/AAPL"
+    assert search.queries == []
+
+
+def test_remote_results_are_learned(search, index):
+    results = ticker_search.search_tickers("nvidia")
+    assert [item["symbol"] for item in results] == ["NVDA"]
+    assert len(search.queries) == 1
+    # Learned by the index: the next search stays local.
+    assert _symbols(index.search("nvidia")) == ["NVDA"]
+    ticker_search.search_tickers("nvid")
+    assert len(search.queries) == 1
+
+
+def test_enrichment_cache_is_bounded(search, monkeypatch):
+    monkeypatch.setattr(ticker_search, "ENRICH_CACHE_SIZE", 2)
+    for symbol in ("AAPL", "MSFT", "AMZN", "AAPL"):
+        ticker_search._enrich({"symbol": symbol, "shortname": symbol})
+    assert list(ticker_search._enriched) == ["AMZN", "AAPL"]
+    assert search.lookups == ["AAPL", "MSFT", "AMZN", "AAPL"]
+
+    ticker_search._enrich({"symbol": "AMZN", "shortname": "AMZN"})
+    assert search.lookups[-1] == "AAPL"  # AMZN was served from the cache.
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from trading_env import TradingEnv
+from weight_trading_env import WeightTradingEnv
+
+
+@pytest.mark.parametrize("make_env", [TradingEnv, WeightTradingEnv])
+@pytest.mark.parametrize("with_features", [False, True])
+def test_observations_are_independent_arrays(make_env, with_features):
+    prices = np.linspace(10.0, 20.0, 6, dtype=np.float32)
+    features = np.arange(12, dtype=np.float32).reshape(6, 2) if with_features else None
+    env = make_env(prices, features=features)
+    first = env.reset()
+    kept = first.copy()
+    second, _, _, info = env.step(1)
+    assert first is not second
+    np.testing.assert_array_equal(first, kept)
+    assert second.dtype == np.float32
+    assert second.shape == env.observation_space.shape
+    assert info["portfolio_value"] > 0
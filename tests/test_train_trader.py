@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+from backtest import backtest
+from data_utils import _generate_synthetic_prices
+from recorder import load_steps, summarize
+from trading_env import TradingEnv
+from train_trader import MultiEnvWrapper, _recorder_callback
+
+
+def test_recorded_episodes_match_backtest(tmp_path):
+    from stable_baselines3 import PPO
+
+    prices = _generate_synthetic_prices(length=60, seed=3)
+    env = MultiEnvWrapper([TradingEnv(prices)], seed=0)
+    model = PPO("MlpPolicy", env, n_steps=128, batch_size=64, n_epochs=1, seed=0, verbose=0)
+    model.learn(total_timesteps=256, callback=_recorder_callback(tmp_path))
+
+    records = load_steps(tmp_path / "env-0.steps")
+    summary = summarize(records)
+    complete = summary["episode"][summary["steps"] == len(prices) - 1]
+    assert len(complete) >= 3
+
+    for episode in complete:
+        steps = records[records["episode"] == episode]
+        expected = backtest(prices, steps["action"].astype(np.int64)).curve()
+        np.testing.assert_array_equal(steps["value"], expected.astype(np.float64))
+    final_values = summary["final_value"][np.isin(summary["episode"], complete)]
+    assert not np.all(final_values == 1000.0)
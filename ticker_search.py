@@ -1,48 +1,33 @@
-"""Utilities for ticker lookup and logo retrieval."""
+"""Utilities for ticker lookup."""
 from __future__ import annotations
 
-import base64
 import logging
-from functools import lru_cache
-from typing import Optional
-
-import requests
-import yfinance as yf
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+from http_client import get_client as get_http_client
+from logo_store import extract_domain, get_store as get_logo_store
+from singleflight import SingleFlight
+from symbol_index import get_index
+from tracing import span
 
 LOGGER = logging.getLogger(__name__)
 
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+# Seconds a search waits for enrichment (price, website) before answering with plain labels.
+ENRICH_DEADLINE = float(os.environ.get("FINGEN_SEARCH_DEADLINE", 0.8))
+ENRICH_TTL = float(os.environ.get("FINGEN_SEARCH_ENRICH_TTL", 15 * 60))
+ENRICH_CACHE_SIZE = 4096
 
-def _extract_domain(website: Optional[str]) -> Optional[str]:
-    if not website:
-        return None
-    clean = website.replace("https://", "").replace("http://", "")
-    clean = clean.split("/")[0]
-    return clean or None
-
-
-@lru_cache(maxsize=256)
-def _download_image(url: str) -> Optional[bytes]:
-    try:
-        response = requests.get(url, timeout=2)
-        if response.status_code == 200 and response.headers.get("Content-Type", "").startswith(
-            "image"
-        ):
-            return response.content
-    except Exception as exc:  # noqa: BLE001 - network errors should not crash
-        LOGGER.debug("Failed to download image %s: %s", url, exc)
-    return None
-
-
-def _resolve_logo(domain: Optional[str], fallback_url: Optional[str]) -> Optional[bytes]:
-    if domain:
-        data = _download_image(f"https://logo.clearbit.com/{domain}")
-        if data:
-            return data
-    if fallback_url:
-        data = _download_image(fallback_url)
-        if data:
-            return data
-    return None
+_ENRICH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ticker-enrich")
+_searches = SingleFlight()
+_enrichments = SingleFlight()
+_enriched: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_enriched_lock = threading.Lock()
 
 
 def _format_suggestion(item: dict) -> dict:
@@ -51,21 +36,27 @@ def _format_suggestion(item: dict) -> dict:
     price = item.get("regularMarketPrice")
     currency = item.get("currency", "")
     website = item.get("website")
-    domain = _extract_domain(website)
+    domain = extract_domain(website)
     fallback_logo_url = item.get("logo_url")
 
     if domain is None or price is None:
         try:
-            info = yf.Ticker(symbol).info
+            import yfinance as yf
+
+            with get_http_client().guard("yfinance"), span("yfinance.info"):
+                info = yf.Ticker(symbol).info
             website = info.get("website") or website
-            domain = domain or _extract_domain(website)
+            domain = domain or extract_domain(website)
             price = info.get("regularMarketPrice", price)
             currency = currency or info.get("currency", "")
             fallback_logo_url = fallback_logo_url or info.get("logo_url")
         except Exception as exc:  # noqa: BLE001 - tolerate yfinance failures
             LOGGER.debug("Failed to enrich ticker %s: %s", symbol, exc)
 
-    logo_bytes = _resolve_logo(domain, fallback_logo_url)
+    # Only the URL travels with the suggestion; /logo/<symbol> serves the
+    # image from the logo store so browsers can cache it.
+    get_logo_store().remember(symbol, domain, fallback_logo_url)
+    has_logo = bool(domain or fallback_logo_url)
 
     label_bits = [f"{name} ({symbol})"]
     if price is not None:
@@ -75,33 +66,81 @@ def _format_suggestion(item: dict) -> dict:
     return {
         "label": " - ".join([bit for bit in label_bits if bit]),
         "symbol": symbol,
-        "logo_bytes": logo_bytes,
-        "logo_data_url": (
-            f"data:image/png;base64,{base64.b64encode(logo_bytes).decode('ascii')}"
-            if logo_bytes
-            else None
-        ),
+        "logo_url": f"/logo/{quote(symbol)}" if has_logo else None,
     }
 
 
-def search_tickers(query: str, *, limit: int = 10) -> list[dict]:
-    if not query:
-        return []
+def _plain_suggestion(item: dict) -> dict:
+    """Suggestion built from the search hit alone, without any network calls."""
+    symbol = item["symbol"]
+    known_logo = get_logo_store().source(symbol) is not None
+    return {
+        "label": f"{item['shortname']} ({symbol})",
+        "symbol": symbol,
+        "logo_url": f"/logo/{quote(symbol)}" if known_logo else None,
+    }
+
 
+def _enrich(item: dict) -> dict:
+    """Return the enriched suggestion for ``item``, cached per symbol."""
+    symbol = item["symbol"]
+    with _enriched_lock:
+        cached = _enriched.get(symbol)
+        if cached is not None and cached[0] > time.time():
+            _enriched.move_to_end(symbol)
+            return cached[1]
+
+    def compute() -> dict:
+        suggestion = _format_suggestion(item)
+        with _enriched_lock:
+            _enriched[symbol] = (time.time() + ENRICH_TTL, suggestion)
+            _enriched.move_to_end(symbol)
+            while len(_enriched) > ENRICH_CACHE_SIZE:
+                _enriched.popitem(last=False)
+        return suggestion
+
+    return _enrichments.do(symbol, compute)
+
+
+def _search_remote(query: str) -> list[dict]:
     try:
-        url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
+        with span("search.remote"):
+            response = get_http_client().get(SEARCH_URL, params={"q": query}, timeout=5)
         matches = response.json().get("quotes", [])
     except Exception as exc:  # noqa: BLE001 - degrade gracefully offline
         LOGGER.warning("Ticker search failed for %s: %s", query, exc)
         return []
+    matches = [item for item in matches if "symbol" in item and "shortname" in item]
+    get_index().add(matches)
+    return matches
+
+
+def _search(query: str, limit: int) -> list[dict]:
+    matches = get_index().search(query, limit=limit)
+    if not matches:
+        matches = _search_remote(query)[:limit]
 
+    # Enrichment runs concurrently; whatever misses the deadline is answered
+    # with a plain label and keeps running to warm the cache for the next query.
+    futures = [_ENRICH_EXECUTOR.submit(_enrich, item) for item in matches]
+    wait(futures, timeout=ENRICH_DEADLINE)
     suggestions = []
-    for item in matches:
-        if "symbol" not in item or "shortname" not in item:
-            continue
-        suggestions.append(_format_suggestion(item))
-        if len(suggestions) >= limit:
-            break
+    for item, future in zip(matches, futures):
+        if future.done() and future.exception() is None:
+            suggestions.append(future.result())
+        else:
+            suggestions.append(_plain_suggestion(item))
     return suggestions
+
+
+def search_tickers(query: str, *, limit: int = 10) -> list[dict]:
+    """Return up to ``limit`` suggestions for ``query``.
+
+    The local :mod:`symbol_index` answers most queries in-process; Yahoo's
+    search endpoint is only consulted when it has no match, and its results
+    are learned by the index.  Identical in-flight queries share one search.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    return _searches.do((query.lower(), limit), lambda: _search(query, limit))
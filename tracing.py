@@ -0,0 +1,231 @@
+"""Lightweight spans, Prometheus metrics and ``Server-Timing`` support.
+
+Wrap a slow call in ``with span("openai.analyst"):`` (or decorate it with
+``@traced("model.load")``) and its duration is recorded in the
+``fingen_span_seconds`` histogram.  While a request is being collected with
+:func:`collect_timings`, the same durations are also gathered per request so
+the web app can report them in a ``Server-Timing`` header.
+
+Tracing is controlled by ``FINGEN_TRACING`` (on unless set to ``0``).  When
+it is off, ``span`` returns a shared no-op context manager and ``traced``
+returns the function unchanged, so instrumented code pays one flag check.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+ENABLED = os.environ.get("FINGEN_TRACING", "1") != "0"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request list of (span name, seconds); ``None`` outside a collected request.
+_timings: contextvars.ContextVar[Optional[list[tuple[str, float]]]] = contextvars.ContextVar(
+    "fingen_timings", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram keyed by a fixed tuple of label names."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._series.items()
+            }
+        for values, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                labels = _format_labels(self.labels, values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+SPAN_SECONDS = Histogram("fingen_span_seconds", "Time spent in traced spans.", ("span",))
+REQUEST_SECONDS = Histogram(
+    "fingen_http_request_seconds", "HTTP request latency.", ("endpoint", "method")
+)
+OUTBOUND_SECONDS = Histogram(
+    "fingen_outbound_request_seconds", "Outbound HTTP call latency.", ("host", "outcome")
+)
+
+# name -> callable returning {"hits": int, "misses": int} for /metrics.
+_cache_sources: dict[str, Callable[[], dict]] = {}
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        elapsed = time.perf_counter() - self.started
+        SPAN_SECONDS.observe(elapsed, self.name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str):
+    """Context manager timing the enclosed block as ``name``."""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of :func:`span`; a no-op when tracing is disabled."""
+
+    def decorate(func: F) -> F:
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def start_timings() -> tuple[contextvars.Token, list[tuple[str, float]]]:
+    """Start gathering spans for the current context; pair with :func:`stop_timings`."""
+    timings: list[tuple[str, float]] = []
+    return _timings.set(timings), timings
+
+
+def stop_timings(token: contextvars.Token) -> None:
+    _timings.reset(token)
+
+
+@contextmanager
+def collect_timings() -> Iterator[list[tuple[str, float]]]:
+    """Gather the spans recorded in this context (and contexts copied from it)."""
+    token, timings = start_timings()
+    try:
+        yield timings
+    finally:
+        stop_timings(token)
+
+
+def _metric_name(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name)
+
+
+def server_timing_header(timings: Iterable[tuple[str, float]]) -> str:
+    """Format spans as a ``Server-Timing`` header, summing repeated names."""
+    totals: dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(
+        f'{_metric_name(name)};dur={seconds * 1000:.1f};desc="{name}"'
+        for name, seconds in totals.items()
+    )
+
+
+def register_cache(name: str, stats: Callable[[], dict]) -> None:
+    """Expose a cache's hit/miss counters as ``fingen_cache_*`` metrics."""
+    _cache_sources[name] = stats
+
+
+def render_metrics() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines = SPAN_SECONDS.render() + REQUEST_SECONDS.render() + OUTBOUND_SECONDS.render()
+
+    caches = []
+    for name, stats in sorted(_cache_sources.items()):
+        try:
+            counters = stats()
+        except Exception:  # noqa: BLE001 - a broken source must not break /metrics
+            continue
+        caches.append((name, int(counters.get("hits", 0)), int(counters.get("misses", 0))))
+    if caches:
+        lines += [
+            "# HELP fingen_cache_hits_total Cache lookups answered from the cache.",
+            "# TYPE fingen_cache_hits_total counter",
+        ]
+        lines += [f'fingen_cache_hits_total{{cache="{name}"}} {hits}' for name, hits, _ in caches]
+        lines += [
+            "# HELP fingen_cache_misses_total Cache lookups that had to compute or fetch.",
+            "# TYPE fingen_cache_misses_total counter",
+        ]
+        lines += [f'fingen_cache_misses_total{{cache="{name}"}} {misses}' for name, _, misses in caches]
+        lines += [
+            "# HELP fingen_cache_hit_ratio Share of cache lookups that were hits.",
+            "# TYPE fingen_cache_hit_ratio gauge",
+        ]
+        lines += [
+            f'fingen_cache_hit_ratio{{cache="{name}"}} {hits / (hits + misses) if hits + misses else 0.0}'
+            for name, hits, misses in caches
+        ]
+    return "\n".join(lines) + "\n"
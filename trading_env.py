@@ -2,13 +2,33 @@ import gym
 from gym import spaces
 import numpy as np
 
+# Starting cash of a TradingEnv account unless another balance is given.
+DEFAULT_BALANCE = 1000
+
 class TradingEnv(gym.Env):
-    def __init__(self, prices, initial_balance=1000):
+    """Single-share trading environment.
+
+    By default observations are ``[price, balance, holding]``.  When a
+    ``features`` matrix (one row per price, see ``features.compute_features``)
+    is given, observations become ``[*features[step], balance, holding]``.
+    ``info["portfolio_value"]`` reports the value after each step.
+    Each observation is a fresh array, so callers (and SB3's
+    ``terminal_observation``) can keep them.
+    ``prices`` and float32 ``features`` are only read and never copied, so
+    read-only views from :mod:`price_arrays` can be shared by many envs.
+    """
+
+    def __init__(self, prices, initial_balance=DEFAULT_BALANCE, features=None):
         super().__init__()
         self.prices = prices
         self.initial_balance = initial_balance
+        self.features = None if features is None else np.asarray(features, dtype=np.float32)
+        if self.features is not None and len(self.features) != len(prices):
+            raise ValueError("features must have one row per price")
+        obs_size = 3 if self.features is None else self.features.shape[1] + 2
+        low = 0 if self.features is None else -np.inf
         self.action_space = spaces.Discrete(3)  # 0: Hold, 1: Buy, 2: Sell
-        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(3,), dtype=np.float32)
+        self.observation_space = spaces.Box(low=low, high=np.inf, shape=(obs_size,), dtype=np.float32)
 
 
     def reset(self):
@@ -19,8 +39,14 @@ class TradingEnv(gym.Env):
         return self._get_obs()
 
     def _get_obs(self):
-        price = self.prices[self.current_step]
-        return np.array([price, self.balance, self.holding], dtype=np.float32)
+        if self.features is None:
+            price = self.prices[self.current_step]
+            return np.array([price, self.balance, self.holding], dtype=np.float32)
+        obs = np.empty(self.features.shape[1] + 2, dtype=np.float32)
+        obs[:-2] = self.features[self.current_step]
+        obs[-2] = self.balance
+        obs[-1] = self.holding
+        return obs
 
     def step(self, action):
         price = self.prices[self.current_step]
@@ -41,7 +67,7 @@ class TradingEnv(gym.Env):
 
         reward = current_value - prev_value  # Reward is change in total value
 
-        return self._get_obs(), reward, done, {}
+        return self._get_obs(), reward, done, {"portfolio_value": current_value}
 
     def render(self):
         print(f"Step: {self.current_step}, Balance: {self.balance}, Holding: {self.holding}, Total: {self.balance + self.holding * self.prices[self.current_step]}")
@@ -1,15 +1,21 @@
+import functools
 import logging
 import os
 import random
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import gym
 import numpy as np
 from gymnasium import spaces as gym_spaces
 
 from data_utils import get_price_series
+from features import load_features
 from trading_env import TradingEnv
+from weight_trading_env import WeightTradingEnv
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from stable_baselines3.common.callbacks import BaseCallback
 
 _MPL_CACHE = Path(__file__).resolve().parent / ".matplotlib_cache"
 _MPL_CACHE.mkdir(exist_ok=True)
@@ -18,23 +24,33 @@ os.environ.setdefault("MPLCONFIGDIR", str(_MPL_CACHE))
 logging.basicConfig(level=logging.INFO)
 
 
-def _build_env_pool(tickers: list[str]) -> list[TradingEnv]:
-    envs: list[TradingEnv] = []
+def _build_env_pool(
+    tickers: list[str],
+    *,
+    use_features: bool = False,
+    weight_levels: Optional[int] = None,
+) -> list[gym.Env]:
+    envs: list[gym.Env] = []
     for ticker in tickers:
         prices = get_price_series(ticker, period="1y", min_length=120)
-        envs.append(TradingEnv(prices))
+        features = load_features(prices) if use_features else None
+        if weight_levels:
+            envs.append(WeightTradingEnv(prices, levels=weight_levels, features=features))
+        else:
+            envs.append(TradingEnv(prices, features=features))
     return envs
 
 
 class MultiEnvWrapper(gym.Env):
     """Sample a fresh environment for every episode to improve robustness."""
 
-    def __init__(self, envs: list[TradingEnv]):
+    def __init__(self, envs: list[gym.Env], *, seed: Optional[int] = None):
         super().__init__()
         if not envs:
             raise ValueError("❌ No valid ticker data found.")
         self.envs = envs
-        self.current_env = random.choice(envs)
+        self._rng = random.Random(seed)
+        self.current_env = self._rng.choice(envs)
         self.action_space = gym_spaces.Discrete(self.current_env.action_space.n)
         low = np.array(self.current_env.observation_space.low, dtype=np.float32)
         high = np.array(self.current_env.observation_space.high, dtype=np.float32)
@@ -42,7 +58,7 @@ class MultiEnvWrapper(gym.Env):
         self.metadata = getattr(self.current_env, "metadata", {})
 
     def reset(self):
-        self.current_env = random.choice(self.envs)
+        self.current_env = self._rng.choice(self.envs)
         return self.current_env.reset()
 
     def step(self, action):  # noqa: D401 - gym API
@@ -52,30 +68,174 @@ class MultiEnvWrapper(gym.Env):
         self.current_env.render()
 
     def seed(self, seed=None):
+        self._rng.seed(seed)
         for env in self.envs:
             if hasattr(env, "seed"):
                 env.seed(seed)
         return [seed]
 
 
+def _shard_tickers(tickers: list[str], n_shards: int) -> list[list[str]]:
+    """Split ``tickers`` round-robin into ``n_shards`` non-empty shards."""
+    if n_shards <= len(tickers):
+        return [tickers[idx::n_shards] for idx in range(n_shards)]
+    # More workers than tickers: every worker still gets one ticker to replay.
+    return [[tickers[idx % len(tickers)]] for idx in range(n_shards)]
+
+
+def _make_worker_env(
+    tickers: list[str],
+    seed: Optional[int],
+    use_features: bool = False,
+    weight_levels: Optional[int] = None,
+) -> MultiEnvWrapper:
+    """Build one worker's env; runs inside the subprocess so prices load once there."""
+    return MultiEnvWrapper(
+        _build_env_pool(tickers, use_features=use_features, weight_levels=weight_levels), seed=seed
+    )
+
+
+def _recorder_callback(record_dir: Path) -> "BaseCallback":
+    """Callback recording every env's steps to ``record_dir/env-<i>.steps``.
+
+    Prices are read from the first observation column (the price with or
+    without features) and portfolio values from ``info["portfolio_value"]``,
+    which every training env reports.  Each finished episode's return is
+    logged as ``trader/episode_return_pct``.
+    """
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    from recorder import EpisodeRecorder
+
+    class RecorderCallback(BaseCallback):
+        def _on_training_start(self) -> None:
+            n_envs = self.training_env.num_envs
+            self.recorders = [
+                EpisodeRecorder(spill_path=record_dir / f"env-{idx}.steps") for idx in range(n_envs)
+            ]
+            self.steps = np.zeros(n_envs, dtype=np.int64)
+            self.start_values = np.zeros(n_envs, dtype=np.float64)
+
+        def _on_step(self) -> bool:
+            # The observation the actions were chosen from, before env.step.
+            obs = self.locals["obs_tensor"].cpu().numpy()
+            actions = np.asarray(self.locals["actions"]).reshape(-1)
+            dones = self.locals["dones"]
+            infos = self.locals["infos"]
+            for idx, recorder in enumerate(self.recorders):
+                if self.steps[idx] == 0:
+                    self.start_values[idx] = obs[idx, -2] + obs[idx, -1] * obs[idx, 0]
+                value = infos[idx]["portfolio_value"]
+                recorder.record(self.steps[idx], actions[idx], obs[idx, 0], value)
+                self.steps[idx] += 1
+                if dones[idx]:
+                    start = self.start_values[idx]
+                    if start:
+                        self.logger.record_mean("trader/episode_return_pct", (value / start - 1) * 100)
+                    recorder.end_episode()
+                    self.steps[idx] = 0
+            return True
+
+        def _on_training_end(self) -> None:
+            for recorder in self.recorders:
+                recorder.flush()
+            logging.info("Recorded %d steps to %s", sum(map(len, self.recorders)), record_dir)
+
+    return RecorderCallback()
+
+
 def train_trader_model(
     *,
     tickers: Optional[list[str]] = None,
     total_timesteps: int = 20_000,
     model_path: str = "trader_model.zip",
+    n_envs: int = 1,
+    n_procs: int = 1,
+    seed: Optional[int] = None,
+    use_features: bool = False,
+    record_dir: Optional[str] = None,
+    weight_levels: Optional[int] = None,
 ) -> None:
-    """Train the PPO trader and persist it locally."""
+    """Train the PPO trader and persist it locally.
+
+    With ``n_envs > 1`` the tickers are stepped together in a single
+    :class:`~batch_trading_env.BatchTradingEnv` so every PPO rollout step
+    collects ``n_envs`` transitions.  With ``n_procs > 1`` rollouts are
+    collected by a ``SubprocVecEnv`` instead: the tickers are sharded across
+    ``n_procs`` worker processes, which map the shared read-only price arrays
+    (see :mod:`price_arrays`) instead of holding private copies.
+    ``seed`` seeds PPO and worker ``i`` with ``seed + i`` for reproducible runs.
+    ``use_features`` adds the precomputed indicators from :mod:`features` to
+    each observation; models trained this way expect the wider observation.
+    ``record_dir`` keeps every training step as :mod:`recorder` files there.
+    ``weight_levels`` trains on :class:`~weight_trading_env.WeightTradingEnv`
+    with that many target-weight actions instead of one-share trades; such
+    models are for research and backtests, the dashboard expects the
+    one-share action space.
+    """
     from stable_baselines3 import PPO
 
+    if n_envs > 1 and n_procs > 1:
+        raise ValueError("Use either n_envs (single-process batch) or n_procs, not both.")
+    if n_envs > 1 and use_features:
+        raise ValueError("BatchTradingEnv only supports the [price, balance, holding] observation.")
+    if n_envs > 1 and weight_levels:
+        raise ValueError("BatchTradingEnv only supports one-share actions.")
+
     tickers = tickers or ["AAPL", "MSFT", "GOOG", "TSLA", "AMZN", "JPM"]
-    env_pool = _build_env_pool(tickers)
-    env = MultiEnvWrapper(env_pool)
-    model = PPO("MlpPolicy", env, verbose=1)
-    model.learn(total_timesteps=total_timesteps)
+    if n_procs > 1:
+        from stable_baselines3.common.vec_env import SubprocVecEnv
+
+        env_fns = [
+            functools.partial(
+                _make_worker_env,
+                shard,
+                None if seed is None else seed + idx,
+                use_features,
+                weight_levels,
+            )
+            for idx, shard in enumerate(_shard_tickers(tickers, n_procs))
+        ]
+        env = SubprocVecEnv(env_fns)
+    elif n_envs > 1:
+        from batch_trading_env import BatchTradingEnv
+
+        env_pool = _build_env_pool(tickers)
+        env = BatchTradingEnv([pool_env.prices for pool_env in env_pool], n_envs=n_envs, seed=seed)
+    else:
+        env = MultiEnvWrapper(
+            _build_env_pool(tickers, use_features=use_features, weight_levels=weight_levels),
+            seed=seed,
+        )
+    model = PPO("MlpPolicy", env, verbose=1, seed=seed)
+    callback = _recorder_callback(Path(record_dir)) if record_dir else None
+    model.learn(total_timesteps=total_timesteps, callback=callback)
     save_path = model_path[:-4] if model_path.endswith(".zip") else model_path
     model.save(save_path)
+    env.close()
     logging.info("✅ Training complete. Model saved to %s", model_path)
 
 
 if __name__ == "__main__":
-    train_trader_model()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the PPO trader model.")
+    parser.add_argument("--timesteps", type=int, default=20_000)
+    parser.add_argument("--n-envs", type=int, default=1)
+    parser.add_argument("--n-procs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--features", action="store_true", help="observe precomputed indicators")
+    parser.add_argument("--record", metavar="DIR", default=None, help="record every training step")
+    parser.add_argument(
+        "--weight-levels", type=int, default=None, help="train target-weight actions with N levels"
+    )
+    args = parser.parse_args()
+    train_trader_model(
+        total_timesteps=args.timesteps,
+        n_envs=args.n_envs,
+        n_procs=args.n_procs,
+        seed=args.seed,
+        use_features=args.features,
+        record_dir=args.record,
+        weight_levels=args.weight_levels,
+    )
@@ -1,3 +1,6 @@
+import os
+import threading
+
 from flask import Flask
 
 
@@ -7,4 +10,6 @@ def create_app() -> Flask:
     from . import routes  # noqa: WPS433
 
     routes.init_app(app)
+    if os.environ.get("FINGEN_WARMUP", "0") == "1":
+        threading.Thread(target=routes.warmup, name="fingen-warmup", daemon=True).start()
     return app
@@ -1,24 +1,119 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any, Dict
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
 
-from flask import Blueprint, jsonify, render_template, request
+from flask import Blueprint, Response, g, jsonify, render_template, request, url_for
 
-from analytics import fetch_returns_plot, figure_to_data_url
-from run_pipeline import run_agent_pipeline
-from test_trader import run_trader_simulation
-from ticker_search import search_tickers
+import tracing
+from stage_graph import Stage, run_graph
+
+# The agent, trading and charting modules pull in OpenAI, yfinance, pandas,
+# matplotlib and torch.  They are imported inside the handlers so that the
+# app (and every forked worker) boots without loading them; call
+# ``warmup()`` to pay that cost up front instead.
 
 LOGGER = logging.getLogger(__name__)
 
 blueprint = Blueprint("web", __name__)
 
+# Seconds each /api/run stage may take once its inputs are ready.
+STAGE_TIMEOUTS = {
+    "summary": 60.0,
+    "strategy": 60.0,
+    "trader": 90.0,
+    "returns": 30.0,
+}
+
+# Largest watchlist accepted by /api/run/batch in one request.
+MAX_BATCH_TICKERS = 500
+
+# Overall budget for /api/run/stream before unfinished stages are reported.
+STREAM_TIMEOUT = 180.0
+
+# Upper bound on the timesteps a single /api/train request may ask for.
+MAX_TRAIN_TIMESTEPS = 1_000_000
+
+# Seconds between job status checks in /api/jobs/<id>/events.
+JOB_POLL_INTERVAL = 1.0
+
+# Add a Server-Timing header to every response, not only to requests that
+# ask for it with ``X-Fingen-Timing: 1``.
+SERVER_TIMING = os.environ.get("FINGEN_SERVER_TIMING", "0") == "1"
+
+# Browser cache lifetimes (seconds) for /logo responses and misses.
+LOGO_MAX_AGE = 7 * 24 * 60 * 60
+LOGO_MISS_MAX_AGE = 60 * 60
+
+_STAGE_DONE = "__stage_done__"
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="api-run")
+
 
 def init_app(app):  # type: ignore[no-untyped-def]
     app.register_blueprint(blueprint)
 
 
+def warmup() -> None:
+    """Import the heavy modules, build the OpenAI client and load the trader model.
+
+    Intended for a background thread at startup (``FINGEN_WARMUP=1``) or a
+    gunicorn ``post_fork`` hook, so the first request does not pay for it.
+    """
+    started = time.perf_counter()
+    import analytics  # noqa: F401
+    import run_pipeline  # noqa: F401
+    import test_trader
+    import ticker_search  # noqa: F401
+    from openai_client import get_client
+
+    try:
+        get_client()
+    except ValueError as exc:
+        LOGGER.warning("Skipping OpenAI client warmup: %s", exc)
+    if test_trader.MODEL_PATH.exists():
+        test_trader.registry.get_policy(test_trader.MODEL_PATH)
+    LOGGER.info("Warmup finished in %.2fs", time.perf_counter() - started)
+
+
+@blueprint.before_app_request
+def _start_request_trace() -> None:
+    if tracing.ENABLED:
+        g.trace_started = time.perf_counter()
+        g.trace_token, g.trace_timings = tracing.start_timings()
+
+
+@blueprint.after_app_request
+def _finish_request_trace(response: Response) -> Response:
+    started = g.pop("trace_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    tracing.REQUEST_SECONDS.observe(elapsed, endpoint, request.method)
+    if SERVER_TIMING or request.headers.get("X-Fingen-Timing") == "1":
+        timings = [*g.trace_timings, ("total", elapsed)]
+        response.headers["Server-Timing"] = tracing.server_timing_header(timings)
+    return response
+
+
+@blueprint.teardown_app_request
+def _stop_request_trace(_exc: Optional[BaseException]) -> None:
+    token = g.pop("trace_token", None)
+    if token is not None:
+        tracing.stop_timings(token)
+
+
+@blueprint.get("/metrics")
+def metrics():  # type: ignore[no-untyped-def]
+    return Response(tracing.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @blueprint.route("/")
 def index():  # type: ignore[no-untyped-def]
     return render_template("index.html")
@@ -30,21 +125,159 @@ def api_search():  # type: ignore[no-untyped-def]
     if len(query) < 2:
         return jsonify([])
 
+    from ticker_search import search_tickers
+
     suggestions = search_tickers(query)
     return jsonify(
         [
             {
                 "label": item["label"],
                 "symbol": item["symbol"],
-                "logo": item["logo_data_url"],
+                "logo": item["logo_url"],
             }
             for item in suggestions
         ]
     )
 
 
+@blueprint.get("/logo/<symbol>")
+def logo(symbol: str):  # type: ignore[no-untyped-def]
+    from logo_store import get_store
+
+    found = get_store().for_symbol(symbol.upper())
+    if found is None:
+        response = Response(status=404)
+        response.cache_control.public = True
+        response.cache_control.max_age = LOGO_MISS_MAX_AGE
+        return response
+
+    response = Response(found.data, mimetype=found.content_type)
+    response.set_etag(found.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = LOGO_MAX_AGE
+    return response.make_conditional(request)
+
+
 @blueprint.post("/api/run")
 def api_run():  # type: ignore[no-untyped-def]
+    """Run the dashboard pipeline.
+
+    With ``"async": true`` the run is queued as a job and the response is
+    ``202`` with its ``jobId``; poll ``/api/jobs/<id>`` for the result.
+    """
+    payload: Dict[str, Any] = request.get_json(force=True)
+
+    ticker = payload.get("ticker")
+    if not ticker:
+        return jsonify({"error": "Ticker is required"}), 400
+
+    params = {
+        "ticker": ticker,
+        "risk": payload.get("risk", "moderate"),
+        "period": payload.get("period", "5y"),
+        "freq": payload.get("freq", "Y"),
+        "chart_format": payload.get("chartFormat", "png"),
+    }
+    training_job = _train_if_missing()
+
+    if payload.get("async"):
+        from jobs import get_queue
+
+        try:
+            priority = payload.get("priority")
+            priority = int(priority) if priority is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "priority must be an integer"}), 400
+        job = get_queue().submit("run", params, priority=priority)
+        return _job_accepted(job)
+
+    LOGGER.info("Running pipeline for ticker=%s risk=%s", ticker, params["risk"])
+    response = _run_response(**params)
+    if training_job is not None:
+        response["trainingJob"] = training_job
+    return jsonify(response)
+
+
+@blueprint.post("/api/train")
+def api_train():  # type: ignore[no-untyped-def]
+    """Queue a trader training job and return ``202`` with its ``jobId``."""
+    from jobs import get_queue
+    from test_trader import MODEL_PATH
+
+    payload: Dict[str, Any] = request.get_json(silent=True) or {}
+    try:
+        timesteps = int(payload.get("timesteps", 20_000))
+        seed = payload.get("seed")
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "timesteps and seed must be integers"}), 400
+    if not 0 < timesteps <= MAX_TRAIN_TIMESTEPS:
+        return jsonify({"error": f"timesteps must be between 1 and {MAX_TRAIN_TIMESTEPS}"}), 400
+    tickers = payload.get("tickers")
+    if tickers is not None and (not isinstance(tickers, list) or not tickers):
+        return jsonify({"error": "tickers must be a non-empty list"}), 400
+
+    params = {"total_timesteps": timesteps, "model_path": str(MODEL_PATH), "seed": seed}
+    if tickers:
+        params["tickers"] = [str(ticker).upper() for ticker in tickers]
+    # Any unfinished training of the same model file counts as a duplicate.
+    job = get_queue().submit("train", params, unique=True, unique_on=("model_path",))
+    return _job_accepted(job)
+
+
+@blueprint.get("/api/jobs/<job_id>")
+def api_job(job_id: str):  # type: ignore[no-untyped-def]
+    from jobs import get_queue
+
+    job = get_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(_job_json(job))
+
+
+@blueprint.get("/api/jobs/<job_id>/events")
+def api_job_events(job_id: str):  # type: ignore[no-untyped-def]
+    """Server-sent ``status`` events on every job state change, then ``done``."""
+    from jobs import FINISHED, get_queue
+
+    queue_ = get_queue()
+    if queue_.get(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    def generate() -> Iterator[str]:
+        last_status = None
+        while True:
+            job = queue_.wait(job_id, timeout=JOB_POLL_INTERVAL, poll=JOB_POLL_INTERVAL)
+            if job is None:
+                return
+            if job.status in FINISHED:
+                yield _sse("done", _job_json(job))
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield _sse("status", _job_json(job))
+            else:
+                yield ": keep-alive\n\n"
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@blueprint.post("/api/run/stream")
+def api_run_stream():  # type: ignore[no-untyped-def]
+    """Server-sent events version of /api/run.
+
+    Analyst and strategist tokens are forwarded as ``summary``/``strategy``
+    events while the completions stream in; the ``trader`` and ``returns``
+    charts follow as soon as each is ready.  ``error`` reports a failed stage
+    and ``done`` closes the stream.  When the summary stream fails partway,
+    ``error`` names the ``summary`` stage and the strategist is not run on
+    the partial report.  ``chartFormat: "json"`` sends chart
+    series instead of PNGs, as for /api/run.
+    """
     payload: Dict[str, Any] = request.get_json(force=True)
 
     ticker = payload.get("ticker")
@@ -54,22 +287,253 @@ def api_run():  # type: ignore[no-untyped-def]
     risk = payload.get("risk", "moderate")
     period = payload.get("period", "5y")
     freq = payload.get("freq", "Y")
+    chart_format = payload.get("chartFormat", "png")
 
-    LOGGER.info("Running pipeline for ticker=%s risk=%s", ticker, risk)
+    LOGGER.info("Streaming pipeline for ticker=%s risk=%s", ticker, risk)
+    _train_if_missing()
 
-    summary, strategy = run_agent_pipeline(ticker=ticker, risk_profile=risk)
-    trader_fig, trader_stats = run_trader_simulation(ticker=ticker, close_figure=False)
-    trader_chart = figure_to_data_url(trader_fig)
+    events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
 
-    returns_fig = fetch_returns_plot(ticker, period=period, freq=freq)
-    returns_chart = figure_to_data_url(returns_fig) if returns_fig else None
+    from analyst_agent import stream_analyst_summary
+    from strategist_agent import stream_strategy
 
-    return jsonify(
+    def agents() -> None:
+        summary = _forward("summary", stream_analyst_summary(ticker=ticker, risk_profile=risk), events)
+        if summary is not None:
+            _forward("strategy", stream_strategy(summary, risk_profile=risk), events)
+
+    def trader() -> None:
+        events.put(("trader", _trader_stage(ticker, chart_format)))
+
+    def returns() -> None:
+        events.put(("returns", _returns_stage(ticker, period, freq, chart_format)))
+
+    producers = {"agents": agents, "trader": trader, "returns": returns}
+    for name, producer in producers.items():
+        _EXECUTOR.submit(_produce, name, producer, events)
+
+    return Response(
+        _sse_stream(events, set(producers)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@blueprint.post("/api/run/batch")
+def api_run_batch():  # type: ignore[no-untyped-def]
+    """Run the agent pipeline for many tickers, streaming NDJSON as each finishes."""
+    payload: Dict[str, Any] = request.get_json(force=True)
+
+    tickers = payload.get("tickers")
+    if not isinstance(tickers, list) or not tickers:
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    risk = payload.get("risk", "moderate")
+    LOGGER.info("Running batch pipeline for %s tickers risk=%s", len(tickers), risk)
+
+    from run_pipeline import run_agent_pipeline_batch
+
+    def generate() -> Iterator[str]:
+        for result in run_agent_pipeline_batch([str(t) for t in tickers], risk_profile=risk):
+            yield json.dumps(result) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+def _forward(stage: str, tokens: Iterator[str], events: "queue.Queue") -> Optional[str]:
+    """Forward streamed ``tokens`` as ``stage`` events; returns the full text or ``None`` on failure."""
+    parts = []
+    try:
+        for token in tokens:
+            parts.append(token)
+            events.put((stage, {"delta": token}))
+    except Exception as exc:  # noqa: BLE001 - surface failures as stream events
+        LOGGER.warning("Stream stage %s failed after %d pieces: %s", stage, len(parts), exc)
+        events.put(("error", {"stage": stage, "error": type(exc).__name__}))
+        return None
+    return "".join(parts).strip()
+
+
+def _produce(name: str, producer: Callable[[], None], events: "queue.Queue") -> None:
+    try:
+        producer()
+    except Exception as exc:  # noqa: BLE001 - surface failures as stream events
+        LOGGER.warning("Stream stage %s failed: %s", name, exc)
+        events.put(("error", {"stage": name, "error": type(exc).__name__}))
+    finally:
+        events.put((_STAGE_DONE, name))
+
+
+def _sse_stream(events: "queue.Queue", remaining: Set[str]) -> Iterator[str]:
+    deadline = time.monotonic() + STREAM_TIMEOUT
+    yield _sse("start", {"stages": sorted(remaining)})
+    while remaining:
+        try:
+            event, data = events.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            for name in sorted(remaining):
+                yield _sse("error", {"stage": name, "error": "timeout"})
+            break
+        if event == _STAGE_DONE:
+            remaining.discard(data)
+            continue
+        yield _sse(event, data)
+    yield _sse("done", {})
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _run_response(
+    ticker: str,
+    risk: str,
+    period: str,
+    freq: str,
+    chart_format: str,
+) -> Dict[str, Any]:
+    """Run every /api/run stage and shape the JSON response."""
+    stages = _build_run_stages(ticker, risk, period, freq, chart_format)
+    results, errors = run_graph(stages, _EXECUTOR)
+    trader = results.get("trader") or {}
+    returns = results.get("returns") or {}
+
+    response: Dict[str, Any] = {
+        "summary": results.get("summary"),
+        "strategy": results.get("strategy"),
+        "traderStats": trader.get("stats"),
+        "traderChart": trader.get("chart"),
+        "traderSeries": trader.get("series"),
+        "returnsChart": returns.get("chart"),
+        "returnsSeries": returns.get("series"),
+    }
+    if errors:
+        response["errors"] = errors
+    return response
+
+
+def run_job(
+    *,
+    ticker: str,
+    risk: str = "moderate",
+    period: str = "5y",
+    freq: str = "Y",
+    chart_format: str = "png",
+) -> Dict[str, Any]:
+    """Job-queue entry point for ``/api/run`` with ``"async": true``."""
+    LOGGER.info("Running queued pipeline for ticker=%s risk=%s", ticker, risk)
+    return _run_response(ticker, risk, period, freq, chart_format)
+
+
+def _train_if_missing() -> Optional[str]:
+    """Queue a training job when no trader model exists; returns its ID.
+
+    The trader stage fails with ``ModelNotReady`` until the job finishes,
+    but the request itself never waits for training.
+    """
+    from test_trader import MODEL_PATH
+
+    if MODEL_PATH.exists():
+        return None
+    from jobs import get_queue
+
+    job = get_queue().submit(
+        "train", {"model_path": str(MODEL_PATH)}, unique=True, unique_on=("model_path",)
+    )
+    return job.id
+
+
+def _job_json(job: Any) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "createdAt": job.created_at,
+        "startedAt": job.started_at,
+        "finishedAt": job.finished_at,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def _job_accepted(job: Any):  # type: ignore[no-untyped-def]
+    response = jsonify(
         {
-            "summary": summary,
-            "strategy": strategy,
-            "traderStats": trader_stats,
-            "traderChart": trader_chart,
-            "returnsChart": returns_chart,
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": url_for("web.api_job", job_id=job.id),
+            "eventsUrl": url_for("web.api_job_events", job_id=job.id),
         }
     )
+    response.status_code = 202
+    response.headers["Location"] = url_for("web.api_job", job_id=job.id)
+    return response
+
+
+def _trader_stage(ticker: str, chart_format: str) -> Dict[str, Any]:
+    """Trader stats plus either the chart ``series`` (JSON) or a cached PNG ``chart``."""
+    from analytics import figure_to_data_url, render_cache
+    from price_store import get_store
+    from test_trader import model_version, trader_figure, trader_series
+
+    if chart_format == "json":
+        series = trader_series(ticker)
+        return {"stats": series.pop("stats"), "series": series}
+
+    def render() -> Dict[str, Any]:
+        series = trader_series(ticker)
+        return {"stats": series["stats"], "chart": figure_to_data_url(trader_figure(series))}
+
+    # trader_series reads 3 months of daily closes; a refresh rewrites that entry.
+    prices = get_store().entry_version(ticker, period="3mo")
+    return render_cache.get_or_render(("trader", ticker, model_version(), prices), render)
+
+
+def _returns_stage(ticker: str, period: str, freq: str, chart_format: str) -> Dict[str, Any]:
+    """Historical returns as a chart ``series`` (JSON) or a cached PNG ``chart``."""
+    from analytics import figure_to_data_url, render_cache, returns_figure, returns_series
+    from price_store import get_store
+
+    if chart_format == "json":
+        return {"series": returns_series(ticker, period=period, freq=freq)}
+
+    def render() -> Dict[str, Any]:
+        series = returns_series(ticker, period=period, freq=freq)
+        return {"chart": figure_to_data_url(returns_figure(series)) if series else None}
+
+    prices = get_store().entry_version(ticker, period=period)
+    return render_cache.get_or_render(("returns", ticker, period, freq, prices), render)
+
+
+def _build_run_stages(
+    ticker: str,
+    risk: str,
+    period: str,
+    freq: str,
+    chart_format: str = "png",
+) -> Dict[str, Stage]:
+    """Describe /api/run as a graph: only the strategist waits on another stage."""
+    from analyst_agent import generate_analyst_summary
+    from strategist_agent import generate_strategy
+
+    def summary_stage() -> str:
+        return generate_analyst_summary(ticker=ticker, risk_profile=risk)
+
+    def strategy_stage(summary: str) -> str:
+        return generate_strategy(summary, risk_profile=risk)
+
+    return {
+        "summary": Stage(summary_stage, timeout=STAGE_TIMEOUTS["summary"]),
+        "strategy": Stage(strategy_stage, deps=("summary",), timeout=STAGE_TIMEOUTS["strategy"]),
+        "trader": Stage(
+            lambda: _trader_stage(ticker, chart_format),
+            timeout=STAGE_TIMEOUTS["trader"],
+        ),
+        "returns": Stage(
+            lambda: _returns_stage(ticker, period, freq, chart_format),
+            timeout=STAGE_TIMEOUTS["returns"],
+        ),
+    }
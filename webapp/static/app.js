@@ -20,6 +20,8 @@
     const returnsEmpty = document.getElementById('returns-empty');
 
     const HIDDEN_CLASS = 'hidden';
+    const CHART_SIZE = { width: 1000, height: 400 };
+    const CHART_PADDING = { top: 44, right: 24, bottom: 72, left: 76 };
     const MUTED_CLASS = 'muted';
     const MIN_QUERY_LENGTH = 2;
 
@@ -99,6 +101,8 @@
             img.className = 'search-result__logo';
             img.src = logo;
             img.alt = `${symbol} logo`;
+            img.loading = 'lazy';
+            img.addEventListener('error', () => img.remove());
             button.appendChild(img);
         }
 
@@ -280,6 +284,223 @@
         }
     }
 
+    function createChart(title) {
+        const canvas = document.createElement('canvas');
+        canvas.width = CHART_SIZE.width;
+        canvas.height = CHART_SIZE.height;
+        const ctx = canvas.getContext('2d');
+        ctx.fillStyle = '#ffffff';
+        ctx.fillRect(0, 0, canvas.width, canvas.height);
+        ctx.fillStyle = '#111827';
+        ctx.font = '600 18px Manrope, sans-serif';
+        ctx.textAlign = 'center';
+        ctx.fillText(title || '', canvas.width / 2, 26);
+        const plot = {
+            x: CHART_PADDING.left,
+            y: CHART_PADDING.top,
+            w: canvas.width - CHART_PADDING.left - CHART_PADDING.right,
+            h: canvas.height - CHART_PADDING.top - CHART_PADDING.bottom,
+        };
+        return { canvas, ctx, plot };
+    }
+
+    function drawValueAxis(ctx, plot, min, max, format) {
+        ctx.strokeStyle = '#e5e7eb';
+        ctx.fillStyle = '#4b5563';
+        ctx.font = '12px Manrope, sans-serif';
+        ctx.textAlign = 'right';
+        ctx.lineWidth = 1;
+        const ticks = 5;
+        for (let i = 0; i <= ticks; i += 1) {
+            const value = min + ((max - min) * i) / ticks;
+            const y = plot.y + plot.h - (plot.h * i) / ticks;
+            ctx.beginPath();
+            ctx.moveTo(plot.x, y);
+            ctx.lineTo(plot.x + plot.w, y);
+            ctx.stroke();
+            ctx.fillText(format(value), plot.x - 8, y + 4);
+        }
+    }
+
+    function valueRange(values) {
+        let min = Math.min(...values);
+        let max = Math.max(...values);
+        if (min === max) {
+            min -= 1;
+            max += 1;
+        }
+        return { min, max };
+    }
+
+    function drawTriangle(ctx, x, y, up) {
+        const size = 6;
+        ctx.beginPath();
+        ctx.moveTo(x, up ? y - size : y + size);
+        ctx.lineTo(x - size, up ? y + size : y - size);
+        ctx.lineTo(x + size, up ? y + size : y - size);
+        ctx.closePath();
+        ctx.fill();
+    }
+
+    function drawTraderChart(series) {
+        const values = series && series.portfolio_values;
+        if (!values || !values.length) {
+            return null;
+        }
+        const { canvas, ctx, plot } = createChart(series.title);
+        const { min, max } = valueRange(values);
+        const xAt = (i) => plot.x + (values.length > 1 ? (plot.w * i) / (values.length - 1) : 0);
+        const yAt = (v) => plot.y + plot.h - ((v - min) / (max - min)) * plot.h;
+
+        drawValueAxis(ctx, plot, min, max, (v) => `$${v.toFixed(0)}`);
+        ctx.strokeStyle = '#1f77b4';
+        ctx.lineWidth = 2;
+        ctx.beginPath();
+        values.forEach((value, i) => {
+            if (i === 0) {
+                ctx.moveTo(xAt(i), yAt(value));
+            } else {
+                ctx.lineTo(xAt(i), yAt(value));
+            }
+        });
+        ctx.stroke();
+
+        ctx.fillStyle = 'green';
+        (series.buy_steps || []).forEach((i) => drawTriangle(ctx, xAt(i), yAt(values[i]), true));
+        ctx.fillStyle = 'red';
+        (series.sell_steps || []).forEach((i) => drawTriangle(ctx, xAt(i), yAt(values[i]), false));
+        return canvas.toDataURL('image/png');
+    }
+
+    function drawReturnsChart(series) {
+        const values = series && series.values;
+        if (!values || !values.length) {
+            return null;
+        }
+        const { canvas, ctx, plot } = createChart(series.title);
+        const { min, max } = valueRange(values.concat([0]));
+        const yAt = (v) => plot.y + plot.h - ((v - min) / (max - min)) * plot.h;
+        const slot = plot.w / values.length;
+
+        drawValueAxis(ctx, plot, min, max, (v) => `${v.toFixed(1)}%`);
+        ctx.lineWidth = 1;
+        values.forEach((value, i) => {
+            const x = plot.x + slot * i + slot * 0.15;
+            const top = yAt(Math.max(value, 0));
+            const height = Math.abs(yAt(value) - yAt(0));
+            ctx.fillStyle = 'skyblue';
+            ctx.fillRect(x, top, slot * 0.7, height);
+            ctx.strokeStyle = '#000000';
+            ctx.strokeRect(x, top, slot * 0.7, height);
+
+            ctx.save();
+            ctx.translate(x + slot * 0.35, plot.y + plot.h + 8);
+            ctx.rotate(-Math.PI / 2);
+            ctx.fillStyle = '#4b5563';
+            ctx.font = '11px Manrope, sans-serif';
+            ctx.textAlign = 'right';
+            ctx.fillText(series.labels[i], 0, 4);
+            ctx.restore();
+        });
+        return canvas.toDataURL('image/png');
+    }
+
+    function renderChart(image, src) {
+        if (src) {
+            image.src = src;
+            image.classList.remove(HIDDEN_CLASS);
+            image.removeAttribute('aria-hidden');
+        } else {
+            image.classList.add(HIDDEN_CLASS);
+            image.setAttribute('aria-hidden', 'true');
+        }
+    }
+
+    function renderReturnsChart(src) {
+        renderChart(returnsChart, src);
+        returnsEmpty.classList.toggle(HIDDEN_CLASS, Boolean(src));
+    }
+
+    function reportCompletion(failedStages) {
+        if (failedStages.length) {
+            setStatus('info', `Partial results: ${failedStages.join(', ')} did not complete.`);
+        } else {
+            setStatus('success', 'Analysis complete. Review the insights below.');
+        }
+    }
+
+    function parseSseBlock(block) {
+        let event = 'message';
+        const dataLines = [];
+        block.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trimStart());
+            }
+        });
+        if (!dataLines.length) {
+            return null;
+        }
+        return { event, data: JSON.parse(dataLines.join('\n')) };
+    }
+
+    async function consumeRunStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const failedStages = [];
+        let buffer = '';
+        let summaryText = '';
+        let strategyText = '';
+
+        renderTextBlock(analystOutput, '');
+        renderTextBlock(strategistOutput, '');
+        renderStats(null);
+        renderChart(traderChart, null);
+        renderChart(returnsChart, null);
+        returnsEmpty.classList.add(HIDDEN_CLASS);
+        resultsPanel.classList.remove(HIDDEN_CLASS);
+
+        const handlers = {
+            summary(data) {
+                summaryText += data.delta;
+                renderTextBlock(analystOutput, summaryText);
+            },
+            strategy(data) {
+                strategyText += data.delta;
+                renderTextBlock(strategistOutput, strategyText);
+            },
+            trader(data) {
+                renderStats(data.stats);
+                renderChart(traderChart, data.chart || drawTraderChart(data.series));
+            },
+            returns(data) {
+                renderReturnsChart(data.chart || drawReturnsChart(data.series));
+            },
+            error(data) {
+                failedStages.push(data.stage);
+            },
+        };
+
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let boundary = buffer.indexOf('\n\n');
+            while (boundary !== -1) {
+                const message = parseSseBlock(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                if (message && handlers[message.event]) {
+                    handlers[message.event](message.data);
+                }
+                boundary = buffer.indexOf('\n\n');
+            }
+        }
+        reportCompletion(failedStages);
+    }
+
     async function handleRunAgents() {
         if (!state.selectedTicker) {
             return;
@@ -294,11 +515,11 @@
         toggleLoading(true);
 
         try {
-            const response = await fetch(config.runEndpoint, {
+            const response = await fetch(config.streamEndpoint || config.runEndpoint, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                    'Accept': 'application/json',
+                    'Accept': config.streamEndpoint ? 'text/event-stream' : 'application/json',
                 },
                 signal: controller.signal,
                 body: JSON.stringify({
@@ -306,6 +527,7 @@
                     risk: riskSelect.value,
                     period: periodSelect.value,
                     freq: freqSelect.value,
+                    chartFormat: 'json',
                 }),
             });
 
@@ -315,33 +537,18 @@
                 throw new Error(message);
             }
 
-            const data = await response.json();
-            renderTextBlock(analystOutput, data.summary);
-            renderTextBlock(strategistOutput, data.strategy);
-            renderStats(data.traderStats);
-
-            if (data.traderChart) {
-                traderChart.src = data.traderChart;
-                traderChart.classList.remove(HIDDEN_CLASS);
-                traderChart.removeAttribute('aria-hidden');
-            } else {
-                traderChart.classList.add(HIDDEN_CLASS);
-                traderChart.setAttribute('aria-hidden', 'true');
-            }
-
-            if (data.returnsChart) {
-                returnsChart.src = data.returnsChart;
-                returnsChart.classList.remove(HIDDEN_CLASS);
-                returnsChart.removeAttribute('aria-hidden');
-                returnsEmpty.classList.add(HIDDEN_CLASS);
+            if (config.streamEndpoint) {
+                await consumeRunStream(response);
             } else {
-                returnsChart.classList.add(HIDDEN_CLASS);
-                returnsChart.setAttribute('aria-hidden', 'true');
-                returnsEmpty.classList.remove(HIDDEN_CLASS);
+                const data = await response.json();
+                renderTextBlock(analystOutput, data.summary);
+                renderTextBlock(strategistOutput, data.strategy);
+                renderStats(data.traderStats);
+                renderChart(traderChart, data.traderChart || drawTraderChart(data.traderSeries));
+                renderReturnsChart(data.returnsChart || drawReturnsChart(data.returnsSeries));
+                resultsPanel.classList.remove(HIDDEN_CLASS);
+                reportCompletion(Object.keys(data.errors || {}));
             }
-
-            resultsPanel.classList.remove(HIDDEN_CLASS);
-            setStatus('success', 'Analysis complete. Review the insights below.');
         } catch (error) {
             if (error.name === 'AbortError') {
                 setStatus('info', 'Previous analysis cancelled.');
@@ -0,0 +1,150 @@
+"""Trading environment whose actions set a target portfolio weight.
+
+:class:`trading_env.TradingEnv` trades exactly one share per step, which
+leaves a 1000-dollar account almost idle on high-priced tickers and needs
+many steps to build or unwind a position.  :class:`WeightTradingEnv` instead
+lets each action choose the fraction of the portfolio to hold in the ticker,
+trading fractional shares to get there in one step, and charges a
+proportional fee and slippage on every rebalance.
+
+The account state is kept in plain Python floats, so a step allocates
+nothing but the returned observation.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import gym
+import numpy as np
+from gym import spaces
+
+DEFAULT_FEE_RATE = 0.001
+DEFAULT_SLIPPAGE = 0.0005
+
+
+def weight_levels(levels: int) -> np.ndarray:
+    """Target weights ``0, 1/(levels-1), ..., 1`` selected by a discrete action."""
+    if levels < 2:
+        raise ValueError("levels must be at least 2")
+    return np.linspace(0.0, 1.0, levels)
+
+
+def rebalance(
+    cash: float,
+    shares: float,
+    price: float,
+    weight: float,
+    fee_rate: float,
+    slippage: float,
+) -> tuple[float, float]:
+    """Return ``(cash, shares)`` after moving to ``weight`` of the portfolio at ``price``.
+
+    Buys fill at ``price * (1 + slippage)`` and sells at ``price * (1 - slippage)``;
+    ``fee_rate`` is charged on the filled notional.  Buys are scaled down to
+    what the cash covers including costs, so cash never goes negative.
+    """
+    target = weight * (cash + shares * price) / price
+    delta = target - shares
+    if delta > 0:
+        unit_cost = price * (1.0 + slippage) * (1.0 + fee_rate)
+        delta = min(delta, cash / unit_cost)
+        return cash - delta * unit_cost, shares + delta
+    if delta < 0:
+        unit_proceeds = price * (1.0 - slippage) * (1.0 - fee_rate)
+        return cash - delta * unit_proceeds, shares + delta
+    return cash, shares
+
+
+class WeightTradingEnv(gym.Env):
+    """Long-only trading environment with target-weight actions and costs.
+
+    With an integer ``levels`` the action space is ``Discrete(levels)`` and
+    action ``i`` targets weight ``i / (levels - 1)``; with ``levels=None`` it
+    is a ``Box(0, 1, (1,))`` holding the weight itself.  Observations are
+    ``[price, balance, weight]`` (or ``[*features[step], balance, weight]``),
+    where ``weight`` is the current fraction of the portfolio held in the
+    ticker.  The reward is the change in portfolio value, as in ``TradingEnv``,
+    and the value itself is reported as ``info["portfolio_value"]``.
+    Like ``TradingEnv``, ``prices`` and ``features`` are only read, and each
+    returned observation is a copy the caller may keep.
+    """
+
+    def __init__(
+        self,
+        prices,
+        initial_balance=1000,
+        *,
+        levels: Optional[int] = 5,
+        fee_rate: float = DEFAULT_FEE_RATE,
+        slippage: float = DEFAULT_SLIPPAGE,
+        features=None,
+    ):
+        super().__init__()
+        self.prices = prices
+        self.initial_balance = initial_balance
+        self.fee_rate = float(fee_rate)
+        self.slippage = float(slippage)
+        self.features = None if features is None else np.asarray(features, dtype=np.float32)
+        if self.features is not None and len(self.features) != len(prices):
+            raise ValueError("features must have one row per price")
+
+        if levels is None:
+            self._weights = None
+            self.action_space = spaces.Box(low=0.0, high=1.0, shape=(1,), dtype=np.float32)
+        else:
+            self._weights = weight_levels(levels).tolist()
+            self.action_space = spaces.Discrete(levels)
+        obs_size = 3 if self.features is None else self.features.shape[1] + 2
+        low = 0 if self.features is None else -np.inf
+        self.observation_space = spaces.Box(low=low, high=np.inf, shape=(obs_size,), dtype=np.float32)
+
+    def reset(self):
+        self.current_step = 0
+        self.balance = float(self.initial_balance)
+        self.holding = 0.0
+        self.total_asset = self.balance
+        self._price = float(self.prices[0])
+        return self._get_obs()
+
+    def _get_obs(self):
+        value = self.total_asset
+        weight = self.holding * self._price / value if value > 0 else 0.0
+        if self.features is None:
+            return np.array([self._price, self.balance, weight], dtype=np.float32)
+        obs = np.empty(self.features.shape[1] + 2, dtype=np.float32)
+        obs[:-2] = self.features[self.current_step]
+        obs[-2] = self.balance
+        obs[-1] = weight
+        return obs
+
+    def target_weight(self, action) -> float:
+        if self._weights is not None:
+            return self._weights[int(action)]
+        weight = float(action[0]) if np.ndim(action) else float(action)
+        return min(max(weight, 0.0), 1.0)
+
+    def step(self, action):
+        price = self._price
+        prev_value = self.total_asset
+        if price > 0:
+            self.balance, self.holding = rebalance(
+                self.balance,
+                self.holding,
+                price,
+                self.target_weight(action),
+                self.fee_rate,
+                self.slippage,
+            )
+
+        self.current_step += 1
+        done = self.current_step >= len(self.prices) - 1
+        self._price = float(self.prices[self.current_step])
+        self.total_asset = self.balance + self.holding * self._price
+
+        return self._get_obs(), self.total_asset - prev_value, done, {"portfolio_value": self.total_asset}
+
+    def render(self):
+        print(
+            f"Step: {self.current_step}, Balance: {self.balance:.2f}, "
+            f"Holding: {self.holding:.4f}, Total: {self.total_asset:.2f}"
+        )